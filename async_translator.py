@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur de traduction asyncio pour traiter de nombreux fichiers et requêtes en parallèle
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiohttp
+
+from srt_translator import SRTTranslator, SRTWriter, OllamaError, scan_srt_file, iter_srt, iter_chunks
+from srt_timing import format_range
+from srt_encoding import open_srt
+
+class AsyncSRTTranslator(SRTTranslator):
+    """Équivalent asyncio de SRTTranslator
+
+    translate_text, translate_entries et translate_srt_file sont des coroutines. Toutes
+    les requêtes, quel que soit le fichier, partagent un sémaphore global de `workers`
+    requêtes en vol et une session aiohttp limitée à `per_host_limit` connexions par hôte.
+    """
+
+    def __init__(self, ollama_url="http://localhost:11434", workers=4, per_host_limit=None, **kwargs):
+        super().__init__(ollama_url, workers=workers, **kwargs)
+        self.per_host_limit = per_host_limit or self.workers
+        self._http = None
+        self._semaphore = None
+
+    def _open_session(self):
+        # La session aiohttp est créée dans la boucle d'événements (voir _session_scope)
+        return None
+
+    @asynccontextmanager
+    async def _session_scope(self):
+        """Ouvre la session aiohttp et le sémaphore global si aucun appel englobant ne l'a fait"""
+        if self._http is not None:
+            yield
+            return
+
+        connector = aiohttp.TCPConnector(limit=self.workers, limit_per_host=self.per_host_limit)
+        timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self._http = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        try:
+            yield
+        finally:
+            await self._http.close()
+            self._http = None
+            self._semaphore = None
+
+    async def wait_warm_up_async(self):
+        """Attend la fin d'un préchargement lancé par start_warm_up sans bloquer la boucle"""
+        while self._warm_up is not None and self._warm_up.is_alive():
+            await asyncio.sleep(0.05)
+
+    async def _read_response(self, response, source_length=None, stop=(), on_partial=None):
+        """Version asynchrone de SRTTranslator._read_response"""
+        if not self.stream:
+            return self._apply_stop(await response.json(content_type=None), stop)
+        generation = self._streamed_generation(source_length, stop, on_partial)
+        async for line in response.content:
+            line = line.strip()
+            if line and generation.feed(line):
+                # Fermer la connexion interrompt la génération côté serveur
+                response.close()
+                break
+        return generation.result()
+
+    async def _generate(self, prompt, source_length=None, stop=(), on_partial=None, **options):
+        """Version asynchrone de SRTTranslator._generate (mêmes règles de nouvelle tentative)"""
+        data = self._request_data(prompt, source_length, stop, **options)
+        await self.wait_warm_up_async()
+
+        start = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    if self.limiter is not None:
+                        await self.limiter.acquire_async()
+                    # Latence mesurée hors attente d'une place, comme avec le pool de threads
+                    start = start or time.perf_counter()
+                    endpoint = self.endpoints.acquire()
+                    sent = time.perf_counter()
+                    healthy = False
+                    try:
+                        async with self._http.post(f"{endpoint.url}/api/generate", json=data) as response:
+                            status = response.status
+                            if status == 200:
+                                result = await self._read_response(response, source_length, stop, on_partial)
+                        healthy = status < 500
+                    finally:
+                        self._release(endpoint, time.perf_counter() - sent, healthy)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError, OllamaError) as e:
+                error = e
+            else:
+                if status == 200:
+                    error = self._limit_error(result, source_length)
+                    self.metrics.record(time.perf_counter() - start, result, attempt, error=error, endpoint=endpoint.url)
+                    if error is not None:
+                        raise error
+                    return result['response']
+                error = OllamaError(status)
+                # Les erreurs 4xx (modèle inconnu, requête invalide...) ne sont pas retentées
+                if status < 500:
+                    self.metrics.record(time.perf_counter() - start, retries=attempt, error=error, endpoint=endpoint.url)
+                    raise error
+
+            if attempt < self.max_retries and not self.endpoints.has_alternative(endpoint):
+                delay = self.backoff * 2 ** attempt
+                await asyncio.sleep(random.uniform(delay / 2, delay * 1.5))
+
+        self.metrics.record(time.perf_counter() - start, retries=self.max_retries, error=error, endpoint=endpoint.url)
+        raise error
+
+    async def _request_translation(self, text, source_lang, target_lang, context=None, on_partial=None):
+        return (await self._generate(
+            self._prompt_for(text, source_lang, target_lang, context),
+            source_length=len(text), stop=self._stops_for(context), on_partial=on_partial
+        )).strip()
+
+    async def translate_text(self, text, source_lang, target_lang):
+        """Traduit un texte en utilisant Ollama"""
+        async with self._session_scope():
+            try:
+                return await self._request_translation(text, source_lang, target_lang)
+            except Exception as e:
+                print(f"Erreur lors de la traduction: {e}")
+                return text
+
+    async def translate_batch(self, texts, source_lang, target_lang):
+        """Traduit plusieurs textes en une seule requête (voir SRTTranslator.translate_batch)"""
+        payload = {str(i): text for i, text in enumerate(texts, 1)}
+        try:
+            raw = await self._generate(
+                self._batch_prompt(payload, source_lang, target_lang),
+                source_length=len(json.dumps(payload, ensure_ascii=False)), format="json"
+            )
+        except Exception as e:
+            print(f"Erreur lors de la traduction par lot: {e}")
+            return None
+
+        return self._parse_batch_response(raw, payload)
+
+    async def _translate_unit(self, texts, source_lang, target_lang, context=None, on_partial=None):
+        """Traduit un lot de textes (voir SRTTranslator._translate_unit)"""
+        translations = self._lookup_memory(texts, source_lang, target_lang)
+        errors = {}
+        missing = [i for i, translation in enumerate(translations) if translation is None]
+        if not missing:
+            return translations, errors
+
+        fresh = None
+        if len(missing) > 1:
+            fresh = await self.translate_batch([texts[i] for i in missing], source_lang, target_lang)
+            if fresh is None:
+                print(f"Réponse invalide pour un lot de {len(missing)} entrées, traduction entrée par entrée")
+
+        for position, i in enumerate(missing):
+            if fresh is not None:
+                translations[i] = fresh[position]
+            else:
+                try:
+                    translations[i] = await self._request_translation(texts[i], source_lang, target_lang, context, on_partial)
+                except Exception as e:
+                    # Conserver le texte source, sans le mémoriser
+                    translations[i] = texts[i]
+                    errors[i] = str(e)
+                    continue
+
+            if self.memory is not None:
+                self.memory.put(self.model, source_lang, target_lang, texts[i], translations[i])
+
+        return translations, errors
+
+    async def _translate_entries(self, entries, source_lang, target_lang, progress_callback=None, cancel_callback=None,
+                                 journal=None, first_index=0, on_entry=None, history=None, partial_callback=None):
+        """Traduit des entrées et renvoie (résultats, statistiques, échecs), ou None si annulé
+
+        Les statistiques et les échecs sont propres à l'appel, ce qui permet de traduire
+        plusieurs fichiers en même temps avec la même instance. En mode contexte, les lots
+        sont traduits un à un et `history` reçoit les couples (source, traduction). En mode
+        flux, partial_callback(texte) reçoit la traduction en cours, au plus toutes les 0,2 s.
+        """
+        total = len(entries)
+        results = [None] * total
+        failures = []
+        remaining = self._resume_from_journal(entries, journal, results, first_index, on_entry)
+        plan = self.plan_translation(entries, remaining)
+        unique_texts = len(plan)
+        units = sum(len(group) for _, group in plan)
+        plan, skipped, outputs = self.split_passthrough(plan, source_lang, target_lang)
+        stats = {
+            'entries': total,
+            'resumed': total - len(remaining),
+            'unique_texts': unique_texts,
+            'saved_calls': units - unique_texts,
+            'merged': len(remaining) - units,
+            'skipped': len(skipped)
+        }
+        done = total - len(remaining)
+        done += self._fan_out(entries, skipped, outputs, {}, results, failures, journal, first_index, on_entry)
+        if history is None:
+            history = []
+
+        batches = deque(self._make_batches(plan))
+        # Sans contexte, toutes les tâches sont créées d'emblée (le sémaphore limite les requêtes)
+        limit = 1 if self.context_window else float('inf')
+        pending = {}
+        partial = []
+        on_partial = partial.append if partial_callback and self.stream else None
+        timeout = 0.2 if on_partial else 0.5
+        try:
+            while batches or pending:
+                # Vérifier l'annulation (au moins toutes les 0,5 s)
+                if cancel_callback and cancel_callback():
+                    return None
+
+                while batches and len(pending) < limit:
+                    batch = batches.popleft()
+                    task = asyncio.ensure_future(self._translate_unit(
+                        [text for text, _ in batch], source_lang, target_lang, self._context_for(history), on_partial
+                    ))
+                    pending[task] = batch
+
+                finished, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    batch = pending.pop(task)
+                    translations, errors = task.result()
+                    self._remember(history, batch, translations, errors)
+                    retry = []
+                    done += self._fan_out(entries, batch, translations, errors, results, failures, journal, first_index, on_entry,
+                                          retry)
+                    # Phrases trop courtes pour être découpées : leurs entrées sont traduites séparément
+                    batches.extend(self._make_batches(retry))
+                    if progress_callback:
+                        progress_callback(done, total, batch[-1][0][:50])
+
+                if partial:
+                    partial_callback(partial[-1])
+                    partial.clear()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        failures.sort(key=lambda failure: int(failure['number']))
+        return results, stats, failures
+
+    async def translate_entries(self, entries, source_lang, target_lang, progress_callback=None, cancel_callback=None, journal=None):
+        """Traduit une liste d'entrées SRT (voir SRTTranslator.translate_entries)"""
+        async with self._session_scope():
+            outcome = await self._translate_entries(entries, source_lang, target_lang, progress_callback, cancel_callback, journal)
+        if outcome is None:
+            return None
+
+        results, self.stats, self.failures = outcome
+        return results
+
+    async def translate_srt_stream(self, lines, writer, source_lang, target_lang, digest, expected=0, resume=False,
+                                   progress_callback=None, cancel_callback=None, partial_callback=None,
+                                   chunk_size=None, issues=None, time_range=None):
+        """Version asynchrone de SRTTranslator.translate_srt_stream
+
+        Plusieurs fichiers pouvant être traduits en même temps avec la même instance, les
+        blocs invalides sont ajoutés à `issues` plutôt qu'à self.parse_issues.
+        """
+        stats = {'entries': 0, 'resumed': 0, 'unique_texts': 0, 'saved_calls': 0, 'merged': 0, 'skipped': 0}
+        failures = []
+        history = []
+        entries = iter_srt(lines, issues)
+        if time_range is not None and isinstance(lines, list):
+            # Contenu déjà en mémoire : la plage est cherchée dans l'index des temps (voir select_time_range)
+            entries = list(entries)
+        entries, digest = self.select_time_range(entries, digest, time_range)
+        journal = self.open_journal(digest, source_lang, target_lang, resume)
+        try:
+            async with self._session_scope():
+                for chunk in iter_chunks(entries, chunk_size or self.chunk_size):
+                    first_index = stats['entries']
+
+                    def chunk_progress(done, total, text, first_index=first_index):
+                        if progress_callback:
+                            progress_callback(first_index + done, max(expected, first_index + total), text)
+
+                    outcome = await self._translate_entries(
+                        chunk, source_lang, target_lang, chunk_progress, cancel_callback,
+                        journal, first_index, writer.add, history, partial_callback
+                    )
+                    if outcome is None:
+                        return None
+
+                    _, chunk_stats, chunk_failures = outcome
+                    for key in stats:
+                        stats[key] += chunk_stats[key]
+                    failures.extend(chunk_failures)
+        finally:
+            if journal is not None:
+                journal.close()
+
+        if stats['entries']:
+            self.finish_journal(journal, failures)
+        return dict(stats, failures=failures)
+
+    async def translate_srt_file(self, input_file, output_file, source_lang, target_lang, progress_callback=None, cancel_callback=None, resume=False,
+                                 time_range=None):
+        """Traduit un fichier SRT complet en flux (voir SRTTranslator.translate_srt_file)
+
+        Renvoie le bilan du fichier ({'entries', 'resumed', 'unique_texts', 'saved_calls',
+        'merged', 'skipped', 'failures', 'encoding'}), ou None si le fichier est vide ou si la traduction a été annulée.
+        """
+        encoding, digest, expected = scan_srt_file(input_file)
+        if time_range is not None:
+            expected = 0
+            print(f"Traduction des entrées entre {format_range(*time_range)} (encodage {encoding}) : {input_file}")
+        else:
+            print(f"Traduction d'environ {expected} entrées (encodage {encoding}) : {input_file}")
+
+        issues = []
+        with open_srt(input_file, encoding) as source, SRTWriter(output_file) as writer:
+            result = await self.translate_srt_stream(
+                source, writer, source_lang, target_lang, digest, expected, resume,
+                progress_callback, cancel_callback, issues=issues, time_range=time_range
+            )
+        if result is None:
+            return None
+
+        self._print_parse_issues(issues)
+        if not result['entries']:
+            Path(output_file).unlink(missing_ok=True)
+            if time_range is not None:
+                print(f"Aucune entrée SRT entre {format_range(*time_range)} dans le fichier {input_file}.")
+            else:
+                print(f"Aucune entrée SRT trouvée dans le fichier {input_file}.")
+            return None
+
+        self._print_summary(output_file, result, result['failures'])
+        return dict(result, encoding=encoding)
+
+    async def translate_documents(self, documents, source_lang, target_lang, progress_callback=None, cancel_callback=None,
+                                  journals=None, max_documents=None, partial_callback=None, on_entries=None):
+        """Traduit plusieurs listes d'entrées en même temps (voir SRTTranslator.translate_documents)
+
+        progress_callback(document_index, done, total, text) est appelé à chaque lot terminé
+        et, en mode flux, partial_callback(document_index, text) reçoit la traduction en cours.
+        `journals` contient éventuellement le journal de reprise de chaque document et au
+        plus `max_documents` documents sont traduits en même temps. Avec `on_entries`, chaque
+        entrée traduite est transmise à on_entries[document] et les entrées traduites ne sont
+        pas conservées (None dans le résultat).
+        Renvoie, pour chaque document, (entrées traduites, statistiques, échecs), ou None si
+        la traduction a été annulée.
+        """
+        if journals is None:
+            journals = [None] * len(documents)
+        keep_results = on_entries is None
+        if on_entries is None:
+            on_entries = [None] * len(documents)
+        document_slots = asyncio.Semaphore(max(1, max_documents or len(documents) or 1))
+
+        def document_progress(index):
+            if progress_callback is None:
+                return None
+            return lambda done, total, text: progress_callback(index, done, total, text)
+
+        def document_partial(index):
+            if partial_callback is None:
+                return None
+            return lambda text: partial_callback(index, text)
+
+        async def translate_document(index, entries, journal, on_entry):
+            async with document_slots:
+                outcome = await self._translate_entries(
+                    entries, source_lang, target_lang, document_progress(index), cancel_callback, journal,
+                    on_entry=on_entry, partial_callback=document_partial(index)
+                )
+            if outcome is None or keep_results:
+                return outcome
+            # Entrées déjà transmises à on_entry : ne pas les garder jusqu'à la fin du lot
+            return (None,) + outcome[1:]
+
+        async with self._session_scope():
+            outcomes = await asyncio.gather(*(
+                translate_document(index, entries, journal, on_entry)
+                for index, (entries, journal, on_entry) in enumerate(zip(documents, journals, on_entries))
+            ))
+
+        if any(outcome is None for outcome in outcomes):
+            return None
+        return outcomes
+
+    async def translate_files(self, jobs, source_lang, target_lang, progress_callback=None, cancel_callback=None,
+                              resume=False, max_files=None):
+        """Traduit une liste de fichiers (entrée, sortie) en même temps, `max_files` à la fois
+
+        progress_callback(job_index, done, total, text) est appelé à chaque lot terminé.
+        Renvoie le bilan de chaque fichier (voir translate_srt_file) ou l'exception levée.
+        """
+        file_slots = asyncio.Semaphore(max(1, max_files or len(jobs) or 1))
+
+        def file_progress(index):
+            if progress_callback is None:
+                return None
+            return lambda done, total, text: progress_callback(index, done, total, text)
+
+        async def translate_job(index, input_file, output_file):
+            async with file_slots:
+                return await self.translate_srt_file(
+                    input_file, output_file, source_lang, target_lang, file_progress(index), cancel_callback, resume
+                )
+
+        async with self._session_scope():
+            return await asyncio.gather(*(
+                translate_job(index, input_file, output_file)
+                for index, (input_file, output_file) in enumerate(jobs)
+            ), return_exceptions=True)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du parseur SRT sur des fichiers synthétiques
+
+Compare l'ancien parseur par expression régulière (lookahead) au tokeniseur à états
+iter_srt, en mémoire (parse_srt) et en flux depuis un fichier, et mesure les recherches
+d'un intervalle de temps avec TimingIndex face à un parcours de toutes les entrées.
+
+Usage: python benchmarks/bench_parse.py [--sizes 10000 100000] [--json resultats.json]
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from srt_translator import SRTTranslator, iter_srt
+from srt_timing import TimingIndex
+from corpus import generate_srt
+
+LEGACY_PATTERN = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\d+\n|\n*$)'
+
+def legacy_parse(content):
+    """Ancien parse_srt, conservé pour comparaison"""
+    return [
+        {'number': number, 'timestamp': timestamp, 'text': text.strip()}
+        for number, timestamp, text in re.findall(LEGACY_PATTERN, content, re.DOTALL)
+    ]
+
+def measure(function, repeat):
+    """Renvoie (meilleure durée en secondes, résultat du dernier appel)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_size(cues, repeat, skip_legacy_above):
+    content = generate_srt(cues)
+    translator = SRTTranslator()
+    results = {'cues': cues, 'bytes': len(content.encode('utf-8'))}
+
+    duration, entries = measure(lambda: translator.parse_srt(content), repeat)
+    results['tokenizer_s'] = duration
+    results['tokenizer_entries'] = len(entries)
+    results['tokenizer_issues'] = len(translator.parse_issues)
+
+    # 100 intervalles de 10 minutes répartis sur toute la durée du fichier
+    last = entries[-1].end if entries else 0
+    ranges = [(last * k // 100, last * k // 100 + 600000) for k in range(100)]
+    duration, index = measure(lambda: TimingIndex(entries), repeat)
+    results['index_build_s'] = duration
+    duration, _ = measure(lambda: [index.overlapping(start, end) for start, end in ranges], repeat)
+    results['index_lookup_s'] = duration / len(ranges)
+    duration, _ = measure(lambda: [[i for i, entry in enumerate(entries) if entry.overlaps(start, end)] for start, end in ranges], repeat)
+    results['linear_lookup_s'] = duration / len(ranges)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.srt', encoding='utf-8', delete=False) as f:
+        f.write(content)
+        path = f.name
+    try:
+        def stream():
+            with open(path, 'r', encoding='utf-8') as source:
+                return sum(1 for _ in iter_srt(source))
+        duration, count = measure(stream, repeat)
+        results['streaming_s'] = duration
+        results['streaming_entries'] = count
+    finally:
+        Path(path).unlink()
+
+    if cues <= skip_legacy_above:
+        duration, entries = measure(lambda: legacy_parse(content), repeat)
+        results['legacy_regex_s'] = duration
+        results['legacy_regex_entries'] = len(entries)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parseur SRT")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Nombres d'entrées des fichiers générés (défaut: 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures par taille, la meilleure est gardée (défaut: 3)")
+    parser.add_argument("--skip-legacy-above", type=int, default=10**9, help="Ne mesure pas l'ancien parseur au-delà de cette taille")
+    parser.add_argument("--json", help="Fichier JSON où écrire les résultats")
+    args = parser.parse_args()
+
+    all_results = []
+    for cues in args.sizes:
+        results = bench_size(cues, args.repeat, args.skip_legacy_above)
+        all_results.append(results)
+
+        print(f"{cues} entrées ({results['bytes'] / 1e6:.1f} Mo)")
+        print(f"  tokeniseur (mémoire) : {results['tokenizer_s'] * 1000:8.1f} ms, {results['tokenizer_entries']} entrées, {results['tokenizer_issues']} blocs signalés")
+        print(f"  tokeniseur (flux)    : {results['streaming_s'] * 1000:8.1f} ms, {results['streaming_entries']} entrées")
+        print(f"  index des temps      : {results['index_build_s'] * 1000:8.1f} ms (construction), "
+              f"{results['index_lookup_s'] * 1000:.3f} ms par intervalle contre {results['linear_lookup_s'] * 1000:.3f} ms en parcours complet")
+        if 'legacy_regex_s' in results:
+            print(f"  ancienne regex       : {results['legacy_regex_s'] * 1000:8.1f} ms, {results['legacy_regex_entries']} entrées")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(all_results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout avec un faux serveur Ollama (benchmarks/mock_ollama.py)
+
+Mesure, pour chaque taille de fichier synthétique, le temps d'analyse, le débit en
+entrées/seconde, le nombre de requêtes envoyées et le pic de mémoire de
+SRTTranslator.translate_srt_file et de process_single_file (interface Streamlit).
+
+Les résultats peuvent être écrits en JSON (--json) puis comparés à une exécution de
+référence (--baseline) : le script se termine en erreur si le débit baisse ou si la
+mémoire augmente au-delà de la tolérance.
+
+Usage: python benchmarks/bench_translate.py --sizes 1000 5000 --workers 4 --json run.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from srt_translator import SRTTranslator
+from dispatcher import STRATEGIES
+from corpus import generate_srt
+
+SOURCE_LANG = "English"
+TARGET_LANG = "French"
+
+@contextlib.contextmanager
+def mock_servers(args):
+    """Lance `args.endpoints` faux serveurs Ollama dans des processus séparés et renvoie leurs URL"""
+    command = [
+        sys.executable, str(BENCH_DIR / "mock_ollama.py"), "--port", "0",
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--max-concurrency", str(args.max_concurrency)
+    ]
+    processes = [
+        subprocess.Popen(command + ["--seed", str(seed)], stdout=subprocess.PIPE, text=True)
+        for seed in range(args.endpoints)
+    ]
+    try:
+        # Première ligne : "Faux serveur Ollama sur http://hôte:port"
+        yield [process.stdout.readline().strip().rsplit(" ", 1)[-1] for process in processes]
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+def server_stats(urls):
+    """Compteurs cumulés des faux serveurs (pic de requêtes simultanées : le plus élevé)"""
+    total = {}
+    for url in urls:
+        for key, value in requests.get(f"{url}/_stats", timeout=5).json().items():
+            total[key] = max(total.get(key, 0), value) if key == 'peak_in_flight' else total.get(key, 0) + value
+    return total
+
+def make_translator(urls, args, checkpoint_dir):
+    # Pas de mémoire de traduction : chaque exécution part de zéro
+    translator = SRTTranslator(
+        urls, workers=args.workers, batch_size=args.batch_size, memory=None,
+        backoff=0.05, checkpoint_dir=checkpoint_dir, balance=args.balance,
+        context_window=args.context, adaptive=args.adaptive
+    )
+    return translator
+
+def run_measured(function):
+    """Exécute function() sans sortie console et renvoie (durée, pic mémoire en octets, résultat)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = function()
+        duration = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return duration, peak, result
+
+def bench_translate_srt_file(urls, args, workdir, path, cues):
+    translator = make_translator(urls, args, workdir / "checkpoints")
+    output = workdir / "output.srt"
+    before = server_stats(urls)
+    duration, peak, _ = run_measured(
+        lambda: translator.translate_srt_file(str(path), str(output), SOURCE_LANG, TARGET_LANG)
+    )
+    after = server_stats(urls)
+    output.unlink(missing_ok=True)
+    return duration, peak, before, after, translator
+
+def bench_process_single_file(urls, args, workdir, path, cues):
+    # Import tardif : streamlit_app exécute la configuration de la page à l'import
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        from streamlit_app import process_single_file
+
+    upload = io.BytesIO(path.read_bytes())
+    upload.name = path.name
+    translator = make_translator(urls, args, workdir / "checkpoints")
+    before = server_stats(urls)
+    duration, peak, (content, error) = run_measured(
+        lambda: process_single_file(upload, translator, SOURCE_LANG, TARGET_LANG, 'fr')
+    )
+    after = server_stats(urls)
+    if error:
+        raise RuntimeError(error)
+    return duration, peak, before, after, translator
+
+SCENARIOS = {
+    'translate_srt_file': bench_translate_srt_file,
+    'process_single_file': bench_process_single_file,
+}
+
+def run_scenario(name, urls, args, cues):
+    with tempfile.TemporaryDirectory() as directory:
+        workdir = Path(directory)
+        path = workdir / f"bench-{cues}.srt"
+        content = generate_srt(cues, unique_ratio=args.unique_ratio)
+        path.write_text(content, encoding='utf-8')
+
+        parse_start = time.perf_counter()
+        SRTTranslator().parse_srt(content)
+        parse_time = time.perf_counter() - parse_start
+
+        duration, peak, before, after, translator = SCENARIOS[name](urls, args, workdir, path, cues)
+
+    return {
+        'scenario': name,
+        'cues': cues,
+        'parse_s': round(parse_time, 4),
+        'total_s': round(duration, 3),
+        'cues_per_s': round(cues / duration, 1),
+        'requests': after['requests'] - before['requests'],
+        'server_errors': after['errors'] - before['errors'],
+        'prompt_eval_tokens': after['prompt_eval_tokens'] - before['prompt_eval_tokens'],
+        'peak_in_flight': after['peak_in_flight'],
+        'unique_texts': translator.stats.get('unique_texts'),
+        'failures': len(translator.failures),
+        'latency_p95_s': translator.metrics.summary()['latency_p95'],
+        'peak_memory_mb': round(peak / 2**20, 2),
+    }
+
+def compare(results, baseline_file, tolerance):
+    """Compare aux résultats de référence, renvoie la liste des régressions"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = {(r['scenario'], r['cues']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['scenario'], result['cues']))
+        if reference is None:
+            continue
+        label = f"{result['scenario']} ({result['cues']} entrées)"
+        if result['cues_per_s'] < reference['cues_per_s'] * (1 - tolerance):
+            regressions.append(f"{label} : débit {result['cues_per_s']} entrées/s (référence {reference['cues_per_s']})")
+        if result['peak_memory_mb'] > reference['peak_memory_mb'] * (1 + tolerance):
+            regressions.append(f"{label} : mémoire {result['peak_memory_mb']} Mo (référence {reference['peak_memory_mb']})")
+        if result['requests'] > reference['requests']:
+            regressions.append(f"{label} : {result['requests']} requêtes (référence {reference['requests']})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de traduction avec un faux serveur Ollama")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="Nombres d'entrées des fichiers générés (défaut: 1000 5000)")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=sorted(SCENARIOS), help="Chemins de code mesurés (défaut: tous)")
+    parser.add_argument("--unique-ratio", type=float, default=0.3, help="Proportion de textes uniques dans les fichiers générés (défaut: 0.3)")
+    parser.add_argument("--workers", "-w", type=int, default=4, help="Requêtes simultanées côté client (défaut: 4)")
+    parser.add_argument("--batch-size", "-b", type=int, default=1, help="Entrées par requête (défaut: 1)")
+    parser.add_argument("--context", type=int, default=0, help="Mode contexte : entrées précédentes jointes à chaque requête (défaut: 0)")
+    parser.add_argument("--adaptive", action="store_true", help="Parallélisme adaptatif : --workers devient le maximum de requêtes en vol")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latence du faux serveur en secondes (défaut: 0.01)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Gigue du faux serveur en secondes (défaut: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 503 du faux serveur (défaut: 0)")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Générations simultanées de chaque faux serveur (défaut: 4)")
+    parser.add_argument("--endpoints", type=int, default=1, help="Nombre de faux serveurs entre lesquels répartir les requêtes (défaut: 1)")
+    parser.add_argument("--balance", choices=STRATEGIES, default=STRATEGIES[0], help=f"Répartition entre les serveurs (défaut: {STRATEGIES[0]})")
+    parser.add_argument("--json", help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Écart toléré par rapport à la référence (défaut: 0.2)")
+    args = parser.parse_args()
+
+    results = []
+    with mock_servers(args) as urls:
+        for cues in args.sizes:
+            for scenario in args.scenarios:
+                result = run_scenario(scenario, urls, args, cues)
+                results.append(result)
+                print(f"{scenario:20} {cues:7} entrées : {result['total_s']:8.2f} s, {result['cues_per_s']:8.1f} entrées/s, "
+                      f"{result['requests']} requêtes ({result['prompt_eval_tokens']} mots de prompt évalués), analyse {result['parse_s'] * 1000:.1f} ms, "
+                      f"pic mémoire {result['peak_memory_mb']} Mo")
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ('json', 'baseline')}
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'python': sys.version.split()[0], 'cpus': os.cpu_count(), 'results': results}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Régression : {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
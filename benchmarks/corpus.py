@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Génération de fichiers SRT synthétiques pour les benchmarks
+"""
+
+import random
+
+LINES = [
+    "Yeah.",
+    "What?",
+    "Let's go.",
+    "I don't know what you're talking about.",
+    "We need to leave before sunrise, the guards change at six.",
+    "[music]",
+    "♪ Somewhere over the rainbow ♪",
+    "Did you hear that?",
+    "It was 1984 when it happened.",
+    "Call me when you get there, okay?",
+]
+
+def format_timestamp(milliseconds):
+    hours, rest = divmod(milliseconds, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, milliseconds = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def generate_srt(cues, seed=0, unique_ratio=0.3):
+    """Renvoie le contenu d'un fichier SRT de `cues` entrées
+
+    Environ `unique_ratio` des entrées ont un texte unique, les autres reprennent des
+    répliques courantes (comme dans un vrai film). Certaines entrées tiennent sur deux
+    lignes, d'autres contiennent une ligne ne comportant qu'un nombre.
+    """
+    rng = random.Random(seed)
+    blocks = []
+    start = 1000
+    for number in range(1, cues + 1):
+        if rng.random() < unique_ratio:
+            text = f"{rng.choice(LINES)} ({number})"
+        else:
+            text = rng.choice(LINES)
+        if rng.random() < 0.2:
+            text += "\n" + rng.choice(LINES)
+        if rng.random() < 0.01:
+            text += f"\n{rng.randint(1, 2000)}"
+
+        duration = rng.randint(800, 4000)
+        blocks.append(f"{number}\n{format_timestamp(start)} --> {format_timestamp(start + duration)}\n{text}\n")
+        start += duration + rng.randint(50, 1500)
+
+    return "\n".join(blocks)
+
+def write_srt(path, cues, seed=0, unique_ratio=0.3):
+    """Écrit un fichier SRT synthétique et renvoie son chemin"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_srt(cues, seed, unique_ratio))
+    return path
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux serveur Ollama pour les benchmarks (aucun modèle nécessaire)
+
+Répond à /api/generate et /api/tags comme Ollama, avec une latence, une gigue et un
+taux d'erreurs 503 configurables. Au-delà de --max-concurrency requêtes en cours, les
+suivantes attendent leur tour (comme OLLAMA_NUM_PARALLEL). Comme le cache de prompt
+d'Ollama, prompt_eval_count ne compte que les mots qui suivent le préfixe commun avec la
+requête précédente. Avec --runaway-rate, certaines réponses se prolongent par une
+explication interminable, générée à raison de --token-time secondes par mot ; les
+options num_predict et stop sont respectées et une réponse en flux s'arrête dès que le
+client ferme la connexion. Le modèle est chargé (--load-time) à la première requête ou
+par une requête sans prompt, puis déchargé après keep_alive (5 minutes par défaut) ; les
+requêtes qui arrivent pendant le chargement l'attendent. Les compteurs sont exposés sur /_stats.
+
+Usage: python benchmarks/mock_ollama.py --port 11434 --latency 0.2 --max-concurrency 4
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+TEXT_MARKER = "Texte à traduire:"
+CONTEXT_MARKER = "Réplique:"
+
+def fake_translation(text):
+    """Traduction factice, reconnaissable dans les fichiers de sortie"""
+    return f"[trad] {text}"
+
+def apply_options(response, options):
+    """Applique les options stop et num_predict d'Ollama, renvoie (mots, done_reason)"""
+    done_reason = 'stop'
+    for sequence in options.get('stop') or ():
+        position = response.find(sequence)
+        if position >= 0:
+            response = response[:position]
+    # Un "jeton" par mot, espaces qui le précèdent compris
+    tokens = re.findall(r'\s*\S+', response)
+    limit = options.get('num_predict')
+    if limit is not None and 0 <= limit < len(tokens):
+        tokens = tokens[:limit]
+        done_reason = 'length'
+    return tokens, done_reason
+
+def keep_alive_seconds(value):
+    """Durée keep_alive d'Ollama en secondes ("30m", "10s", 300, -1 pour toujours)"""
+    if value is None:
+        return 300.0
+    if isinstance(value, str) and value[-1:] in ('s', 'm', 'h'):
+        seconds = float(value[:-1]) * {'s': 1, 'm': 60, 'h': 3600}[value[-1]]
+    else:
+        seconds = float(value)
+    return float('inf') if seconds < 0 else seconds
+
+def fake_response(data):
+    """Construit la réponse du modèle pour une requête /api/generate"""
+    prompt = data.get('prompt', '')
+
+    if data.get('format') == 'json':
+        match = re.search(r'\{.*\}', prompt, re.DOTALL)
+        try:
+            payload = json.loads(match.group(0)) if match else {}
+        except ValueError:
+            payload = {}
+        return json.dumps({key: fake_translation(value) for key, value in payload.items()}, ensure_ascii=False)
+
+    if prompt.endswith("Traduction:") and CONTEXT_MARKER in prompt:
+        return fake_translation(prompt.rsplit(CONTEXT_MARKER, 1)[1].rsplit("\n", 1)[0].strip())
+    if TEXT_MARKER in prompt:
+        return fake_translation(prompt.rsplit(TEXT_MARKER, 1)[1].strip())
+    return fake_translation(prompt.rsplit("\n\n", 1)[-1].strip()) if prompt else ""
+
+class MockOllama(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.1, jitter=0.0, error_rate=0.0, max_concurrency=1,
+                 load_time=0.0, model="gemma3:12b", seed=None, token_time=0.0, runaway_rate=0.0):
+        super().__init__(address, MockOllamaHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.load_time = load_time
+        self.token_time = token_time
+        self.runaway_rate = runaway_rate
+        self.model = model
+        self.random = random.Random(seed)
+        self.slots = threading.Semaphore(max_concurrency)
+        self.lock = threading.Lock()
+        # Instant de déchargement du modèle (None tant qu'il n'est pas chargé)
+        self.unload_at = None
+        self.load_lock = threading.Lock()
+        self.cached_prompt = []
+        self.stats = {'requests': 0, 'errors': 0, 'in_flight': 0, 'peak_in_flight': 0, 'eval_tokens': 0, 'prompt_eval_tokens': 0,
+                      'runaways': 0, 'aborted': 0, 'loads': 0}
+
+    def ensure_loaded(self, keep_alive=None):
+        """Charge le modèle s'il ne l'est plus et renvoie la durée du chargement"""
+        with self.load_lock:
+            load_time = 0.0
+            if self.unload_at is None or time.monotonic() >= self.unload_at:
+                load_time = self.load_time
+                time.sleep(load_time)
+                self.count('loads')
+            self.unload_at = time.monotonic() + keep_alive_seconds(keep_alive)
+        return load_time
+
+    def evaluate_prompt(self, prompt):
+        """Nombre de mots du prompt hors préfixe commun avec le prompt précédent"""
+        words = prompt.split()
+        with self.lock:
+            shared = 0
+            for cached, word in zip(self.cached_prompt, words):
+                if cached != word:
+                    break
+                shared += 1
+            self.cached_prompt = words
+        return len(words) - shared
+
+    def count(self, key, delta=1):
+        with self.lock:
+            self.stats[key] += delta
+            if key == 'in_flight':
+                self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps sont envoyés séparément : sans cela, Nagle ajoute ~40 ms par réponse
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/api/tags':
+            self.send_json(200, {'models': [{'name': server.model, 'model': server.model}]})
+        elif self.path == '/_stats':
+            with server.lock:
+                self.send_json(200, dict(server.stats))
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self.send_json(400, {'error': 'invalid JSON'})
+            return
+
+        if self.path != '/api/generate':
+            self.send_json(404, {'error': 'not found'})
+            return
+        if data.get('model') != server.model:
+            self.send_json(404, {'error': f"model '{data.get('model')}' not found"})
+            return
+
+        if not data.get('prompt') and 'format' not in data:
+            # Requête sans prompt : Ollama charge seulement le modèle
+            start = time.monotonic()
+            load_time = server.ensure_loaded(data.get('keep_alive'))
+            self.send_json(200, {
+                'model': server.model, 'response': '', 'done': True, 'done_reason': 'load',
+                'load_duration': int(load_time * 1e9), 'total_duration': int((time.monotonic() - start) * 1e9),
+            })
+            return
+
+        server.count('requests')
+        with server.slots:
+            server.count('in_flight')
+            try:
+                self.generate(server, data)
+            finally:
+                server.count('in_flight', -1)
+
+    def generate(self, server, data):
+        load_time = server.ensure_loaded(data.get('keep_alive'))
+        with server.lock:
+            delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+            failed = server.random.random() < server.error_rate
+            runaway = server.random.random() < server.runaway_rate
+        time.sleep(delay)
+
+        if failed:
+            server.count('errors')
+            self.send_json(503, {'error': 'server busy'})
+            return
+
+        response = fake_response(data)
+        if runaway:
+            # Le modèle ne s'arrête pas après la traduction
+            server.count('runaways')
+            response += "\n\nExplication :" + " et ainsi de suite" * 2000
+        tokens, done_reason = apply_options(response, data.get('options') or {})
+        prompt_eval_count = server.evaluate_prompt(data.get('prompt', ''))
+        server.count('prompt_eval_tokens', prompt_eval_count)
+        final = {
+            'model': server.model,
+            'response': "".join(tokens),
+            'done': True,
+            'done_reason': done_reason,
+            'total_duration': int((load_time + delay + server.token_time * len(tokens)) * 1e9),
+            'load_duration': int(load_time * 1e9),
+            'prompt_eval_count': prompt_eval_count,
+            'prompt_eval_duration': int(delay * 0.2e9),
+            'eval_count': len(tokens),
+            'eval_duration': int((delay * 0.8 + server.token_time * len(tokens)) * 1e9),
+        }
+
+        if not data.get('stream', True):
+            time.sleep(server.token_time * len(tokens))
+            server.count('eval_tokens', len(tokens))
+            self.send_json(200, final)
+            return
+
+        # Réponse en flux : un objet JSON par ligne, mot par mot, puis le bilan
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(server.token_time)
+                self.write_chunk({'model': server.model, 'response': token, 'done': False})
+                server.count('eval_tokens')
+            self.write_chunk(dict(final, response=''))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Le client a fermé la connexion : la génération s'arrête, comme avec Ollama
+            server.count('aborted')
+            self.close_connection = True
+
+    def write_chunk(self, body):
+        data = (json.dumps(body, ensure_ascii=False) + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur Ollama pour les benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11434, help="Port d'écoute (défaut: 11434)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Durée moyenne d'une génération en secondes (défaut: 0.1)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation aléatoire de la latence en secondes (défaut: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 503 (défaut: 0)")
+    parser.add_argument("--max-concurrency", type=int, default=1, help="Générations simultanées, les autres attendent (défaut: 1)")
+    parser.add_argument("--load-time", type=float, default=0.0, help="Temps de chargement du modèle, à la première requête puis après chaque déchargement (défaut: 0)")
+    parser.add_argument("--token-time", type=float, default=0.0, help="Durée de génération de chaque mot en secondes (défaut: 0)")
+    parser.add_argument("--runaway-rate", type=float, default=0.0, help="Proportion de réponses qui se prolongent indéfiniment après la traduction (défaut: 0)")
+    parser.add_argument("--model", default="gemma3:12b", help="Nom du modèle annoncé (défaut: gemma3:12b)")
+    parser.add_argument("--seed", type=int, help="Graine aléatoire (latence et erreurs reproductibles)")
+    args = parser.parse_args()
+
+    server = MockOllama(
+        (args.host, args.port), latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency, load_time=args.load_time, model=args.model, seed=args.seed,
+        token_time=args.token_time, runaway_rate=args.runaway_rate
+    )
+    print(f"Faux serveur Ollama sur http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Journal de reprise : conserve les entrées déjà traduites d'un fichier SRT
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+DEFAULT_CHECKPOINT_DIR = Path.home() / ".cache" / "srt-translator" / "checkpoints"
+
+def content_digest(data):
+    """Empreinte sha256 du contenu brut d'un fichier"""
+    return hashlib.sha256(data).hexdigest()
+
+class CheckpointJournal:
+    """Journal en ajout seul (JSON lines) des entrées traduites d'une tâche
+
+    Une tâche est identifiée par le contenu du fichier source, le modèle et les langues :
+    relancer la même traduction retrouve le même journal.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._done = None
+
+    @classmethod
+    def for_job(cls, digest, model, source_lang, target_lang, directory=DEFAULT_CHECKPOINT_DIR):
+        """Renvoie le journal associé à l'empreinte du fichier (voir content_digest) et aux paramètres"""
+        key = hashlib.sha256(digest.encode('ascii'))
+        for part in (model, source_lang, target_lang):
+            key.update(b"\0" + part.encode('utf-8'))
+        return cls(Path(directory) / f"{key.hexdigest()}.jsonl")
+
+    def load(self):
+        """Renvoie {indice de l'entrée: texte traduit} pour les entrées déjà journalisées
+
+        Le journal n'est lu qu'une fois ; l'appelant peut retirer les entrées consommées
+        du dictionnaire renvoyé pour libérer la mémoire.
+        """
+        if self._done is not None:
+            return self._done
+
+        done = self._done = {}
+        if not self.path.exists():
+            return done
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    done[record['index']] = record['text']
+                except (ValueError, KeyError, TypeError):
+                    # Dernière ligne tronquée si le processus a été interrompu pendant l'écriture
+                    continue
+        return done
+
+    def append(self, index, text):
+        """Journalise une entrée traduite (écriture immédiate sur disque)"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'index': index, 'text': text}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """Supprime le journal (nouvelle traduction ou traduction terminée)"""
+        self.close()
+        self._done = {}
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Répartition des requêtes entre plusieurs serveurs Ollama
+"""
+
+import threading
+import time
+
+import requests
+
+STRATEGIES = ("least-outstanding", "latency")
+
+def parse_urls(value):
+    """Découpe une liste d'URL séparées par des virgules, espaces ou retours à la ligne"""
+    return [url.rstrip('/') for url in value.replace(',', ' ').split()]
+
+class Endpoint:
+    """Un serveur Ollama et son état observé"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.outstanding = 0
+        # Moyenne mobile exponentielle de la latence (None tant qu'aucune requête n'a abouti)
+        self.latency = None
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def available(self, now):
+        return self.ejected_until <= now
+
+    def __repr__(self):
+        return f"Endpoint({self.url!r})"
+
+class EndpointPool:
+    """Choisit le serveur de chaque requête et écarte temporairement ceux qui échouent
+
+    Stratégies : "least-outstanding" (le moins de requêtes en cours, puis la latence la
+    plus faible) ou "latency" (temps d'attente estimé : requêtes en cours x latence
+    moyenne). Après `max_failures` échecs consécutifs (erreur réseau, timeout, 5xx), un
+    serveur est écarté pendant `eject_seconds`, durée doublée à chaque nouvelle éviction
+    (au plus `max_eject_seconds`). À son retour, la requête suivante lui sert de test. Une
+    même instance peut être utilisée depuis plusieurs threads.
+    """
+
+    def __init__(self, urls, strategy="least-outstanding", max_failures=2, eject_seconds=10.0,
+                 max_eject_seconds=300.0, smoothing=0.3):
+        if isinstance(urls, str):
+            urls = parse_urls(urls)
+        if not urls:
+            raise ValueError("Aucune URL Ollama")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Stratégie inconnue : {strategy}")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _score(self, endpoint):
+        latency = endpoint.latency or 0.0
+        if self.strategy == "latency":
+            return ((endpoint.outstanding + 1) * latency, endpoint.outstanding)
+        return (endpoint.outstanding, latency)
+
+    def acquire(self):
+        """Réserve le serveur de la prochaine requête (à rendre avec release)
+
+        Si tous les serveurs sont écartés, celui qui revient le plus tôt est utilisé.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.available(now)]
+            if candidates:
+                endpoint = min(candidates, key=self._score)
+            else:
+                endpoint = min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint, latency=None, ok=True):
+        """Termine une requête : met à jour la latence moyenne ou compte l'échec"""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.ejections = 0
+                if latency is not None:
+                    if endpoint.latency is None:
+                        endpoint.latency = latency
+                    else:
+                        endpoint.latency += self.smoothing * (latency - endpoint.latency)
+                return
+
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.max_failures:
+                self._eject(endpoint)
+
+    def _eject(self, endpoint):
+        duration = min(self.max_eject_seconds, self.eject_seconds * 2 ** endpoint.ejections)
+        endpoint.ejections += 1
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = time.monotonic() + duration
+        print(f"Serveur Ollama écarté pendant {duration:.0f} s : {endpoint.url}")
+
+    def has_alternative(self, endpoint):
+        """Indique si un autre serveur peut reprendre immédiatement une requête"""
+        now = time.monotonic()
+        with self._lock:
+            return any(other is not endpoint and other.available(now) for other in self.endpoints)
+
+    def check_health(self, model=None, timeout=5):
+        """Interroge /api/tags sur chaque serveur et écarte ceux qui ne répondent pas
+
+        Avec `model`, un serveur qui ne propose pas ce modèle est aussi écarté.
+        Renvoie {url: liste des modèles, ou None si le serveur est écarté}.
+        """
+        report = {}
+        for endpoint in self.endpoints:
+            try:
+                response = requests.get(f"{endpoint.url}/api/tags", timeout=timeout)
+                response.raise_for_status()
+                models = [model['name'] for model in response.json().get('models', [])]
+            except (requests.RequestException, ValueError, KeyError):
+                models = None
+            if models is not None and model and model not in models and f"{model}:latest" not in models:
+                models = None
+            report[endpoint.url] = models
+
+            with self._lock:
+                if models is None:
+                    self._eject(endpoint)
+                else:
+                    endpoint.ejected_until = 0.0
+                    endpoint.ejections = 0
+        return report
+
+    def status(self):
+        """État de chaque serveur : (url, requêtes en cours, latence moyenne, écarté)"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (endpoint.url, endpoint.outstanding, endpoint.latency, not endpoint.available(now))
+                for endpoint in self.endpoints
+            ]
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File de traductions exécutées en arrière-plan, suivie dans une table SQLite
+"""
+
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+
+DEFAULT_JOBS_DIR = Path.home() / ".cache" / "srt-translator" / "jobs"
+DEFAULT_MAX_JOBS = 2
+# Résultats conservés : dernières tâches terminées de chaque navigateur, et durée maximale
+DEFAULT_KEEP_PER_OWNER = 5
+DEFAULT_RETENTION = 7 * 24 * 3600
+
+# États d'une tâche : en attente, en cours, puis terminée, en échec ou annulée
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+
+# Files déjà créées dans ce processus, par répertoire (voir shared_queue)
+_queues = {}
+_queues_lock = threading.Lock()
+
+def shared_queue(handler, directory=DEFAULT_JOBS_DIR, max_jobs=DEFAULT_MAX_JOBS):
+    """Renvoie la file du processus pour `directory`, créée au premier appel
+
+    Streamlit réexécute le script (et vide parfois ses caches) : une seconde file sur le
+    même répertoire remettrait en attente les tâches en cours de la première. Le
+    gestionnaire le plus récent remplace le précédent.
+    """
+    directory = Path(directory).resolve()
+    with _queues_lock:
+        queue = _queues.get(directory)
+        if queue is None:
+            queue = _queues[directory] = JobQueue(handler, directory, max_jobs)
+        else:
+            queue.handler = handler
+        return queue
+
+class StoredFile:
+    """Fichier d'entrée d'une tâche, lu depuis le disque à la demande
+
+    Même interface que les fichiers uploadés dans Streamlit (name, size, getvalue()).
+    """
+
+    def __init__(self, path, name):
+        self.path = Path(path)
+        self.name = name
+
+    @property
+    def size(self):
+        return self.path.stat().st_size
+
+    def getvalue(self):
+        return self.path.read_bytes()
+
+class JobProgress:
+    """Suivi d'une tâche en cours, transmis au gestionnaire de la tâche
+
+    Les mises à jour sont écrites dans la table au plus toutes les `interval` secondes et
+    la demande d'annulation est relue au même rythme : les callbacks de progression
+    peuvent être appelés après chaque lot sans ralentir la traduction.
+    """
+
+    def __init__(self, queue, job, interval):
+        self.queue = queue
+        self.job_id = job['id']
+        self.interval = interval
+        self.files = [[0, 0] for _ in job['names']]
+        self.message = ""
+        self.live = {}
+        self._last_write = 0.0
+        self._last_check = 0.0
+        self._cancelled = False
+
+    def update(self, file_index, done, total, message):
+        """Entrées traduites du fichier `file_index` et message de progression"""
+        self.files[file_index] = [done, total]
+        self.message = message
+        self._write()
+
+    def set_message(self, message):
+        """Message de progression seul (traduction en cours reçue en flux, par exemple)"""
+        self.message = message
+        self._write()
+
+    def set_live(self, **values):
+        """Indicateurs affichés pendant la traduction (débit, limite de requêtes en vol...)"""
+        self.live.update(values)
+
+    def cancelled(self):
+        """Indique si l'annulation de la tâche a été demandée"""
+        now = time.monotonic()
+        if not self._cancelled and now - self._last_check >= self.interval:
+            self._last_check = now
+            self._cancelled = self.queue.cancel_requested(self.job_id)
+        return self._cancelled
+
+    def _write(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_write >= self.interval:
+            self._last_write = now
+            self.queue._update_progress(self.job_id, self.files, self.message, self.live)
+
+class JobQueue:
+    """Tâches de traduction exécutées par des threads d'arrière-plan
+
+    Chaque tâche (fichiers d'entrée et paramètres) est enregistrée dans une table SQLite
+    et ses fichiers dans `directory` : elle continue si la page qui l'a lancée est
+    rechargée ou fermée, et sa progression est relue par l'interface. Au plus `max_jobs`
+    tâches s'exécutent en même temps pour tout le serveur, les suivantes attendent dans
+    l'ordre d'arrivée. handler(tâche, JobProgress) traduit une tâche : il écrit ses
+    résultats dans output_dir(id) et renvoie un bilan sérialisable en JSON, ou None si
+    la tâche a été annulée ; une exception la marque en échec.
+
+    Seuls les fichiers traduits d'une tâche terminée restent sur disque (ses fichiers
+    d'entrée sont supprimés) ; au-delà des `keep_per_owner` dernières tâches terminées
+    d'un même navigateur, ou après `retention` secondes, une tâche et ses fichiers sont
+    supprimés (voir evict).
+
+    Les tâches restées en cours après un arrêt du serveur sont remises en attente au
+    démarrage (tentative suivante, voir le champ 'attempts') : un seul processus doit
+    utiliser un même répertoire, avec une seule file (voir shared_queue).
+    """
+
+    def __init__(self, handler, directory=DEFAULT_JOBS_DIR, max_jobs=DEFAULT_MAX_JOBS, progress_interval=0.5,
+                 keep_per_owner=DEFAULT_KEEP_PER_OWNER, retention=DEFAULT_RETENTION):
+        self.handler = handler
+        self.directory = Path(directory)
+        self.max_jobs = max(1, int(max_jobs))
+        self.keep_per_owner = keep_per_owner
+        self.retention = retention
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopped = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.directory / "jobs.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                status TEXT NOT NULL,
+                names TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '[]',
+                message TEXT NOT NULL DEFAULT '',
+                live TEXT NOT NULL DEFAULT '{}',
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._conn.execute("UPDATE jobs SET status='queued' WHERE status='running'")
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"srt-job-{index}", daemon=True)
+            for index in range(self.max_jobs)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, owner, files, settings):
+        """Enregistre une tâche et renvoie son identifiant
+
+        `files` contient (nom, contenu brut) pour chaque fichier à traduire et `settings`
+        les paramètres sérialisables en JSON transmis au gestionnaire.
+        """
+        job_id = uuid.uuid4().hex
+        input_dir = self.directory / job_id / "input"
+        names = []
+        for index, (name, data) in enumerate(files):
+            # Un sous-répertoire par fichier : deux uploads peuvent porter le même nom
+            path = input_dir / str(index) / Path(name).name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            names.append(path.name)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, owner, status, names, settings, progress, created) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, owner, json.dumps(names), json.dumps(settings), json.dumps([[0, 0] for _ in names]), time.time())
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        self.evict(owner)
+        return job_id
+
+    def get(self, job_id):
+        """Renvoie la tâche (dict), ou None si elle n'existe pas"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, owner, limit=20):
+        """Dernières tâches de `owner`, les plus récentes d'abord"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE owner=? ORDER BY created DESC LIMIT ?", (owner, limit)
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def position(self, job_id):
+        """Nombre de tâches en attente avant `job_id` (tous utilisateurs confondus)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status='queued' AND created < (SELECT created FROM jobs WHERE id=?)",
+                (job_id,)
+            ).fetchone()[0]
+
+    def cancel(self, job_id):
+        """Annule une tâche : immédiatement si elle attend, entre deux lots si elle est en cours"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status='cancelled', finished=? WHERE id=? AND status='queued'", (time.time(), job_id)
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested=1 WHERE id=? AND status='running'", (job_id,))
+        if cursor.rowcount:
+            shutil.rmtree(self.directory / job_id / "input", ignore_errors=True)
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def delete(self, job_id):
+        """Supprime une tâche terminée et ses fichiers (sans effet sur une tâche active)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE id=? AND status NOT IN ('queued', 'running')", (job_id,)
+            )
+        if cursor.rowcount:
+            shutil.rmtree(self.directory / job_id, ignore_errors=True)
+
+    def evict(self, owner=None):
+        """Supprime les tâches terminées trop anciennes, et celles de `owner` au-delà de keep_per_owner"""
+        finished = "status NOT IN ('queued', 'running')"
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                f"SELECT id FROM jobs WHERE {finished} AND finished < ?", (time.time() - self.retention,)
+            )]
+            if owner is not None:
+                expired += [row[0] for row in self._conn.execute(
+                    f"SELECT id FROM jobs WHERE owner=? AND {finished} ORDER BY created DESC LIMIT -1 OFFSET ?",
+                    (owner, self.keep_per_owner)
+                )]
+        for job_id in set(expired):
+            self.delete(job_id)
+
+    def inputs(self, job):
+        """Fichiers d'entrée de la tâche, dans l'ordre de soumission"""
+        input_dir = self.directory / job['id'] / "input"
+        return [StoredFile(input_dir / str(index) / name, name) for index, name in enumerate(job['names'])]
+
+    def output_dir(self, job_id):
+        """Répertoire des fichiers produits par la tâche"""
+        return self.directory / job_id / "output"
+
+    def close(self):
+        """Arrête les threads après leur tâche en cours"""
+        self._stopped = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    @staticmethod
+    def _decode(row):
+        job = dict(row)
+        for key in ('names', 'settings', 'progress', 'live', 'result'):
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def _claim(self):
+        """Passe la plus ancienne tâche en attente à l'état en cours et la renvoie"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status='queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status='running', started=?, attempts=attempts+1 WHERE id=?", (time.time(), row[0])
+            )
+            job = self._conn.execute("SELECT * FROM jobs WHERE id=?", (row[0],)).fetchone()
+        return self._decode(job)
+
+    def _update_progress(self, job_id, files, message, live):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress=?, message=?, live=? WHERE id=?",
+                (json.dumps(files), message, json.dumps(live), job_id)
+            )
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status=?, result=?, error=?, finished=? WHERE id=?",
+                (status, None if result is None else json.dumps(result), error, time.time(), job_id)
+            )
+        # Seuls les fichiers traduits sont encore utiles
+        shutil.rmtree(self.directory / job_id / "input", ignore_errors=True)
+
+    def _worker(self):
+        while not self._stopped:
+            job = self._claim()
+            if job is None:
+                # Réveil à chaque soumission, ou après un délai pour les tâches remises en attente
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                self.evict()
+                continue
+
+            progress = JobProgress(self, job, self.progress_interval)
+            try:
+                result = self.handler(job, progress)
+            except Exception as e:
+                traceback.print_exc()
+                progress._write(force=True)
+                self._finish(job['id'], "failed", error=str(e))
+                self.evict(job['owner'])
+                continue
+            progress._write(force=True)
+            if result is None:
+                self._finish(job['id'], "cancelled")
+            else:
+                self._finish(job['id'], "done", result)
+            self.evict(job['owner'])
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Limite adaptative du nombre de requêtes Ollama en vol (AIMD)
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from metrics import percentile
+
+class AdaptiveLimiter:
+    """Ajuste le nombre de requêtes en vol entre `min_limit` et `max_limit`
+
+    Augmentation additive : tant que toutes les places sont occupées et que la latence
+    moyenne récente reste sous `tolerance` fois la latence de référence (10e percentile
+    des 100 dernières réponses), chaque réponse ajoute 1/limite, soit une requête de plus
+    par tour. Le serveur absorbe alors la charge et le débit progresse.
+
+    Diminution multiplicative : la limite est multipliée par `backoff` quand la latence
+    dépasse ce seuil (les requêtes font la queue côté serveur) et divisée par deux en cas
+    d'erreur réseau, de timeout ou de réponse 5xx, au plus une fois par tour.
+
+    Toutes les `interval` secondes, la limite, le débit (réponses/s) et la latence
+    moyenne sont ajoutés à `history` et affichés. Une même instance peut être utilisée
+    depuis plusieurs threads et boucles asyncio.
+    """
+
+    def __init__(self, max_limit, min_limit=1, initial=None, tolerance=1.5, backoff=0.75, interval=5.0):
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = max(1, min(int(min_limit), self.max_limit))
+        self.limit = float(initial or self.min_limit)
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.interval = interval
+        self.in_flight = 0
+        # Historique : dicts {'time', 'limit', 'throughput', 'latency'}
+        self.history = []
+        self._lock = threading.Lock()
+        # File d'attente : (None, threading.Event) ou (boucle asyncio, future)
+        self._waiters = deque()
+        self._latencies = deque(maxlen=100)
+        self._recent = None
+        self._last_decrease = 0.0
+        self._started = time.monotonic()
+        self._window_start = self._started
+        self._window = []
+
+    @property
+    def current(self):
+        """Nombre de requêtes actuellement autorisées en même temps"""
+        return max(self.min_limit, min(self.max_limit, int(self.limit)))
+
+    def acquire(self):
+        """Attend une place libre (version bloquante, pour les threads)
+
+        Les places sont attribuées dans l'ordre d'arrivée, threads et tâches confondus.
+        """
+        with self._lock:
+            if not self._waiters and self.in_flight < self.current:
+                self.in_flight += 1
+                return
+            event = threading.Event()
+            self._waiters.append((None, event))
+        event.wait()
+
+    async def acquire_async(self):
+        """Attend une place libre sans bloquer la boucle d'événements"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self.in_flight < self.current:
+                self.in_flight += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+                elif not future.cancelled():
+                    # La place avait déjà été attribuée à cette tâche
+                    self.in_flight -= 1
+                    self._wake()
+            raise
+
+    def release(self, latency, ok=True):
+        """Libère une place et ajuste la limite
+
+        `ok` est faux pour une erreur réseau, un timeout ou une réponse 5xx ; `latency`
+        est None pour une requête qui ne renseigne pas sur la charge du serveur.
+        """
+        now = time.monotonic()
+        with self._lock:
+            saturated = self.in_flight >= self.current
+            self.in_flight -= 1
+            if not ok:
+                self._decrease(now, 0.5)
+            elif latency is not None:
+                self._observe(now, latency, saturated)
+            self._record(now, latency if ok else None)
+            self._wake()
+
+    def _observe(self, now, latency, saturated):
+        self._latencies.append(latency)
+        self._recent = latency if self._recent is None else self._recent + 0.3 * (latency - self._recent)
+        baseline = percentile(sorted(self._latencies), 0.10)
+        if len(self._latencies) >= 5 and self._recent > self.tolerance * baseline:
+            self._decrease(now, self.backoff)
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _decrease(self, now, factor):
+        # Une seule baisse par tour : les réponses d'un même tour reflètent la même surcharge
+        if now - self._last_decrease < (self._recent or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+
+    def _record(self, now, latency):
+        self._window.append(latency)
+        elapsed = now - self._window_start
+        if elapsed < self.interval:
+            return
+        latencies = [value for value in self._window if value is not None]
+        sample = {
+            'time': round(now - self._started, 1),
+            'limit': self.current,
+            'throughput': len(self._window) / elapsed,
+            'latency': sum(latencies) / len(latencies) if latencies else None,
+        }
+        self.history.append(sample)
+        self._window_start = now
+        self._window = []
+        print(self.format_sample(sample))
+
+    @staticmethod
+    def format_sample(sample):
+        latency = "-" if sample['latency'] is None else f"{sample['latency']:.2f} s"
+        return (f"Parallélisme adaptatif : {sample['limit']} requêtes en vol, "
+                f"{sample['throughput']:.1f} réponses/s, latence {latency}")
+
+    def _wake(self):
+        """Attribue les places libres aux premiers en attente"""
+        while self._waiters and self.in_flight < self.current:
+            loop, waiter = self._waiters.popleft()
+            self.in_flight += 1
+            if loop is None:
+                waiter.set()
+            else:
+                loop.call_soon_threadsafe(self._hand_over, waiter)
+
+    def _hand_over(self, future):
+        if future.done():
+            # Tâche annulée entre-temps : rendre la place
+            with self._lock:
+                self.in_flight -= 1
+                self._wake()
+        else:
+            future.set_result(None)
+
+    def format_summary(self):
+        """Bilan lisible de l'ajustement (liste de lignes), vide sans historique"""
+        if not self.history:
+            return []
+        limits = [sample['limit'] for sample in self.history]
+        best = max(self.history, key=lambda sample: sample['throughput'])
+        return [
+            f"Parallélisme adaptatif : limite finale {self.current} (entre {min(limits)} et {max(limits)}, "
+            f"meilleur débit {best['throughput']:.1f} réponses/s avec {best['limit']} requêtes en vol)"
+        ]
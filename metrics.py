@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesures par requête Ollama : latence, jetons, débit, nouvelles tentatives et échecs
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+def percentile(sorted_values, fraction):
+    """Percentile (rang le plus proche) d'une liste triée, None si elle est vide"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+class RequestMetrics:
+    """Agrège les mesures de chaque requête /api/generate
+
+    Les durées et compteurs de jetons proviennent de la réponse d'Ollama (eval_count,
+    prompt_eval_count, eval_duration, load_duration, total_duration). Les préchargements
+    du modèle sont comptés à part (voir record_warm_up). Avec `path`, chaque requête est
+    aussi écrite en JSON lines. Une même instance peut être utilisée depuis plusieurs threads.
+    """
+
+    def __init__(self, path=None, window=30.0):
+        self.path = Path(path) if path else None
+        # Durée (secondes) sur laquelle est calculé le débit instantané
+        self.window = window
+        self._lock = threading.Lock()
+        self._file = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.prompt_tokens = 0
+            self.eval_tokens = 0
+            self.eval_seconds = 0.0
+            self.load_seconds = 0.0
+            self.latencies = []
+            # Nombre de requêtes par serveur Ollama
+            self.endpoints = {}
+            # Préchargements du modèle : dicts {'endpoint', 'latency', 'load_s', 'ok'}
+            self.warm_ups = []
+            self._first = None
+            self._recent = deque()
+
+    def record(self, latency, result=None, retries=0, error=None, endpoint=None):
+        """Enregistre une requête terminée
+
+        `latency` est la durée totale vue par le client (nouvelles tentatives comprises),
+        `result` la réponse JSON d'Ollama (None en cas d'échec) et `endpoint` l'URL du
+        serveur qui a traité la dernière tentative.
+        """
+        now = time.monotonic()
+        result = result or {}
+        prompt_tokens = result.get('prompt_eval_count', 0)
+        eval_tokens = result.get('eval_count', 0)
+        eval_seconds = result.get('eval_duration', 0) / 1e9
+        load_seconds = result.get('load_duration', 0) / 1e9
+
+        with self._lock:
+            if self._first is None:
+                self._first = now - latency
+            self.requests += 1
+            self.retries += retries
+            self.latencies.append(latency)
+            if endpoint is not None:
+                self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+            if error is not None:
+                self.failures += 1
+            else:
+                self.prompt_tokens += prompt_tokens
+                self.eval_tokens += eval_tokens
+                self.eval_seconds += eval_seconds
+                self.load_seconds += load_seconds
+                self._recent.append((now, eval_tokens))
+
+            self._write({
+                'time': round(time.time(), 3),
+                'latency_s': round(latency, 4),
+                'ok': error is None,
+                'error': None if error is None else str(error),
+                'endpoint': endpoint,
+                'retries': retries,
+                'prompt_tokens': prompt_tokens,
+                'eval_tokens': eval_tokens,
+                'tokens_per_s': round(eval_tokens / eval_seconds, 2) if eval_seconds else None,
+                'load_s': round(load_seconds, 4),
+                'total_s': round(result.get('total_duration', 0) / 1e9, 4),
+            })
+
+    def record_warm_up(self, endpoint, latency, result=None, error=None):
+        """Enregistre le préchargement du modèle sur un serveur
+
+        Il n'entre pas dans les statistiques des requêtes de traduction. `latency` est la
+        durée vue par le client et `result` la réponse d'Ollama (load_duration).
+        """
+        load_seconds = (result or {}).get('load_duration', 0) / 1e9
+        with self._lock:
+            self.warm_ups.append({'endpoint': endpoint, 'latency': latency, 'load_s': load_seconds, 'ok': error is None})
+            self._write({
+                'time': round(time.time(), 3),
+                'warm_up': True,
+                'latency_s': round(latency, 4),
+                'ok': error is None,
+                'error': None if error is None else str(error),
+                'endpoint': endpoint,
+                'load_s': round(load_seconds, 4),
+            })
+
+    def _write(self, record):
+        # Appelé avec self._lock
+        if self.path is None:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def tokens_per_second(self):
+        """Débit de génération (jetons/s) sur les `window` dernières secondes"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0][0] < now - self.window:
+                self._recent.popleft()
+            if self._first is None:
+                return 0.0
+            span = min(self.window, now - self._first)
+            return sum(tokens for _, tokens in self._recent) / span if span > 0 else 0.0
+
+    def summary(self):
+        """Renvoie le bilan des requêtes enregistrées"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            warm_ups = [warm_up for warm_up in self.warm_ups if warm_up['ok']]
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'retries': self.retries,
+                'prompt_tokens': self.prompt_tokens,
+                'eval_tokens': self.eval_tokens,
+                'tokens_per_s': self.eval_tokens / self.eval_seconds if self.eval_seconds else None,
+                'load_s': self.load_seconds,
+                'latency_p50': percentile(latencies, 0.50),
+                'latency_p95': percentile(latencies, 0.95),
+                'latency_p99': percentile(latencies, 0.99),
+                'endpoints': dict(self.endpoints),
+                # Serveurs préchargés en parallèle : durée du plus lent
+                'warm_up_s': max(warm_up['latency'] for warm_up in warm_ups) if warm_ups else None,
+                'warm_up_load_s': sum(warm_up['load_s'] for warm_up in warm_ups),
+            }
+
+    def format_summary(self):
+        """Bilan lisible des requêtes (liste de lignes), vide si aucune requête"""
+        summary = self.summary()
+        lines = []
+        if summary['warm_up_s'] is not None:
+            lines.append(f"Préchargement du modèle : {summary['warm_up_s']:.1f} s (chargement {summary['warm_up_load_s']:.1f} s)")
+        if not summary['requests']:
+            return lines
+
+        lines += [
+            f"Requêtes Ollama : {summary['requests']} ({summary['failures']} échecs, {summary['retries']} nouvelles tentatives)",
+            "Latence : p50 {:.2f} s, p95 {:.2f} s, p99 {:.2f} s".format(
+                summary['latency_p50'], summary['latency_p95'], summary['latency_p99']
+            ),
+            f"Jetons : {summary['prompt_tokens']} en entrée, {summary['eval_tokens']} générés",
+        ]
+        if summary['tokens_per_s']:
+            lines.append(f"Débit de génération : {summary['tokens_per_s']:.1f} jetons/s")
+        if len(summary['endpoints']) > 1:
+            lines.append("Répartition : " + ", ".join(f"{url} {count}" for url, count in summary['endpoints'].items()))
+        if summary['load_s'] >= 0.1:
+            lines.append(f"Chargement du modèle pendant la traduction : {summary['load_s']:.1f} s")
+        return lines
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
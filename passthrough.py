@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sous-titres qui n'ont pas besoin du modèle : recopiés tels quels ou convertis par règle
+"""
+
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+# Règles disponibles (voir PassthroughClassifier)
+RULES = ("symbols", "tags", "urls", "speakers", "target_language")
+# Règles appliquées par défaut : "target_language" ne s'active que sur demande, un texte
+# recopié à tort restant non traduit alors qu'un texte envoyé à tort ne coûte qu'une requête
+DEFAULT_RULES = ("symbols", "tags", "urls", "speakers")
+
+TAG_PATTERN = re.compile(r'^([\[(])([^\])]*)([\])])$')
+URL_PATTERN = re.compile(r'^(?:https?://\S+|www\.\S+|[\w.+-]+@[\w-]+\.[\w.-]+|@\w+)$', re.IGNORECASE)
+SPEAKER_PATTERN = re.compile(r"^[-–]?\s*[A-Z][A-Z0-9 .'-]*:$")
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Noms de langue de l'interface web (français) vers ceux de la ligne de commande
+LANGUAGE_ALIASES = {
+    'anglais': 'english', 'français': 'french', 'espagnol': 'spanish', 'italien': 'italian',
+    'allemand': 'german', 'portugais': 'portuguese', 'chinois': 'chinese', 'japonais': 'japanese',
+    'coréen': 'korean', 'russe': 'russian',
+}
+
+# Écriture de chaque langue et mots courants (langues à alphabet latin) : un mot commun à
+# deux langues ne compte pour aucune des deux (voir in_language)
+LANGUAGES = {
+    'english': ('LATIN', {
+        'the', 'a', 'an', 'and', 'or', 'but', 'if', 'so', 'as', 'at', 'by', 'for', 'from', 'of',
+        'on', 'off', 'to', 'in', 'into', 'up', 'out', 'with', 'about', 'all', 'no', 'not', 'yes',
+        'you', 'i', 'me', 'my', 'he', 'him', 'his', 'she', 'her', 'we', 'us', 'our', 'they', 'them',
+        'their', 'it', 'its', 'this', 'that', 'these', 'those', 'what', 'who', 'where', 'when',
+        'why', 'how', 'is', 'are', 'was', 'were', 'be', 'been', 'am', 'do', 'does', 'did', 'don',
+        'have', 'has', 'had', 'will', 'would', 'can', 'could', 'should', 'must', 'let', 'go',
+        'come', 'get', 'got', 'know', 'think', 'want', 'see', 'say', 'said', 'tell', 'take', 'make',
+        'like', 'just', 'now', 'here', 'there', 'then', 'well', 'okay', 'oh', 'hey', 'please',
+        'thank', 'thanks', 'sorry', 'right', 'good', 'one', 'two', 'long', 'live', 'time', 'man',
+        'die', 'dead', 'sure', 'really', 'never', 'always', 'again', 'back', 'over', 'too', 've',
+        'll', 're', 's', 't', 'm', 'd',
+    }),
+    'french': ('LATIN', {
+        'le', 'la', 'les', 'l', 'un', 'une', 'des', 'du', 'de', 'd', 'au', 'aux', 'et', 'ou', 'mais',
+        'donc', 'est', 'sont', 'suis', 'es', 'être', 'ai', 'as', 'avez', 'avons', 'ont', 'je', 'j',
+        'tu', 'il', 'elle', 'on', 'nous', 'vous', 'ils', 'elles', 'me', 'm', 'te', 't', 'se', 's',
+        'moi', 'toi', 'lui', 'leur', 'mon', 'ma', 'mes', 'ton', 'ta', 'tes', 'son', 'sa', 'ses',
+        'notre', 'votre', 'ce', 'c', 'cette', 'ces', 'ça', 'qui', 'que', 'qu', 'quoi', 'où',
+        'quand', 'comment', 'pourquoi', 'ne', 'n', 'pas', 'plus', 'rien', 'jamais', 'oui', 'non',
+        'avec', 'pour', 'dans', 'sur', 'sous', 'chez', 'par', 'sans', 'très', 'bien', 'tout',
+        'tous', 'fait', 'faire', 'va', 'vais', 'allez', 'peux', 'veux', 'sais', 'dit', 'merci',
+        'voilà', 'ici', 'là', 'alors', 'aussi', 'encore', 'déjà', 'y', 'en',
+    }),
+    'spanish': ('LATIN', {
+        'el', 'la', 'los', 'las', 'lo', 'un', 'una', 'unos', 'unas', 'de', 'del', 'al', 'y', 'o',
+        'pero', 'es', 'son', 'soy', 'eres', 'está', 'estoy', 'están', 'ser', 'estar', 'he', 'ha',
+        'han', 'hay', 'yo', 'tú', 'usted', 'él', 'ella', 'nosotros', 'ellos', 'me', 'te', 'se',
+        'nos', 'le', 'les', 'mi', 'mis', 'tu', 'tus', 'su', 'sus', 'este', 'esta', 'eso', 'esto',
+        'qué', 'que', 'quién', 'dónde', 'cuándo', 'cómo', 'por', 'para', 'con', 'sin', 'en',
+        'sobre', 'no', 'sí', 'muy', 'más', 'bien', 'todo', 'nada', 'ya', 'aquí', 'ahora',
+        'gracias', 'vamos', 'hablamos', 'tengo', 'tiene', 'quiero', 'puedo', 'sé', 'hace',
+        'entonces', 'también', 'porque', 'cuando', 'si', 'a',
+    }),
+    'italian': ('LATIN', {
+        'il', 'lo', 'la', 'i', 'gli', 'le', 'un', 'uno', 'una', 'di', 'del', 'della', 'dei', 'a',
+        'al', 'alla', 'da', 'in', 'nel', 'con', 'su', 'per', 'tra', 'e', 'o', 'ma', 'che', 'chi',
+        'è', 'sono', 'sei', 'siamo', 'ho', 'hai', 'ha', 'abbiamo', 'io', 'tu', 'lui', 'lei', 'noi',
+        'voi', 'loro', 'mi', 'ti', 'ci', 'si', 'non', 'questo', 'questa', 'quello', 'cosa', 'come',
+        'dove', 'quando', 'perché', 'anche', 'più', 'molto', 'bene', 'tutto', 'niente', 'sì',
+        'grazie', 'andiamo', 'voglio', 'posso', 'so', 'fatto', 'qui', 'ora', 'adesso', 'allora',
+        'mio', 'mia', 'tuo', 'tua', 'suo', 'sua',
+    }),
+    'german': ('LATIN', {
+        'der', 'die', 'das', 'den', 'dem', 'des', 'ein', 'eine', 'einen', 'einem', 'und', 'oder',
+        'aber', 'ist', 'sind', 'bin', 'bist', 'war', 'sein', 'habe', 'hast', 'hat', 'haben', 'ich',
+        'du', 'er', 'sie', 'es', 'wir', 'ihr', 'mich', 'dich', 'mir', 'dir', 'uns', 'mein', 'dein',
+        'nicht', 'kein', 'keine', 'mit', 'auf', 'zu', 'von', 'für', 'aus', 'bei', 'nach', 'was',
+        'wer', 'wo', 'wie', 'warum', 'wann', 'auch', 'noch', 'schon', 'nur', 'sehr', 'gut', 'ja',
+        'nein', 'danke', 'bitte', 'hier', 'jetzt', 'dann', 'doch', 'mal', 'kann', 'will', 'muss',
+        'weiß', 'gehen', 'komm', 'los', 'alles', 'nichts', 'dass', 'wenn', 'immer',
+    }),
+    'portuguese': ('LATIN', {
+        'o', 'a', 'os', 'as', 'um', 'uma', 'de', 'do', 'da', 'dos', 'das', 'no', 'na', 'em', 'ao',
+        'e', 'ou', 'mas', 'é', 'são', 'sou', 'está', 'estou', 'foi', 'ser', 'tem', 'tenho', 'eu',
+        'você', 'ele', 'ela', 'nós', 'eles', 'me', 'te', 'se', 'meu', 'minha', 'seu', 'sua',
+        'isso', 'isto', 'este', 'esta', 'que', 'quem', 'onde', 'quando', 'como', 'porque', 'não',
+        'sim', 'com', 'sem', 'para', 'por', 'muito', 'mais', 'bem', 'tudo', 'nada', 'já', 'aqui',
+        'agora', 'obrigado', 'obrigada', 'vamos', 'quero', 'posso', 'sei', 'também', 'então',
+    }),
+    'chinese': ('CJK', set()),
+    'japanese': ('KANA', set()),
+    'korean': ('HANGUL', set()),
+    'russian': ('CYRILLIC', set()),
+}
+
+# Écritures que peut mêler un texte de chaque langue
+MIXED_SCRIPTS = {'KANA': {'KANA', 'CJK'}, 'HANGUL': {'HANGUL', 'CJK'}}
+
+def canonical_language(name):
+    """Nom anglais d'une langue (les noms de l'interface web sont acceptés)"""
+    name = name.strip().lower()
+    return LANGUAGE_ALIASES.get(name, name)
+
+def script_of(char):
+    """Écriture d'une lettre : LATIN, CYRILLIC, HANGUL, KANA, CJK, ou le premier mot de son nom Unicode"""
+    script = unicodedata.name(char, "UNKNOWN").split()[0]
+    if script in ("HIRAGANA", "KATAKANA"):
+        return "KANA"
+    return script
+
+class PassthroughClassifier:
+    """Repère les textes qu'il est inutile d'envoyer au modèle
+
+    Règles disponibles (`rules`, toutes sauf "target_language" actives par défaut) :
+    - "symbols" : lignes sans aucune lettre (nombres, ♪, ponctuation) ;
+    - "tags" : balises sonores en majuscules entre crochets ou parenthèses, [GUNSHOT] ;
+    - "urls" : adresses web, e-mails et pseudonymes (@nom) seuls sur leur ligne ;
+    - "speakers" : nom de personnage seul, en majuscules et suivi de deux-points ;
+    - "target_language" : texte déjà dans la langue cible (mots courants ou écriture),
+      à activer explicitement.
+    Un texte est recopié si chacune de ses lignes relève d'une règle de ligne. `patterns`
+    ajoute des expressions régulières de lignes à recopier et `replacements` associe un
+    texte ou le contenu d'une balise (sans tenir compte de la casse) à sa traduction.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, patterns=(), replacements=None):
+        unknown = set(rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Règles inconnues : {', '.join(sorted(unknown))}")
+        self.rules = frozenset(rules)
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.replacements = {key.strip().lower(): value for key, value in (replacements or {}).items()}
+
+    @classmethod
+    def from_file(cls, path):
+        """Charge la configuration depuis un fichier JSON {"rules", "patterns", "replacements"}
+
+        Les clés absentes gardent leur valeur par défaut.
+        """
+        config = json.loads(Path(path).read_text(encoding='utf-8'))
+        return cls(config.get('rules', DEFAULT_RULES), config.get('patterns', ()), config.get('replacements'))
+
+    def classify(self, text, source_lang, target_lang):
+        """Renvoie le texte à utiliser sans appeler le modèle, ou None s'il faut le traduire"""
+        replacement = self.replacements.get(text.strip().lower())
+        if replacement is not None:
+            return replacement
+
+        lines = text.splitlines() or [text]
+        converted = [self._classify_line(line.strip()) for line in lines]
+        if all(line is not None for line in converted):
+            return '\n'.join(converted)
+
+        if "target_language" in self.rules and self.in_language(text, source_lang, target_lang):
+            return text
+        return None
+
+    def _classify_line(self, line):
+        if "symbols" in self.rules and not any(char.isalpha() for char in line):
+            return line
+        if "tags" in self.rules:
+            match = TAG_PATTERN.match(line)
+            # isupper() exige au moins une majuscule : "[笑い]" ou "(本当に?)" restent à traduire
+            if match and match.group(2).isupper():
+                opening, content, closing = match.groups()
+                return opening + self.replacements.get(content.strip().lower(), content) + closing
+        if "urls" in self.rules and URL_PATTERN.match(line):
+            return line
+        if "speakers" in self.rules and SPEAKER_PATTERN.match(line):
+            return line
+        if any(pattern.search(line) for pattern in self.patterns):
+            return line
+        return None
+
+    @staticmethod
+    def in_language(text, source_lang, target_lang):
+        """Indique si le texte semble déjà écrit dans la langue cible plutôt que la source
+
+        Langues à alphabet latin : au moins trois mots différents, dont aucun ne peut être
+        un mot courant de la langue source et au moins la moitié (et deux au minimum) sont
+        des mots courants de la langue cible seulement. Autres langues : lettres toutes dans
+        l'écriture de la langue cible et pas toutes dans celle de la source.
+        """
+        source_lang, target_lang = canonical_language(source_lang), canonical_language(target_lang)
+        if source_lang == target_lang or source_lang not in LANGUAGES or target_lang not in LANGUAGES:
+            return False
+        source, target = LANGUAGES[source_lang], LANGUAGES[target_lang]
+
+        scripts = {script_of(char) for char in text if char.isalpha()}
+        if target[0] != "LATIN":
+            # Un texte qui pourrait aussi être dans la langue source (idéogrammes seuls
+            # entre chinois et japonais, par exemple) est envoyé au modèle
+            return (bool(scripts) and scripts <= MIXED_SCRIPTS.get(target[0], {target[0]})
+                    and not scripts <= MIXED_SCRIPTS.get(source[0], {source[0]}))
+
+        if scripts != {"LATIN"}:
+            return False
+        # Mots distincts : "Die, die, die!" ne compte qu'un mot
+        words = set(WORD_PATTERN.findall(text.lower()))
+        if len(words) < 3 or words & source[1]:
+            return False
+        target_hits = len(words & target[1])
+        return target_hits >= 2 and target_hits * 2 >= len(words)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Phrases coupées sur plusieurs sous-titres : traduites en une requête puis réparties
+"""
+
+from passthrough import script_of
+
+# Ponctuation qui termine une phrase ou une réplique (guillemets, balises et musique compris)
+TERMINAL_PUNCTUATION = '.!?…:;"»)]♪'
+# Points de suspension qui marquent la suite d'une phrase dans le sous-titre suivant
+ELLIPSES = ('...', '…')
+# Ponctuation d'une traduction où couper de préférence (chinois et japonais compris)
+BREAK_PUNCTUATION = ',;:.!?…、。，；：！？'
+# Écritures sans espaces entre les mots, coupées entre deux caractères
+UNSPACED_SCRIPTS = ('CJK', 'KANA')
+DIALOGUE_DASHES = ('-', '–', '—')
+
+def _ellipsis(text, start):
+    """Points de suspension au début (`start`) ou à la fin du texte, ou chaîne vide"""
+    for marker in ELLIPSES:
+        if text.startswith(marker) if start else text.endswith(marker):
+            return marker
+    return ''
+
+def _tokens(text, parts):
+    """Découpe un texte en mots, ou en caractères s'il compte moins de mots que `parts`
+
+    Seuls les textes sans aucun espace écrits en chinois ou en japonais sont coupés
+    entre deux caractères : un mot d'une écriture à espaces n'est jamais coupé en deux.
+    Renvoie (morceaux, séparateur à utiliser pour les réunir).
+    """
+    words = text.split()
+    if len(words) >= parts or len(words) != 1:
+        return words, ' '
+    if not any(char.isalpha() and script_of(char) in UNSPACED_SCRIPTS for char in words[0]):
+        return words, ' '
+    return list(words[0]), ''
+
+def _choose_cuts(words, weights, separator=' '):
+    """Positions de coupe (nombre de mots avant chaque coupe) proches des proportions `weights`
+
+    Chaque partie reçoit au moins un mot ; une coupe après une ponctuation est préférée
+    à une coupe au même endroit au milieu d'une proposition.
+    """
+    # Longueur en caractères des j premiers mots, séparateurs compris
+    prefix = [0]
+    for word in words:
+        prefix.append(prefix[-1] + len(word) + len(separator))
+    total = prefix[-1] - len(separator)
+    cuts = []
+    start = 0
+    covered = 0
+    for part in range(len(weights) - 1):
+        covered += weights[part]
+        target = total * covered / sum(weights)
+        last = len(words) - (len(weights) - 1 - part)
+        cut = min(
+            range(start + 1, last + 1),
+            key=lambda j: abs(prefix[j] - len(separator) - target) * (0.5 if words[j - 1][-1] in BREAK_PUNCTUATION else 1)
+        )
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def _split_words(words, weights, separator=' '):
+    cuts = _choose_cuts(words, weights, separator)
+    return [separator.join(words[start:end]) for start, end in zip([0] + cuts, cuts + [len(words)])]
+
+class SentenceMerger:
+    """Regroupe les entrées consécutives qui forment une même phrase
+
+    Une entrée se prolonge dans la suivante quand elle ne se termine pas par une
+    ponctuation finale et que la suivante commence par une minuscule (ou quand elle se
+    termine par une virgule), ou quand les deux sont reliées par des points de
+    suspension ("I think..." / "...we should go"). Le regroupement est refusé pour les
+    dialogues (tirets), les textes mis en forme (<i>, {\\an8}) et quand plus de `max_gap`
+    secondes séparent les deux entrées. Une phrase couvre au plus `max_cues` entrées et
+    `max_chars` caractères. Les langues sans majuscules ne sont regroupées que par les
+    virgules et les points de suspension.
+    """
+
+    def __init__(self, max_gap=1.0, max_cues=3, max_chars=250):
+        self.max_gap = max_gap
+        self.max_cues = max(2, int(max_cues))
+        self.max_chars = max_chars
+
+    def continues(self, entry, next_entry):
+        """Indique si le texte de `entry` se poursuit dans `next_entry`"""
+        text, next_text = entry.text.strip(), next_entry.text.strip()
+        if not text or not next_text:
+            return False
+        if any(char in text + next_text for char in '<{'):
+            return False
+        if any(line.lstrip().startswith(DIALOGUE_DASHES) for line in (text + '\n' + next_text).splitlines()):
+            return False
+
+        if next_entry.start - entry.end > self.max_gap * 1000:
+            return False
+
+        start = next_text[len(_ellipsis(next_text, True)):].lstrip()
+        if _ellipsis(text, False):
+            return bool(_ellipsis(next_text, True)) or start[:1].islower()
+        if text.endswith(','):
+            return True
+        return text[-1] not in TERMINAL_PUNCTUATION and start[:1].islower()
+
+    def group(self, entries, indices):
+        """Regroupe les indices consécutifs d'une même phrase
+
+        Renvoie une liste où chaque élément est un indice seul ou un tuple d'indices
+        d'entrées consécutives à traduire ensemble (voir join et split).
+        """
+        units = []
+        current = []
+        length = 0
+        for index in indices:
+            size = len(entries[index].text)
+            if (current and index == current[-1] + 1 and len(current) < self.max_cues
+                    and length + size <= self.max_chars and self.continues(entries[current[-1]], entries[index])):
+                current.append(index)
+                length += size + 1
+                continue
+            if current:
+                units.append(current[0] if len(current) == 1 else tuple(current))
+            current = [index]
+            length = size
+        if current:
+            units.append(current[0] if len(current) == 1 else tuple(current))
+        return units
+
+    @staticmethod
+    def join(texts):
+        """Texte de la phrase complète : lignes réunies, points de suspension de liaison retirés"""
+        pieces = []
+        for position, text in enumerate(texts):
+            text = ' '.join(text.split())
+            if position > 0:
+                text = text[len(_ellipsis(text, True)):].lstrip()
+            if position < len(texts) - 1:
+                text = text[:len(text) - len(_ellipsis(text, False))].rstrip()
+            pieces.append(text)
+        return ' '.join(pieces)
+
+    @staticmethod
+    def split(translation, texts):
+        """Répartit la traduction d'une phrase sur ses entrées d'origine
+
+        Chaque entrée reçoit une part proportionnelle à la longueur de son texte source,
+        coupée entre deux mots (entre deux caractères pour les langues écrites sans
+        espaces, voir _tokens), avec ses points de suspension de liaison et autant de
+        lignes qu'à l'origine si elle compte assez de mots. Renvoie None si la traduction
+        a moins de mots que d'entrées : elles sont alors à traduire séparément.
+        """
+        words, separator = _tokens(translation, len(texts))
+        if len(words) < len(texts):
+            return None
+
+        weights = [max(1, len(SentenceMerger.join([text]))) for text in texts]
+        parts = _split_words(words, weights, separator)
+        results = []
+        for position, (part, text) in enumerate(zip(parts, texts)):
+            text = text.strip()
+            if position > 0 and _ellipsis(text, True) and not _ellipsis(part, True):
+                part = _ellipsis(text, True) + part
+            if position < len(texts) - 1 and _ellipsis(text, False) and not _ellipsis(part, False):
+                part = part.rstrip(',;、，；') + _ellipsis(text, False)
+            line_count = len([line for line in text.splitlines() if line.strip()])
+            part_words, part_separator = _tokens(part, line_count)
+            if line_count > 1 and len(part_words) >= line_count:
+                part = '\n'.join(_split_words(part_words, [1] * line_count, part_separator))
+            results.append(part)
+        return results
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection de l'encodage des fichiers SRT en une seule lecture
+"""
+
+import codecs
+
+# Taille de l'échantillon (début du contenu) examiné pour choisir l'encodage
+SAMPLE_SIZE = 64 * 1024
+
+# Marques d'ordre des octets ; UTF-32 LE commence comme UTF-16 LE et doit être testé avant.
+# Le BOM est laissé dans le texte décodé (iter_srt l'ignore), d'où les codecs sans BOM.
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+def _legacy_bytes(error):
+    """Décode les octets invalides d'un texte UTF-8 en CP1252 (Latin-1 pour les 5 octets non définis)
+
+    Les fichiers UTF-8 retouchés avec un éditeur Windows contiennent souvent quelques
+    caractères CP1252 : seuls ceux-là sont convertis, le reste du texte reste intact.
+    """
+    bad = error.object[error.start:error.end]
+    return ''.join(bytes([byte]).decode('cp1252', errors='ignore') or chr(byte) for byte in bad), error.end
+
+codecs.register_error('srt-legacy', _legacy_bytes)
+
+def detect_encoding(sample):
+    """Choisit l'encodage d'un contenu SRT d'après son début (au plus SAMPLE_SIZE octets)
+
+    Ordre : BOM, UTF-16 sans BOM (un octet nul sur deux), UTF-8 (caractères valides plus
+    nombreux que les octets invalides), CP1252, Latin-1.
+    """
+    sample = sample[:SAMPLE_SIZE]
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # Texte UTF-16 sans BOM : l'octet de poids fort des caractères ASCII est nul
+    if sample.count(0) > len(sample) // 4:
+        if sample[1::2].count(0) > sample[0::2].count(0):
+            return 'utf-16-le'
+        return 'utf-16-be'
+
+    # Décodage incrémental : un caractère coupé en fin d'échantillon n'est pas une erreur.
+    # Un texte UTF-8 qui contient quelques octets CP1252 reste lu en UTF-8 (voir _legacy_bytes).
+    text = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(sample, final=False)
+    invalid = text.count('\ufffd')
+    if not invalid or sum(1 for char in text if char > '\x7f') - invalid > invalid:
+        return 'utf-8'
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def decode_errors(encoding):
+    """Gestion des octets invalides pour `encoding` (voir _legacy_bytes pour UTF-8)"""
+    return 'srt-legacy' if encoding == 'utf-8' else 'replace'
+
+def decode_srt(data):
+    """Décode un contenu SRT brut en un seul passage et renvoie (texte, encodage détecté)"""
+    encoding = detect_encoding(data[:SAMPLE_SIZE])
+    return data.decode(encoding, errors=decode_errors(encoding)), encoding
+
+def open_srt(path, encoding):
+    """Ouvre un fichier SRT en lecture avec l'encodage détecté (voir detect_encoding)"""
+    return open(path, 'r', encoding=encoding, errors=decode_errors(encoding))
+
+def count_cues(data, encoding='utf-8'):
+    """Nombre approximatif d'entrées d'un contenu SRT brut (une ligne de temps par entrée)"""
+    return data.count('-->'.encode(encoding))
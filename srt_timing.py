@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Temps des entrées SRT : entrées compactes avec début et fin en millisecondes, index par temps
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+TIMESTAMP_PATTERN = re.compile(r'(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})')
+# Temps saisi en ligne de commande : [[HH:]MM:]SS[,mmm]
+TIME_PATTERN = re.compile(r'^(?:(?:(\d+):)?(\d{1,2}):)?(\d{1,2})(?:[,.](\d{1,3}))?$')
+
+def timestamp_bounds(match):
+    """Début et fin en millisecondes d'une ligne de temps reconnue par TIMESTAMP_PATTERN"""
+    hours, minutes, seconds, millis, end_hours, end_minutes, end_seconds, end_millis = map(int, match.groups())
+    return (((hours * 60 + minutes) * 60 + seconds) * 1000 + millis,
+            ((end_hours * 60 + end_minutes) * 60 + end_seconds) * 1000 + end_millis)
+
+def parse_time(value):
+    """Convertit un temps "01:10:00", "10:00", "90" ou "00:10:00,500" en millisecondes
+
+    Lève ValueError si le format n'est pas reconnu.
+    """
+    match = TIME_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError(f"temps invalide : {value!r} (format attendu HH:MM:SS[,mmm])")
+    hours, minutes, seconds, millis = match.groups()
+    return ((int(hours or 0) * 60 + int(minutes or 0)) * 60 + int(seconds)) * 1000 + int((millis or '0').ljust(3, '0'))
+
+def format_time(milliseconds):
+    """Temps en millisecondes au format SRT (HH:MM:SS,mmm)"""
+    seconds, millis = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+def format_range(start, end=None):
+    """Intervalle de temps lisible : "00:10:00,000 et 00:20:00,000" ("... et la fin" si `end` est None)"""
+    return f"{format_time(start)} et {'la fin' if end is None else format_time(end)}"
+
+class SubtitleEntry:
+    """Entrée SRT : numéro, début et fin en millisecondes, ligne de temps et texte
+
+    La ligne de temps est gardée telle qu'elle a été lue pour réécrire le fichier à
+    l'identique (séparateur, espaces, coordonnées) ; `start` et `end` servent aux calculs.
+    """
+
+    __slots__ = ('number', 'start', 'end', 'timestamp', 'text')
+
+    def __init__(self, number, start, end, timestamp, text=''):
+        self.number = number
+        self.start = start
+        self.end = end
+        self.timestamp = timestamp
+        self.text = text
+
+    @property
+    def duration(self):
+        """Durée d'affichage en millisecondes"""
+        return self.end - self.start
+
+    def overlaps(self, start, end=None):
+        """Indique si l'entrée est affichée entre `start` et `end` (millisecondes, None = fin du fichier)"""
+        return self.end > start and (end is None or self.start < end)
+
+    def with_text(self, text):
+        """Copie de l'entrée (numéro et temps) avec un autre texte, sa traduction par exemple"""
+        return SubtitleEntry(self.number, self.start, self.end, self.timestamp, text)
+
+    def __eq__(self, other):
+        if not isinstance(other, SubtitleEntry):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"SubtitleEntry({self.number!r}, {format_time(self.start)} --> {format_time(self.end)}, {self.text[:30]!r})"
+
+class TimingIndex:
+    """Index des entrées d'une liste triées par début, pour les recherches par temps
+
+    Les débuts et fins sont rangés dans des tableaux compacts (array) ; une recherche
+    dichotomique sur les débuts ne laisse à examiner que les entrées commencées moins de
+    la plus longue durée d'affichage avant l'intervalle demandé. Les positions renvoyées
+    sont celles de la liste d'origine, dans l'ordre du fichier.
+    """
+
+    def __init__(self, entries):
+        order = sorted(range(len(entries)), key=lambda position: entries[position].start)
+        self.positions = array('q', order)
+        self.starts = array('q', (entries[position].start for position in order))
+        self.ends = array('q', (entries[position].end for position in order))
+        self.max_duration = max((end - start for start, end in zip(self.starts, self.ends)), default=0)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def overlapping(self, start, end=None):
+        """Positions des entrées affichées entre `start` et `end` (voir SubtitleEntry.overlaps)"""
+        first = bisect_left(self.starts, start - self.max_duration)
+        last = len(self.starts) if end is None else bisect_left(self.starts, end)
+        return sorted(self.positions[k] for k in range(first, last) if self.ends[k] > start)
+
+    def at(self, time):
+        """Positions des entrées affichées à l'instant `time` (millisecondes)"""
+        return self.overlapping(time, time + 1)
@@ -7,139 +7,1418 @@ Outil de traduction de fichiers SRT utilisant Ollama
 import re
 import sys
 import argparse
+import asyncio
+import hashlib
+import itertools
 import requests
 import json
+import random
+import time
+import copy
+import glob
+import threading
+from collections import deque
+from contextlib import nullcontext
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+from translation_memory import TranslationMemory, DEFAULT_MEMORY_PATH, DEFAULT_MAX_ENTRIES
+from checkpoint import CheckpointJournal, DEFAULT_CHECKPOINT_DIR
+from metrics import RequestMetrics
+from dispatcher import EndpointPool, STRATEGIES
+from limiter import AdaptiveLimiter
+from srt_encoding import detect_encoding, open_srt, count_cues
+from passthrough import PassthroughClassifier
+from sentence_merge import SentenceMerger
+from srt_timing import TIMESTAMP_PATTERN, SubtitleEntry, TimingIndex, timestamp_bounds, parse_time, format_range
+
+def scan_srt_file(path, chunk_size=1 << 20):
+    """Parcourt un fichier SRT par blocs, sans le charger entièrement en mémoire
+
+    Renvoie (encodage, empreinte sha256 du contenu, nombre approximatif d'entrées).
+    L'encodage est choisi d'après le début du fichier (voir detect_encoding) : le contenu
+    n'est décodé qu'une fois, à la lecture des entrées (voir open_srt).
+    """
+    digest = hashlib.sha256()
+    encoding = None
+    cues = 0
+    tail = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+            if encoding is None:
+                encoding = detect_encoding(chunk)
+                marker = '-->'.encode(encoding)
+            # Une ligne de temps par entrée ; `tail` couvre les flèches coupées entre deux blocs
+            cues += count_cues(tail + chunk, encoding)
+            tail = chunk[-(len(marker) - 1):]
+    
+    return encoding or 'utf-8', digest.hexdigest(), cues
+
+def iter_srt(lines, issues=None):
+    """Lit les entrées SRT une à une depuis un itérable de lignes (fichier ouvert, liste...)
+
+    Tokeniseur à états en une seule passe, avec une ligne d'anticipation : une ligne ne
+    contenant qu'un nombre n'ouvre une nouvelle entrée que si elle est suivie d'une ligne
+    de temps, sinon elle fait partie du texte. Les fins de ligne CRLF, le BOM et les
+    lignes vides superflues sont acceptés. Les blocs invalides sont signalés dans `issues`
+    (liste de (numéro de ligne, message)) au lieu d'être ignorés silencieusement. Chaque
+    entrée est un SubtitleEntry dont le début et la fin sont lus avec la ligne de temps.
+    """
+    def report(line_number, message):
+        if issues is not None:
+            issues.append((line_number, message))
+    
+    def finish(entry, text):
+        entry.text = '\n'.join(text).strip()
+        return entry
+    
+    entry = None            # entrée en cours de lecture
+    text = []               # lignes de texte de l'entrée en cours
+    after_blank = False     # une ligne vide a été vue depuis la dernière ligne de texte
+    number = None           # ligne numérique en attente : numéro de l'entrée suivante ou texte
+    number_line = 0
+    number_opens_block = False
+    last_number = 0
+    skipping = False        # bloc invalide : lignes ignorées jusqu'à la prochaine ligne vide
+    
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if line_number == 1:
+            line = line.lstrip('\ufeff')
+        stripped = line.strip()
+        match = TIMESTAMP_PATTERN.match(stripped)
+        is_timestamp = match is not None
+        
+        # Résoudre la ligne numérique en attente grâce à la ligne courante
+        if number is not None:
+            if is_timestamp:
+                if entry is not None:
+                    yield finish(entry, text)
+                entry, text, after_blank = SubtitleEntry(number, *timestamp_bounds(match), stripped), [], False
+                last_number = int(number)
+                number = None
+                continue
+            if not number_opens_block:
+                # Un nombre seul au milieu du texte (« 1984 », « 3 »...)
+                text.append(number)
+            else:
+                report(number_line, f"numéro {number} sans ligne de temps, bloc ignoré")
+                if entry is not None:
+                    yield finish(entry, text)
+                    entry = None
+                skipping = True
+            number = None
+        
+        if not stripped:
+            skipping = False
+            after_blank = entry is not None
+        elif is_timestamp:
+            # Ligne de temps sans numéro : toujours un début d'entrée, même dans un bloc ignoré
+            if entry is not None:
+                yield finish(entry, text)
+            last_number += 1
+            report(line_number, f"ligne de temps sans numéro, numéro {last_number} attribué")
+            entry, text, after_blank = SubtitleEntry(str(last_number), *timestamp_bounds(match), stripped), [], False
+            skipping = False
+        elif skipping:
+            continue
+        elif stripped.isdigit():
+            number, number_line = stripped, line_number
+            number_opens_block = entry is None or after_blank
+        elif entry is None:
+            report(line_number, "texte en dehors d'une entrée, bloc ignoré")
+            skipping = True
+        else:
+            # Les lignes vides à l'intérieur du texte d'une entrée sont supprimées
+            text.append(line.rstrip())
+            after_blank = False
+    
+    if number is not None:
+        if not number_opens_block:
+            text.append(number)
+        else:
+            report(number_line, f"numéro {number} sans ligne de temps, bloc ignoré")
+    if entry is not None:
+        yield finish(entry, text)
+
+def format_srt(entries):
+    """Sérialise une liste d'entrées au format SRT"""
+    return ''.join(f"{entry.number}\n{entry.timestamp}\n{entry.text}\n\n" for entry in entries)
+
+def iter_chunks(iterable, size):
+    """Regroupe les éléments d'un itérable en listes de `size` éléments"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class SRTWriter:
+    """Écrit les entrées traduites au fur et à mesure, dans l'ordre
+
+    Une entrée est écrite (et le fichier vidé sur disque) dès qu'elle et toutes celles
+    qui la précèdent sont disponibles ; seules les entrées en avance restent en mémoire.
+    `target` est le chemin du fichier à créer ou un flux texte déjà ouvert (io.StringIO
+    par exemple), qui reste alors ouvert après close. `entries` et `lines` comptent les
+    entrées et les lignes non vides écrites, sans relire la sortie.
+    """
+
+    def __init__(self, target):
+        if hasattr(target, 'write'):
+            self._file, self._owned = target, False
+        else:
+            self._file, self._owned = open(target, 'w', encoding='utf-8'), True
+        self._pending = {}
+        self._next_index = 0
+        self.entries = 0
+        self.lines = 0
+
+    def add(self, index, entry):
+        self._pending[index] = entry
+        if index != self._next_index:
+            return
+        while self._next_index in self._pending:
+            entry = self._pending.pop(self._next_index)
+            self._file.write(format_srt([entry]))
+            self._next_index += 1
+            self.entries += 1
+            # Numéro et ligne de temps, puis les lignes de texte
+            self.lines += 2 + sum(1 for line in entry.text.split('\n') if line.strip())
+        self._file.flush()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def translated_filename(name, target_lang):
+    """Nom du fichier traduit : episode01.srt -> episode01-FRANÇAIS.srt"""
+    return f"{Path(name).stem}-{target_lang.upper()}.srt"
+
+def collect_srt_files(patterns):
+    """Renvoie les fichiers .srt désignés par des chemins, des dossiers ou des motifs glob
+
+    Un dossier désigne les fichiers .srt qu'il contient directement ; les motifs acceptent
+    `**` pour parcourir les sous-dossiers. Chaque fichier n'apparaît qu'une fois.
+    """
+    files = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob('*.srt'))
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = [Path(match) for match in sorted(glob.glob(pattern, recursive=True))]
+        for match in matches:
+            if match.is_file() and match.suffix.lower() == '.srt':
+                files.setdefault(match.resolve(), match)
+    return list(files.values())
+
+def normalize_text(text):
+    """Normalise les espaces d'un texte de sous-titre en conservant ses retours à la ligne"""
+    return '\n'.join(' '.join(line.split()) for line in text.strip().splitlines())
+
+def parse_keep_alive(value):
+    """Valeur keep_alive d'Ollama : un nombre seul est une durée en secondes ("300", "-1"),
+    sinon une durée avec unité ("30m"), None ou vide pour la valeur du serveur"""
+    if value is None or not str(value).strip():
+        return None
+    value = str(value).strip()
+    return int(value) if value.lstrip('-').isdigit() else value
+
+class OllamaError(Exception):
+    """Réponse HTTP en erreur renvoyée par Ollama"""
+
+    def __init__(self, status_code, message=None):
+        super().__init__(message or f"Erreur API: {status_code}")
+        self.status_code = status_code
+
+class GenerationLimitError(Exception):
+    """Génération interrompue car la réponse dépassait la longueur admise pour le texte source"""
+
+def cut_at_stop(text, stop):
+    """Texte coupé avant la première séquence de `stop` qui suit son début, None si aucune"""
+    stripped = text.lstrip()
+    for sequence in stop:
+        position = stripped.find(sequence)
+        if position > 0:
+            return stripped[:position]
+    return None
+
+class StreamedGeneration:
+    """Assemble une réponse /api/generate reçue en flux (une ligne JSON par fragment)
+
+    La lecture doit s'arrêter dès qu'une séquence de `stop` apparaît après le début du
+    texte (il est coupé juste avant) ou que le texte dépasse `max_length` caractères.
+    on_partial(texte) reçoit le texte reçu jusque-là après chaque fragment.
+    """
+
+    def __init__(self, max_length=None, stop=(), on_partial=None):
+        self.max_length = max_length
+        self.stop = stop
+        self.on_partial = on_partial
+        self.text = ""
+        self.fragments = 0
+        self.final = None
+        self.done_reason = None
+
+    def feed(self, line):
+        """Traite une ligne de la réponse, renvoie True s'il faut interrompre la génération"""
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            raise OllamaError(500, "Réponse en flux invalide")
+        if 'error' in chunk:
+            # Erreur survenue pendant la génération, après l'envoi de l'en-tête 200
+            raise OllamaError(500, f"Erreur API: {chunk['error']}")
+        
+        self.text += chunk.get('response', '')
+        self.fragments += 1
+        if chunk.get('done'):
+            self.final = chunk
+            return False
+        
+        text = cut_at_stop(self.text, self.stop)
+        if text is not None:
+            self.text = text
+            self.done_reason = 'stop'
+            return True
+        text = self.text.lstrip()
+        if self.max_length is not None and len(text) > self.max_length:
+            self.done_reason = 'length'
+            return True
+        
+        if self.on_partial:
+            self.on_partial(text)
+        return False
+
+    def result(self):
+        """Réponse au format d'une requête sans flux (bilan du dernier fragment s'il a été reçu)"""
+        result = dict(self.final or {'eval_count': self.fragments})
+        result['response'] = self.text
+        if self.done_reason:
+            result['done_reason'] = self.done_reason
+        return result
 
 class SRTTranslator:
-    def __init__(self, ollama_url="http://localhost:11434"):
-        self.ollama_url = ollama_url
+    def __init__(self, ollama_url="http://localhost:11434", workers=1, batch_size=1, memory=None,
+                 connect_timeout=5, read_timeout=60, max_retries=3, backoff=1.0,
+                 checkpoint_dir=DEFAULT_CHECKPOINT_DIR, metrics=None, balance="least-outstanding",
+                 context_window=0, keep_alive=None, stream=False, adaptive=False, passthrough=None,
+                 sentence_merger=None):
+        # Une ou plusieurs URL Ollama (liste, ou chaîne séparée par des virgules) ;
+        # les requêtes sont réparties entre les serveurs (voir EndpointPool)
+        self.endpoints = EndpointPool(ollama_url, strategy=balance)
+        self.ollama_url = self.endpoints.urls[0]
         self.model = "gemma3:12b"
+        # Nombre de requêtes envoyées en parallèle à Ollama (voir OLLAMA_NUM_PARALLEL)
+        self.workers = max(1, int(workers))
+        # Avec `adaptive`, le nombre de requêtes en vol est ajusté entre 1 et `workers`
+        # d'après la latence et les erreurs observées (voir AdaptiveLimiter)
+        self.limiter = AdaptiveLimiter(self.workers) if adaptive else None
+        # Nombre d'entrées consécutives traduites par requête
+        self.batch_size = max(1, int(batch_size))
+        # Mode contexte : nombre d'entrées précédentes (source et traduction) jointes à
+        # chaque requête, 0 pour traduire chaque texte isolément (voir _context_prompt)
+        self.context_window = max(0, int(context_window))
+        # Durée de maintien du modèle en mémoire après chaque requête ("30m", -1...),
+        # None pour la valeur du serveur
+        self.keep_alive = keep_alive
+        # Réponses reçues en flux : aperçu en direct et arrêt dès que la génération déraille
+        self.stream = stream
+        # Longueur maximale d'une traduction, en multiple de la longueur du texte source
+        # (plus 50 caractères) : au-delà, la génération est interrompue
+        self.max_output_ratio = 4.0
+        # Mémoire de traduction persistante (TranslationMemory), désactivée si None
+        self.memory = memory
+        # Textes recopiés sans appel au modèle (PassthroughClassifier), désactivé si None
+        self.passthrough = passthrough
+        # Phrases coupées sur plusieurs entrées traduites d'un bloc (SentenceMerger), désactivé si None
+        self.sentence_merger = sentence_merger
+        # Statistiques de la dernière traduction (voir translate_entries)
+        self.stats = {}
+        # Entrées restées non traduites lors de la dernière traduction
+        self.failures = []
+        # Dossier des journaux de reprise (voir CheckpointJournal), désactivés si None
+        self.checkpoint_dir = checkpoint_dir
+        # Nombre d'entrées lues et traduites à la fois par translate_srt_file
+        self.chunk_size = 1000
+        # Blocs invalides rencontrés lors de la dernière lecture (numéro de ligne, message)
+        self.parse_issues = []
+        # Mesures des requêtes Ollama (latence, jetons, débit), voir RequestMetrics
+        self.metrics = metrics if metrics is not None else RequestMetrics()
+        # Sémaphore partagé entre les fichiers traduits en même temps (voir translate_files)
+        self._request_slots = None
+        # Préchargement du modèle en cours (voir start_warm_up) et délai maximal accordé
+        self._warm_up = None
+        self.warm_up_timeout = 300
+        
+        # Session HTTP partagée : connexions keep-alive réutilisées par tous les workers
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = self._open_session()
+    
+    def _open_session(self):
+        """Crée la session HTTP dont le pool de connexions est dimensionné sur les workers"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints.urls), pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
     
     def parse_srt(self, srt_content):
-        """Parse le contenu du fichier SRT"""
-        # Pattern pour extraire les blocs SRT
-        pattern = r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\d+\n|\n*$)'
-        matches = re.findall(pattern, srt_content, re.DOTALL)
+        """Parse le contenu du fichier SRT (voir iter_srt)
+
+        Les blocs invalides sont listés dans self.parse_issues.
+        """
+        self.parse_issues = []
+        return list(iter_srt(srt_content.splitlines(), self.parse_issues))
+    
+    def warm_up(self):
+        """Charge le modèle sur chaque serveur Ollama disponible
+
+        Une requête sans prompt fait charger le modèle, qu'Ollama garde ensuite en mémoire
+        pendant `keep_alive`. Les serveurs sont préchargés en parallèle et chaque
+        préchargement est mesuré à part (voir RequestMetrics.record_warm_up). Renvoie
+        {url: durée en secondes, ou None en cas d'échec}.
+        """
+        data = {'model': self.model, 'prompt': '', 'stream': False}
+        if self.keep_alive is not None:
+            data['keep_alive'] = self.keep_alive
         
-        entries = []
-        for match in matches:
-            number = match[0]
-            timestamp = match[1]
-            text = match[2].strip()
-            entries.append({
-                'number': number,
-                'timestamp': timestamp,
-                'text': text
-            })
+        def load(url):
+            start = time.perf_counter()
+            try:
+                response = requests.post(
+                    f"{url}/api/generate", json=data, timeout=(self.connect_timeout, self.warm_up_timeout)
+                )
+                response.raise_for_status()
+                result = response.json()
+            except (requests.RequestException, ValueError) as e:
+                self.metrics.record_warm_up(url, time.perf_counter() - start, error=e)
+                print(f"Préchargement du modèle impossible sur {url} : {e}")
+                return None
+            elapsed = time.perf_counter() - start
+            self.metrics.record_warm_up(url, elapsed, result)
+            print(f"Modèle {self.model} prêt sur {url} en {elapsed:.1f} s")
+            return elapsed
         
-        return entries
+        urls = [url for url, _, _, ejected in self.endpoints.status() if not ejected] or self.endpoints.urls
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            return dict(zip(urls, executor.map(load, urls)))
     
-    def translate_text(self, text, source_lang, target_lang):
-        """Traduit un texte en utilisant Ollama"""
-        prompt = f"""Traduis ce texte de {source_lang} vers {target_lang}. 
-Réponds UNIQUEMENT avec la traduction, sans explication ni commentaire.
+    def start_warm_up(self):
+        """Lance warm_up en arrière-plan, par exemple pendant la lecture du fichier
 
-Texte à traduire: {text}"""
+        Les requêtes de traduction attendent la fin du préchargement (voir wait_warm_up)
+        pour ne pas s'ajouter à la file d'Ollama pendant le chargement.
+        """
+        if self._warm_up is None:
+            self._warm_up = threading.Thread(target=self.warm_up, daemon=True)
+            self._warm_up.start()
+        return self._warm_up
+    
+    def wait_warm_up(self):
+        """Attend la fin d'un préchargement lancé par start_warm_up"""
+        if self._warm_up is not None:
+            self._warm_up.join()
+    
+    def _max_output_length(self, source_length):
+        """Longueur maximale (caractères) admise pour la traduction d'un texte de `source_length` caractères"""
+        return int(self.max_output_ratio * source_length) + 50
+    
+    def _request_data(self, prompt, source_length=None, stop=(), **options):
+        """Corps de la requête /api/generate
 
+        Avec `source_length`, la génération est bornée à _max_output_length jetons
+        (num_predict). Les séquences de `stop` sont transmises au serveur, sauf celles
+        formées uniquement d'espaces : une réponse peut commencer par un retour à la ligne,
+        elles ne sont donc appliquées que côté client, après le début du texte.
+        """
         data = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False
+            "stream": self.stream
         }
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        model_options = {}
+        if source_length is not None:
+            model_options["num_predict"] = self._max_output_length(source_length)
+        server_stop = [sequence for sequence in stop if sequence.strip()]
+        if server_stop:
+            model_options["stop"] = server_stop
+        if model_options:
+            data["options"] = model_options
+        data.update(options)
+        return data
+    
+    def _streamed_generation(self, source_length=None, stop=(), on_partial=None):
+        max_length = None if source_length is None else self._max_output_length(source_length)
+        return StreamedGeneration(max_length, stop, on_partial)
+    
+    def _limit_error(self, result, source_length):
+        """Erreur à signaler si la génération a atteint la longueur maximale, sinon None"""
+        if source_length is None or result.get('done_reason') != 'length':
+            return None
+        return GenerationLimitError(
+            f"Réponse interrompue après {len(result.get('response', ''))} caractères "
+            f"(texte source de {source_length} caractères)"
+        )
+    
+    @staticmethod
+    def _apply_stop(result, stop):
+        """Coupe une réponse reçue d'un bloc à la première séquence de `stop` (voir cut_at_stop)"""
+        text = cut_at_stop(result.get('response', ''), stop)
+        if text is None:
+            return result
+        return dict(result, response=text, done_reason='stop')
+    
+    def _read_response(self, response, source_length=None, stop=(), on_partial=None):
+        """Lit la réponse JSON de /api/generate, fragment par fragment en mode flux"""
+        if not self.stream:
+            return self._apply_stop(response.json(), stop)
+        generation = self._streamed_generation(source_length, stop, on_partial)
+        for line in response.iter_lines():
+            if line and generation.feed(line):
+                # Fermer la connexion interrompt la génération côté serveur
+                break
+        return generation.result()
+    
+    def _release(self, endpoint, latency, healthy):
+        """Termine une tentative auprès du répartiteur et de la limite adaptative"""
+        self.endpoints.release(endpoint, latency, healthy)
+        if self.limiter is not None:
+            self.limiter.release(latency, healthy)
+    
+    def _generate(self, prompt, source_length=None, stop=(), on_partial=None, **options):
+        """Envoie un prompt à /api/generate et renvoie la réponse brute du modèle
+
+        Les erreurs de connexion, les timeouts et les réponses 5xx sont retentés jusqu'à
+        `max_retries` fois, immédiatement sur un autre serveur s'il y en a un disponible,
+        sinon après un délai exponentiel aléatoire. Lève OllamaError ou
+        requests.RequestException si toutes les tentatives échouent, et
+        GenerationLimitError (sans nouvelle tentative) si la réponse dépasse la longueur
+        admise pour un texte de `source_length` caractères. En mode flux, la génération
+        s'arrête dès une séquence de `stop` et on_partial(texte) reçoit le texte partiel.
+        """
+        data = self._request_data(prompt, source_length, stop, **options)
+        self.wait_warm_up()
         
-        try:
-            response = requests.post(f"{self.ollama_url}/api/generate", json=data, timeout=60)
-            if response.status_code == 200:
-                result = response.json()
-                return result['response'].strip()
+        start = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._request_slots or nullcontext():
+                    if self.limiter is not None:
+                        self.limiter.acquire()
+                    # Latence mesurée hors attente d'une place (nouvelles tentatives comprises)
+                    start = start or time.perf_counter()
+                    endpoint = self.endpoints.acquire()
+                    sent = time.perf_counter()
+                    healthy = False
+                    try:
+                        with self.session.post(
+                            f"{endpoint.url}/api/generate",
+                            json=data,
+                            timeout=(self.connect_timeout, self.read_timeout),
+                            stream=self.stream
+                        ) as response:
+                            if response.status_code == 200:
+                                result = self._read_response(response, source_length, stop, on_partial)
+                        healthy = response.status_code < 500
+                    finally:
+                        self._release(endpoint, time.perf_counter() - sent, healthy)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, OllamaError) as e:
+                error = e
             else:
-                print(f"Erreur API: {response.status_code}")
-                return text
+                if response.status_code == 200:
+                    error = self._limit_error(result, source_length)
+                    self.metrics.record(time.perf_counter() - start, result, attempt, error=error, endpoint=endpoint.url)
+                    if error is not None:
+                        raise error
+                    return result['response']
+                error = OllamaError(response.status_code)
+                # Les erreurs 4xx (modèle inconnu, requête invalide...) ne sont pas retentées
+                if response.status_code < 500:
+                    self.metrics.record(time.perf_counter() - start, retries=attempt, error=error, endpoint=endpoint.url)
+                    raise error
+            
+            if attempt < self.max_retries and not self.endpoints.has_alternative(endpoint):
+                delay = self.backoff * 2 ** attempt
+                time.sleep(random.uniform(delay / 2, delay * 1.5))
+        
+        self.metrics.record(time.perf_counter() - start, retries=self.max_retries, error=error, endpoint=endpoint.url)
+        raise error
+    
+    def _translation_prompt(self, text, source_lang, target_lang):
+        """Construit le prompt de traduction d'un texte"""
+        return f"""Traduis ce texte de {source_lang} vers {target_lang}. 
+Réponds UNIQUEMENT avec la traduction, sans explication ni commentaire.
+
+Texte à traduire: {text}"""
+    
+    def _context_prompt(self, text, source_lang, target_lang, context):
+        """Construit le prompt de traduction d'un texte précédé des répliques `context`
+
+        Les consignes forment un préfixe identique d'une requête à l'autre et la fenêtre
+        de contexte ne change qu'en fin de prompt (voir _context_for) : le serveur peut
+        ainsi réutiliser le calcul du préfixe commun déjà en cache.
+        """
+        lines = [
+            f"Tu traduis des sous-titres de {source_lang} vers {target_lang}, réplique par réplique.",
+            "Les répliques précédentes et leur traduction sont données pour le contexte.",
+            "Réponds UNIQUEMENT avec la traduction de la dernière réplique, sans explication ni commentaire.",
+            ""
+        ]
+        for source, translation in context:
+            lines += [f"Réplique: {source}", f"Traduction: {translation}"]
+        lines += [f"Réplique: {text}", "Traduction:"]
+        return "\n".join(lines)
+    
+    def _context_for(self, history):
+        """Fenêtre de contexte de la prochaine requête, None hors mode contexte
+
+        La fenêtre démarre sur un multiple de `context_window` et s'allonge d'une réplique
+        à chaque requête (entre N et 2N - 1 répliques précédentes) avant de glisser de N
+        d'un coup : les requêtes successives partagent ainsi le plus long préfixe possible.
+        """
+        if not self.context_window:
+            return None
+        size = self.context_window
+        if len(history) < size:
+            return list(history)
+        return history[len(history) - size - len(history) % size:]
+    
+    def _remember(self, history, batch, translations, errors):
+        """Ajoute les traductions d'un lot à l'historique du mode contexte"""
+        if not self.context_window:
+            return
+        for position, ((text, _), translation) in enumerate(zip(batch, translations)):
+            if position not in errors:
+                history.append((text, translation))
+        # Retirer N répliques à la fois préserve l'alignement de la fenêtre
+        if len(history) >= 3 * self.context_window:
+            del history[:self.context_window]
+    
+    def _batch_prompt(self, payload, source_lang, target_lang):
+        """Construit le prompt de traduction d'un objet JSON de textes numérotés"""
+        return f"""Traduis chaque valeur de cet objet JSON de {source_lang} vers {target_lang}.
+Réponds UNIQUEMENT avec un objet JSON ayant exactement les mêmes clés et les traductions comme valeurs, sans explication ni commentaire.
+
+{json.dumps(payload, ensure_ascii=False, indent=1)}"""
+    
+    @staticmethod
+    def _parse_batch_response(raw, payload):
+        """Associe la réponse JSON d'un lot aux textes envoyés, None si elle ne correspond pas"""
+        try:
+            result = json.loads(raw)
+        except ValueError:
+            return None
+        
+        if not isinstance(result, dict) or set(result) != set(payload):
+            return None
+        
+        translations = [result[key] for key in payload]
+        if not all(isinstance(translation, str) for translation in translations):
+            return None
+        
+        return [translation.strip() for translation in translations]
+    
+    def _prompt_for(self, text, source_lang, target_lang, context=None):
+        if context is None:
+            return self._translation_prompt(text, source_lang, target_lang)
+        return self._context_prompt(text, source_lang, target_lang, context)
+    
+    @staticmethod
+    def _stops_for(context=None):
+        """Séquences qui terminent la traduction d'un texte : une ligne vide (le modèle
+        ajoute une explication) ou, en mode contexte, une nouvelle réplique"""
+        return ("\n\n", "\nRéplique:") if context is not None else ("\n\n",)
+    
+    def _request_translation(self, text, source_lang, target_lang, context=None, on_partial=None):
+        """Traduit un texte avec Ollama, lève une exception en cas d'échec"""
+        return self._generate(
+            self._prompt_for(text, source_lang, target_lang, context),
+            source_length=len(text), stop=self._stops_for(context), on_partial=on_partial
+        ).strip()
+    
+    def translate_text(self, text, source_lang, target_lang):
+        """Traduit un texte en utilisant Ollama"""
+        try:
+            return self._request_translation(text, source_lang, target_lang)
         except Exception as e:
             print(f"Erreur lors de la traduction: {e}")
             return text
     
-    def translate_srt_file(self, input_file, output_file, source_lang, target_lang):
-        """Traduit un fichier SRT complet"""
-        # Lire le fichier SRT
+    def translate_batch(self, texts, source_lang, target_lang):
+        """Traduit plusieurs textes en une seule requête Ollama
+
+        Les textes sont envoyés sous forme d'objet JSON numéroté. Renvoie la liste des
+        traductions dans le même ordre, ou None si la réponse est invalide (format, nombre
+        ou numérotation des entrées) afin que l'appelant puisse revenir au mode entrée par entrée.
+        """
+        payload = {str(i): text for i, text in enumerate(texts, 1)}
         try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            # Essayer avec d'autres encodages
-            try:
-                with open(input_file, 'r', encoding='cp1252') as f:
-                    content = f.read()
-            except:
-                with open(input_file, 'r', encoding='latin-1') as f:
-                    content = f.read()
-        
-        # Parser le contenu
-        entries = self.parse_srt(content)
+            raw = self._generate(
+                self._batch_prompt(payload, source_lang, target_lang),
+                source_length=len(json.dumps(payload, ensure_ascii=False)), format="json"
+            )
+        except Exception as e:
+            print(f"Erreur lors de la traduction par lot: {e}")
+            return None
         
-        if not entries:
-            print("Aucune entrée SRT trouvée dans le fichier.")
-            return
+        return self._parse_batch_response(raw, payload)
+    
+    def _lookup_memory(self, texts, source_lang, target_lang):
+        """Renvoie les traductions mémorisées (None pour les textes absents)"""
+        if self.memory is None:
+            return [None] * len(texts)
+        return [self.memory.get(self.model, source_lang, target_lang, text) for text in texts]
+    
+    def _translate_unit(self, texts, source_lang, target_lang, context=None, on_partial=None):
+        """Traduit un lot de textes consécutifs, avec repli entrée par entrée
+
+        La mémoire de traduction est consultée avant l'appel à Ollama et complétée après.
+        `context` est la fenêtre de répliques précédentes en mode contexte et
+        on_partial(texte) reçoit la traduction en cours en mode flux. Renvoie
+        (traductions, erreurs) où erreurs associe la position des textes restés non
+        traduits (le texte source est alors conservé) au message d'erreur.
+        """
+        translations = self._lookup_memory(texts, source_lang, target_lang)
+        errors = {}
+        missing = [i for i, translation in enumerate(translations) if translation is None]
+        if not missing:
+            return translations, errors
         
-        print(f"Traduction de {len(entries)} entrées...")
+        fresh = None
+        if len(missing) > 1:
+            fresh = self.translate_batch([texts[i] for i in missing], source_lang, target_lang)
+            if fresh is None:
+                print(f"Réponse invalide pour un lot de {len(missing)} entrées, traduction entrée par entrée")
         
-        # Traduire chaque entrée
-        translated_entries = []
-        for i, entry in enumerate(entries, 1):
-            print(f"Traduction {i}/{len(entries)}: {entry['text'][:50]}...")
+        for position, i in enumerate(missing):
+            if fresh is not None:
+                translations[i] = fresh[position]
+            else:
+                try:
+                    translations[i] = self._request_translation(texts[i], source_lang, target_lang, context, on_partial)
+                except Exception as e:
+                    # Conserver le texte source, sans le mémoriser
+                    translations[i] = texts[i]
+                    errors[i] = str(e)
+                    continue
             
-            translated_text = self.translate_text(
-                entry['text'], 
-                source_lang, 
-                target_lang
+            if self.memory is not None:
+                self.memory.put(self.model, source_lang, target_lang, texts[i], translations[i])
+        
+        return translations, errors
+    
+    def plan_translation(self, entries, indices=None):
+        """Regroupe les entrées dont le texte normalisé est identique
+
+        Renvoie une liste de (texte normalisé, indices des entrées) dans l'ordre de
+        première apparition : chaque texte unique ne sera traduit qu'une fois. `indices`
+        limite le plan à certaines entrées (par exemple celles qui restent à traduire).
+        Avec un SentenceMerger, les entrées d'une même phrase sont réunies en un tuple
+        d'indices, associé au texte de la phrase complète (voir _fan_out).
+        """
+        if indices is None:
+            indices = range(len(entries))
+        if self.sentence_merger is not None:
+            indices = self.sentence_merger.group(entries, indices)
+        groups = {}
+        for unit in indices:
+            if isinstance(unit, tuple):
+                text = SentenceMerger.join([entries[index].text for index in unit])
+            else:
+                text = entries[unit].text
+            groups.setdefault(normalize_text(text), []).append(unit)
+        return list(groups.items())
+    
+    def split_passthrough(self, plan, source_lang, target_lang):
+        """Retire du plan les textes qui n'ont pas besoin du modèle (voir PassthroughClassifier)
+
+        Renvoie (plan restant, groupes retirés, texte à utiliser pour chacun d'eux).
+        """
+        if self.passthrough is None:
+            return plan, [], []
+        remaining, skipped, outputs = [], [], []
+        for group in plan:
+            output = self.passthrough.classify(group[0], source_lang, target_lang)
+            if output is None:
+                remaining.append(group)
+            else:
+                skipped.append(group)
+                outputs.append(output)
+        return remaining, skipped, outputs
+    
+    def open_journal(self, digest, source_lang, target_lang, resume=False):
+        """Renvoie le journal de reprise du fichier d'empreinte `digest`, ou None s'ils sont désactivés
+
+        Sans `resume`, un éventuel journal précédent est effacé.
+        """
+        if self.checkpoint_dir is None:
+            return None
+        journal = CheckpointJournal.for_job(digest, self.model, source_lang, target_lang, self.checkpoint_dir)
+        if not resume:
+            journal.clear()
+        return journal
+    
+    @staticmethod
+    def select_time_range(entries, digest, time_range):
+        """Ne garde des entrées que celles affichées dans `time_range` (voir SubtitleEntry.overlaps)
+
+        `time_range` est (début, fin) en millisecondes, fin None pour aller jusqu'à la fin
+        du fichier. Une liste déjà en mémoire est filtrée par recherche dichotomique (voir
+        TimingIndex) ; des entrées lues en flux sont filtrées au fil de la lecture.
+        Renvoie (entrées, empreinte du journal de reprise) : les indices du journal étant
+        ceux des entrées retenues, chaque plage a son propre journal.
+        """
+        if time_range is None:
+            return entries, digest
+        start, end = time_range
+        if isinstance(entries, list):
+            entries = [entries[position] for position in TimingIndex(entries).overlapping(start, end)]
+        else:
+            entries = (entry for entry in entries if entry.overlaps(start, end))
+        return entries, f"{digest}:{start}-{'' if end is None else end}"
+    
+    @staticmethod
+    def _resume_from_journal(entries, journal, results, first_index=0, on_entry=None):
+        """Reprend les entrées déjà traduites du journal et renvoie les indices restants"""
+        if journal is not None:
+            done = journal.load()
+            for index, entry in enumerate(entries):
+                text = done.pop(first_index + index, None)
+                if text is not None:
+                    results[index] = entry.with_text(text)
+                    if on_entry:
+                        on_entry(first_index + index, results[index])
+        return [index for index, result in enumerate(results) if result is None]
+    
+    def _make_batches(self, plan):
+        """Découpe le plan de traduction en lots de `batch_size` textes uniques
+
+        En mode contexte, chaque texte est traduit seul pour profiter des précédents.
+        """
+        size = 1 if self.context_window else self.batch_size
+        return [plan[start:start + size] for start in range(0, len(plan), size)]
+    
+    @staticmethod
+    def _fan_out(entries, batch, translations, errors, results, failures, journal=None, first_index=0, on_entry=None,
+                 retry=None):
+        """Répartit les traductions d'un lot sur toutes les entrées de chaque groupe
+
+        La traduction d'une phrase réunie (tuple d'indices) est découpée entre ses entrées
+        (voir SentenceMerger.split) ; si le texte source est conservé (échec, texte recopié
+        tel quel), chaque entrée garde le sien. Une traduction trop courte pour être
+        découpée sans couper de mot ajoute plutôt les textes de ses entrées à `retry`
+        (éléments de plan, un par entrée), pour les traduire séparément. Les entrées
+        traduites sont ajoutées au journal de reprise et transmises à on_entry. Renvoie le
+        nombre d'entrées complétées.
+        """
+        done = 0
+        for position, ((text, units), translated_text) in enumerate(zip(batch, translations)):
+            for unit in units:
+                if not isinstance(unit, tuple):
+                    parts = [(unit, translated_text)]
+                elif position in errors or translated_text == text:
+                    parts = [(index, normalize_text(entries[index].text)) for index in unit]
+                else:
+                    texts = SentenceMerger.split(translated_text, [entries[index].text for index in unit])
+                    if texts is None and retry is not None:
+                        retry.extend((normalize_text(entries[index].text), [index]) for index in unit)
+                        continue
+                    parts = list(zip(unit, texts or [translated_text] * len(unit)))
+                done += SRTTranslator._fan_out_entries(
+                    entries, parts, errors.get(position), results, failures, journal, first_index, on_entry
+                )
+        return done
+    
+    @staticmethod
+    def _fan_out_entries(entries, parts, error, results, failures, journal, first_index, on_entry):
+        """Enregistre la traduction de chaque entrée de `parts` ((indice, texte)), ou son échec"""
+        for index, translated_text in parts:
+            entry = entries[index]
+            results[index] = entry.with_text(translated_text)
+            if error is not None:
+                failures.append({
+                    'number': entry.number,
+                    'text': entry.text,
+                    'error': error
+                })
+            elif journal is not None:
+                journal.append(first_index + index, translated_text)
+            if on_entry:
+                on_entry(first_index + index, results[index])
+        return len(parts)
+    
+    def _prepare_document(self, source_lang, target_lang, entries, journal=None, first_index=0, on_entry=None, history=None):
+        """État de traduction d'un document : reprise depuis le journal, plan et lots
+
+        Les textes qui n'ont pas besoin du modèle sont complétés immédiatement (voir
+        split_passthrough). `history` reçoit les couples (source, traduction) du mode
+        contexte ; il peut être partagé entre les morceaux successifs d'un même fichier.
+        """
+        total = len(entries)
+        results = [None] * total
+        failures = []
+        remaining = self._resume_from_journal(entries, journal, results, first_index, on_entry)
+        plan = self.plan_translation(entries, remaining)
+        unique_texts = len(plan)
+        units = sum(len(group) for _, group in plan)
+        plan, skipped, outputs = self.split_passthrough(plan, source_lang, target_lang)
+        passed = self._fan_out(entries, skipped, outputs, {}, results, failures, journal, first_index, on_entry)
+        return {
+            'entries': entries,
+            'results': results,
+            'batches': deque(self._make_batches(plan)),
+            'in_flight': 0,
+            'done': total - len(remaining) + passed,
+            'stats': {
+                'entries': total,
+                'resumed': total - len(remaining),
+                'unique_texts': unique_texts,
+                'saved_calls': units - unique_texts,
+                'merged': len(remaining) - units,
+                'skipped': len(skipped)
+            },
+            'failures': failures,
+            'journal': journal,
+            'first_index': first_index,
+            'on_entry': on_entry,
+            'history': [] if history is None else history,
+            # Dernière traduction partielle reçue en mode flux (écrite depuis les workers)
+            'partial': None
+        }
+    
+    def _run_documents(self, jobs, source_lang, target_lang, progress_callback=None, cancel_callback=None, max_documents=None,
+                       partial_callback=None, keep_results=True):
+        """Traduit plusieurs documents avec un seul pool de `workers` requêtes en vol
+        
+        `jobs` contient (entrées, journal, first_index, on_entry[, historique]) par document.
+        Au plus `max_documents` documents sont traduits en même temps ; leurs lots sont
+        soumis à tour de rôle, si bien que chacun avance au même rythme. En mode contexte,
+        chaque document n'a qu'une requête en vol, ses textes étant traduits dans l'ordre.
+        progress_callback(document, done, total, text) et cancel_callback() sont appelés
+        depuis le thread appelant, et l'annulation est vérifiée au moins toutes les 0,5 s.
+        En mode flux, partial_callback(document, texte) reçoit la traduction en cours, au
+        plus toutes les 0,2 s. Renvoie (entrées traduites, statistiques, échecs) par
+        document, ou None si la traduction a été annulée. Sans `keep_results`, les entrées
+        traduites (déjà transmises à on_entry) sont libérées dès qu'un document est
+        terminé et remplacées par None.
+        """
+        max_documents = max(1, max_documents or len(jobs))
+        outcomes = [None] * len(jobs)
+        waiting = deque(range(len(jobs)))
+        active = {}
+        pending = {}
+        turn = 0
+        
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while waiting or active:
+                # Vérifier l'annulation
+                if cancel_callback and cancel_callback():
+                    return None
+                
+                while waiting and len(active) < max_documents:
+                    index = waiting.popleft()
+                    active[index] = self._prepare_document(source_lang, target_lang, *jobs[index])
+                
+                # Garder au plus `workers` requêtes en vol, un lot par document à tour de rôle
+                while len(pending) < self.workers:
+                    ready = [
+                        index for index, state in active.items()
+                        if state['batches'] and not (self.context_window and state['in_flight'])
+                    ]
+                    if not ready:
+                        break
+                    index = ready[turn % len(ready)]
+                    turn += 1
+                    state = active[index]
+                    batch = state['batches'].popleft()
+                    on_partial = None
+                    if partial_callback and self.stream:
+                        on_partial = lambda text, state=state: state.__setitem__('partial', text)
+                    future = executor.submit(
+                        self._translate_unit, [text for text, _ in batch], source_lang, target_lang,
+                        self._context_for(state['history']), on_partial
+                    )
+                    pending[future] = (index, batch)
+                    state['in_flight'] += 1
+                
+                timeout = 0.2 if partial_callback and self.stream else 0.5
+                finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED) if pending else ((), ())
+                for future in finished:
+                    index, batch = pending.pop(future)
+                    state = active[index]
+                    state['in_flight'] -= 1
+                    translations, errors = future.result()
+                    self._remember(state['history'], batch, translations, errors)
+                    retry = []
+                    state['done'] += self._fan_out(
+                        state['entries'], batch, translations, errors, state['results'], state['failures'],
+                        state['journal'], state['first_index'], state['on_entry'], retry
+                    )
+                    state['batches'].extend(self._make_batches(retry))
+                    if progress_callback:
+                        progress_callback(index, state['done'], state['stats']['entries'], batch[-1][0][:50])
+                
+                if partial_callback:
+                    for index, state in active.items():
+                        partial, state['partial'] = state['partial'], None
+                        if partial:
+                            partial_callback(index, partial)
+                
+                for index, state in list(active.items()):
+                    if not state['batches'] and not state['in_flight']:
+                        state['failures'].sort(key=lambda failure: int(failure['number']))
+                        results = state['results'] if keep_results else None
+                        outcomes[index] = (results, state['stats'], state['failures'])
+                        del active[index]
+        finally:
+            # Ne pas attendre les requêtes restantes en cas d'annulation
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return outcomes
+    
+    def translate_entries(self, entries, source_lang, target_lang, progress_callback=None, cancel_callback=None,
+                          journal=None, first_index=0, on_entry=None, history=None, partial_callback=None):
+        """Traduit une liste d'entrées SRT avec un pool borné de workers
+
+        Les entrées présentes dans le journal de reprise ne sont pas retraduites et chaque
+        entrée traduite y est ajoutée. `first_index` est la position de la première entrée
+        dans le fichier (traduction par morceaux) et on_entry(position, entrée traduite) est
+        appelé dès qu'une entrée est terminée. Les textes identiques ne sont traduits qu'une fois
+        (voir plan_translation), puis regroupés par lots de `batch_size` textes (une requête
+        par lot). Les entrées sont renvoyées dans l'ordre d'origine. progress_callback(done,
+        total, text) est appelé à chaque lot terminé, cancel_callback() est consulté entre
+        deux lots : s'il renvoie True, la traduction s'arrête et None est renvoyé.
+        Les callbacks sont toujours appelés depuis le thread appelant. `history` prolonge
+        le contexte d'un appel précédent (voir _prepare_document) et, en mode flux,
+        partial_callback(texte) reçoit la traduction en cours.
+        """
+        def document_progress(index, done, total, text):
+            if progress_callback:
+                progress_callback(done, total, text)
+        
+        document_partial = None
+        if partial_callback:
+            document_partial = lambda index, text: partial_callback(text)
+        
+        outcomes = self._run_documents(
+            [(entries, journal, first_index, on_entry, history)], source_lang, target_lang,
+            document_progress, cancel_callback, partial_callback=document_partial
+        )
+        if outcomes is None:
+            return None
+        
+        results, self.stats, self.failures = outcomes[0]
+        return results
+    
+    def translate_documents(self, documents, source_lang, target_lang, progress_callback=None, cancel_callback=None,
+                            journals=None, max_documents=None, partial_callback=None, on_entries=None):
+        """Traduit plusieurs listes d'entrées en même temps (voir _run_documents)
+
+        Le nombre total de requêtes en vol reste limité à `workers`, quel que soit le nombre
+        de documents. progress_callback(document_index, done, total, text) est appelé à
+        chaque lot terminé et, en mode flux, partial_callback(document_index, text) reçoit
+        la traduction en cours. `journals` contient éventuellement le journal de reprise de
+        chaque document. Renvoie, pour chaque document, (entrées traduites, statistiques, échecs),
+        ou None si la traduction a été annulée. Avec `on_entries`, on_entries[document](position,
+        entrée traduite) reçoit chaque entrée dès qu'elle est terminée (SRTWriter.add par
+        exemple) et les entrées traduites ne sont pas conservées (None dans le résultat).
+        """
+        if journals is None:
+            journals = [None] * len(documents)
+        keep_results = on_entries is None
+        if on_entries is None:
+            on_entries = [None] * len(documents)
+        
+        return self._run_documents(
+            [(entries, journal, 0, on_entry) for entries, journal, on_entry in zip(documents, journals, on_entries)],
+            source_lang, target_lang, progress_callback, cancel_callback, max_documents, partial_callback, keep_results
+        )
+    
+    def translate_srt_stream(self, lines, writer, source_lang, target_lang, digest, expected=0, resume=False,
+                             progress_callback=None, cancel_callback=None, partial_callback=None,
+                             chunk_size=None, time_range=None):
+        """Traduit des lignes SRT par morceaux et les écrit dans `writer`
+
+        Cœur commun à translate_srt_file (fichier lu en flux) et à l'interface web
+        (contenu en mémoire) : chaque entrée est transmise à `writer` (SRTWriter) dès
+        qu'elle est traduite. Les textes identiques ne sont regroupés qu'au sein d'un même
+        morceau de `chunk_size` entrées (self.chunk_size par défaut). `digest` identifie
+        le journal de reprise, repris avec `resume`, et `expected` est le nombre d'entrées
+        annoncé à progress_callback(done, total, text). cancel_callback et
+        partial_callback sont ceux de translate_entries.
+        Avec `time_range` ((début, fin) en millisecondes), seules les entrées affichées dans
+        cet intervalle sont traduites et écrites, avec leurs numéros et temps d'origine ;
+        des lignes lues en flux sont filtrées au fil de la lecture, une liste de lignes déjà
+        en mémoire est analysée d'un coup et la plage y est cherchée par dichotomie.
+        Les blocs invalides sont listés dans self.parse_issues. Renvoie le bilan
+        ({'entries', 'resumed', 'unique_texts', 'saved_calls', 'merged', 'skipped',
+        'failures'}), ou None si la traduction a été annulée.
+        """
+        stats = {'entries': 0, 'resumed': 0, 'unique_texts': 0, 'saved_calls': 0, 'merged': 0, 'skipped': 0}
+        failures = []
+        history = []
+        issues = []
+        entries = iter_srt(lines, issues)
+        if time_range is not None and isinstance(lines, list):
+            # Contenu déjà en mémoire : la plage est cherchée dans l'index des temps (voir select_time_range)
+            entries = list(entries)
+        entries, digest = self.select_time_range(entries, digest, time_range)
+        journal = self.open_journal(digest, source_lang, target_lang, resume)
+        try:
+            for chunk in iter_chunks(entries, chunk_size or self.chunk_size):
+                first_index = stats['entries']
+                
+                def chunk_progress(done, total, text, first_index=first_index):
+                    if progress_callback:
+                        progress_callback(first_index + done, max(expected, first_index + total), text)
+                
+                translated = self.translate_entries(
+                    chunk,
+                    source_lang,
+                    target_lang,
+                    progress_callback=chunk_progress,
+                    cancel_callback=cancel_callback,
+                    journal=journal,
+                    first_index=first_index,
+                    on_entry=writer.add,
+                    history=history,
+                    partial_callback=partial_callback
+                )
+                if translated is None:
+                    return None
+                for key in stats:
+                    stats[key] += self.stats[key]
+                failures.extend(self.failures)
+        finally:
+            if journal is not None:
+                journal.close()
+            self.parse_issues = issues
+        
+        self.stats, self.failures = stats, failures
+        if stats['entries']:
+            self.finish_journal(journal, failures)
+        return dict(stats, failures=failures)
+    
+    def translate_srt_file(self, input_file, output_file, source_lang, target_lang, resume=False, progress_callback=None,
+                           time_range=None):
+        """Traduit un fichier SRT complet en flux
+
+        Le fichier est lu et traduit par morceaux de `chunk_size` entrées, et chaque entrée
+        est écrite dès qu'elle et celles qui la précèdent sont traduites : la mémoire reste
+        constante quelle que soit la taille du fichier et la sortie partielle est visible
+        pendant la traduction (voir translate_srt_stream). Avec `resume`, les entrées déjà
+        traduites lors d'une exécution interrompue sont reprises depuis le journal de reprise.
+        progress_callback(done, total, text) remplace l'affichage de la progression et
+        `time_range` limite la traduction à un intervalle de temps (voir translate_srt_stream).
+        Renvoie le bilan du fichier ({'entries', 'resumed', 'unique_texts', 'saved_calls',
+        'merged', 'skipped', 'failures', 'encoding'}), ou None si le fichier ne contient aucune entrée.
+        """
+        encoding, digest, expected = scan_srt_file(input_file)
+        if time_range is not None:
+            # Le nombre d'entrées de la plage n'est connu qu'après lecture
+            expected = 0
+            print(f"Traduction des entrées entre {format_range(*time_range)} (encodage {encoding})...")
+        elif self.context_window:
+            print(f"Traduction d'environ {expected} entrées (encodage {encoding}, contexte de {self.context_window} entrées précédentes)...")
+        else:
+            print(f"Traduction d'environ {expected} entrées (encodage {encoding}, {self.workers} en parallèle, lots de {self.batch_size})...")
+        
+        def print_progress(done, total, text):
+            print(f"Traduction {done}/{total}: {text}...")
+        
+        with open_srt(input_file, encoding) as source, SRTWriter(output_file) as writer:
+            result = self.translate_srt_stream(
+                source, writer, source_lang, target_lang, digest, expected, resume,
+                progress_callback or print_progress, time_range=time_range
             )
-            
-            translated_entries.append({
-                'number': entry['number'],
-                'timestamp': entry['timestamp'],
-                'text': translated_text
-            })
-        
-        # Écrire le fichier traduit
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for entry in translated_entries:
-                f.write(f"{entry['number']}\n")
-                f.write(f"{entry['timestamp']}\n")
-                f.write(f"{entry['text']}\n\n")
         
+        self._print_parse_issues(self.parse_issues)
+        if not result['entries']:
+            Path(output_file).unlink(missing_ok=True)
+            if time_range is not None:
+                print(f"Aucune entrée SRT entre {format_range(*time_range)} dans le fichier {input_file}.")
+            else:
+                print(f"Aucune entrée SRT trouvée dans le fichier {input_file}.")
+            return None
+        
+        self._print_summary(output_file, result, result['failures'])
+        return dict(result, encoding=encoding)
+    
+    def translate_files(self, jobs, source_lang, target_lang, progress_callback=None, resume=False, max_files=None):
+        """Traduit une liste de fichiers (entrée, sortie), `max_files` à la fois
+
+        Chaque fichier est traduit par une copie du traducteur (session HTTP, mémoire de
+        traduction et mesures partagées) et toutes les copies se partagent `workers`
+        requêtes en vol. progress_callback(job_index, done, total, text) est appelé à
+        chaque lot terminé, depuis le thread du fichier. Renvoie le bilan de chaque fichier
+        (voir translate_srt_file) ou l'exception levée.
+        """
+        slots = self._request_slots or threading.BoundedSemaphore(self.workers)
+        
+        def translate_job(index, input_file, output_file):
+            translator = copy.copy(self)
+            translator._request_slots = slots
+            file_progress = None
+            if progress_callback:
+                file_progress = lambda done, total, text: progress_callback(index, done, total, text)
+            return translator.translate_srt_file(input_file, output_file, source_lang, target_lang, resume, file_progress)
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_files or len(jobs) or 1)) as executor:
+            futures = [
+                executor.submit(translate_job, index, input_file, output_file)
+                for index, (input_file, output_file) in enumerate(jobs)
+            ]
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    @staticmethod
+    def finish_journal(journal, failures):
+        """Supprime le journal une fois la traduction complète
+
+        Il est conservé si des entrées ont échoué, pour ne retraduire qu'elles à la reprise.
+        """
+        if journal is not None and not failures:
+            journal.clear()
+    
+    @staticmethod
+    def _print_parse_issues(issues, limit=20):
+        """Affiche les blocs invalides rencontrés lors de la lecture"""
+        if not issues:
+            return
+        print(f"Attention : {len(issues)} blocs SRT mal formés :")
+        for line_number, message in issues[:limit]:
+            print(f"  ligne {line_number} : {message}")
+        if len(issues) > limit:
+            print(f"  ... et {len(issues) - limit} autres")
+    
+    def _print_summary(self, output_file, stats, failures):
+        """Affiche le bilan de la traduction d'un fichier"""
         print(f"Traduction terminée ! Fichier sauvegardé : {output_file}")
+        if stats['resumed']:
+            print(f"Reprise : {stats['resumed']} entrées déjà traduites récupérées du journal")
+        print(f"Textes uniques : {stats['unique_texts']}/{stats['entries'] - stats['resumed']} ({stats['saved_calls']} traductions économisées)")
+        if stats['merged']:
+            print(f"Phrases réunies : {stats['merged']} entrées traduites avec la précédente")
+        if stats['skipped']:
+            print(f"Sans appel au modèle : {stats['skipped']} textes (symboles, balises, liens, noms)")
+        if self.memory is not None:
+            print(f"Mémoire de traduction : {self.memory.hits} trouvées, {self.memory.misses} absentes ({len(self.memory)} entrées)")
+        if failures:
+            print(f"Attention : {len(failures)} entrées n'ont pas pu être traduites (texte source conservé) :")
+            for failure in failures:
+                print(f"  #{failure['number']} : {failure['error']} ({failure['text'][:50]})")
+            print("Relancez avec --resume pour ne retraduire que ces entrées.")
+
+def run_batch(translator, args):
+    """Mode lot : traduit les fichiers désignés par args.batch et renvoie le code de sortie
+
+    Chaque fichier est traduit en nom-LANGUE.srt (dans args.output_dir ou à côté du
+    fichier source) ; les traductions plus récentes que leur source sont ignorées sauf
+    avec args.force. La traduction est écrite dans un fichier .part renommé une fois
+    terminée sans échec.
+    """
+    suffix = f"-{args.target.upper()}.srt"
+    # Ne pas retraduire les fichiers produits par une exécution précédente
+    inputs = [path for path in collect_srt_files(args.batch) if not path.name.endswith(suffix)]
+    if not inputs:
+        print("Erreur: Aucun fichier SRT trouvé.")
+        return 1
+    
+    jobs = []
+    skipped = 0
+    outputs = {}
+    for path in inputs:
+        output = Path(args.output_dir or path.parent) / translated_filename(path.name, args.target)
+        if output in outputs:
+            print(f"Erreur: {outputs[output]} et {path} seraient traduits dans le même fichier {output}")
+            return 1
+        outputs[output] = path
+        if not args.force and output.exists() and output.stat().st_mtime >= path.stat().st_mtime:
+            skipped += 1
+            continue
+        jobs.append((path, output))
+    
+    print(f"{len(inputs)} fichiers trouvés, {skipped} déjà traduits, {len(jobs)} à traduire ({args.parallel_files} à la fois)")
+    if args.output_dir:
+        Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    
+    def print_progress(index, done, total, text):
+        text = text.replace('\n', ' ')
+        print(f"[{jobs[index][0].name}] Traduction {done}/{total}: {text}...")
+    
+    part_jobs = [(str(path), str(output) + ".part") for path, output in jobs]
+    if asyncio.iscoroutinefunction(translator.translate_files):
+        results = asyncio.run(translator.translate_files(
+            part_jobs, args.source, args.target, print_progress, resume=args.resume, max_files=args.parallel_files
+        ))
+    else:
+        results = translator.translate_files(
+            part_jobs, args.source, args.target, print_progress, resume=args.resume, max_files=args.parallel_files
+        )
+    
+    translated = 0
+    failed = []
+    for (path, output), (_, part), result in zip(jobs, part_jobs, results):
+        if isinstance(result, Exception):
+            failed.append((path, str(result)))
+        elif result is None:
+            failed.append((path, "aucune entrée SRT"))
+        elif result['failures']:
+            failed.append((path, f"{len(result['failures'])} entrées non traduites, voir {part} (relancer avec --resume)"))
+        else:
+            Path(part).replace(output)
+            translated += 1
+    
+    print(f"Bilan : {translated} traduits, {skipped} déjà à jour, {len(failed)} en échec")
+    for path, reason in failed:
+        print(f"  Échec {path} : {reason}")
+    return 1 if failed else 0
 
 def main():
     parser = argparse.ArgumentParser(description="Traducteur de fichiers SRT utilisant Ollama")
-    parser.add_argument("input", help="Fichier SRT d'entrée")
-    parser.add_argument("output", help="Fichier SRT de sortie")
+    parser.add_argument("input", nargs="?", help="Fichier SRT d'entrée")
+    parser.add_argument("output", nargs="?", help="Fichier SRT de sortie")
+    parser.add_argument("--batch", nargs="+", metavar="CHEMIN", help="Mode lot : fichiers, dossiers ou motifs glob ('saison1/*.srt') traduits en nom-LANGUE.srt")
+    parser.add_argument("--output-dir", "-o", help="Mode lot : dossier des fichiers traduits (défaut: dossier de chaque fichier source)")
+    parser.add_argument("--parallel-files", "-j", type=int, default=2, help="Mode lot : nombre de fichiers traduits en même temps (défaut: 2)")
+    parser.add_argument("--force", action="store_true", help="Mode lot : retraduit aussi les fichiers dont la traduction est à jour")
     parser.add_argument("--source", "-s", default="anglais", help="Langue source (défaut: anglais)")
     parser.add_argument("--target", "-t", default="français", help="Langue cible (défaut: français)")
-    parser.add_argument("--url", default="http://localhost:11434", help="URL Ollama (défaut: http://localhost:11434)")
+    parser.add_argument("--url", nargs="+", default=["http://localhost:11434"], help="URL Ollama ; avec plusieurs URL, les requêtes sont réparties entre les serveurs (défaut: http://localhost:11434)")
+    parser.add_argument("--balance", choices=STRATEGIES, default="least-outstanding", help="Répartition entre plusieurs serveurs : moins de requêtes en cours ou latence observée (défaut: least-outstanding)")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Nombre de requêtes parallèles vers Ollama (défaut: 1)")
+    parser.add_argument("--adaptive", action="store_true", help="Ajuste le nombre de requêtes en vol entre 1 et --workers selon la latence et les erreurs d'Ollama")
+    parser.add_argument("--batch-size", "-b", type=int, default=1, help="Nombre d'entrées traduites par requête (défaut: 1)")
+    parser.add_argument("--context", type=int, default=0, metavar="N", help="Joint à chaque requête les N entrées précédentes et leur traduction ; les entrées d'un fichier sont alors traduites une à une, dans l'ordre (défaut: 0, désactivé)")
+    parser.add_argument("--stream", action="store_true", help="Reçoit les réponses en flux et interrompt aussitôt une génération qui s'éloigne de la traduction (ligne vide, réponse trop longue)")
+    parser.add_argument("--no-warm-up", action="store_true", help="Ne précharge pas le modèle pendant la lecture du fichier")
+    parser.add_argument("--keep-alive", help="Durée de maintien du modèle en mémoire entre deux requêtes, par exemple 30m ou -1 (défaut: celle du serveur Ollama)")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads", help="Moteur de traduction : pool de threads ou asyncio (défaut: threads)")
+    parser.add_argument("--connect-timeout", type=float, default=5, help="Délai de connexion à Ollama en secondes (défaut: 5)")
+    parser.add_argument("--read-timeout", type=float, default=60, help="Délai de réponse d'Ollama en secondes (défaut: 60)")
+    parser.add_argument("--retries", type=int, default=3, help="Nouvelles tentatives en cas d'erreur réseau ou 5xx (défaut: 3)")
+    parser.add_argument("--resume", action="store_true", help="Reprend une traduction interrompue sans retraduire les entrées déjà terminées")
+    parser.add_argument("--checkpoint-dir", default=str(DEFAULT_CHECKPOINT_DIR), help=f"Dossier des journaux de reprise (défaut: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive la mémoire de traduction")
+    parser.add_argument("--cache-path", default=str(DEFAULT_MEMORY_PATH), help=f"Fichier de la mémoire de traduction (défaut: {DEFAULT_MEMORY_PATH})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_ENTRIES, help=f"Nombre maximal de traductions mémorisées (défaut: {DEFAULT_MAX_ENTRIES})")
+    parser.add_argument("--no-passthrough", action="store_true", help="Envoie tous les textes au modèle, même les symboles, balises sonores, liens et noms de personnages")
+    parser.add_argument("--passthrough-rules", metavar="FICHIER", help="Règles des textes recopiés sans appel au modèle (JSON : rules, patterns, replacements)")
+    parser.add_argument("--merge-sentences", action="store_true", help="Traduit d'un bloc les phrases coupées sur plusieurs entrées consécutives, puis répartit la traduction entre elles au prorata de leur longueur")
+    parser.add_argument("--merge-gap", type=float, default=1.0, metavar="SECONDES", help="Avec --merge-sentences, écart maximal entre deux entrées d'une même phrase (défaut: 1.0)")
+    parser.add_argument("--from", dest="time_from", type=parse_time, metavar="TEMPS", help="Ne traduit que les entrées affichées à partir de ce temps, par exemple 00:10:00 (numéros et temps d'origine conservés)")
+    parser.add_argument("--to", dest="time_to", type=parse_time, metavar="TEMPS", help="Ne traduit que les entrées affichées avant ce temps, par exemple 00:20:00")
+    parser.add_argument("--metrics-file", help="Fichier JSON lines où enregistrer les mesures de chaque requête Ollama")
     
     args = parser.parse_args()
+    if args.batch and args.input:
+        parser.error("--batch remplace les arguments input et output")
+    if not args.batch and not args.output:
+        parser.error("input et output sont requis (ou --batch)")
+    time_range = None
+    if args.time_from is not None or args.time_to is not None:
+        if args.batch:
+            parser.error("--from et --to ne s'appliquent qu'à un seul fichier")
+        time_range = (args.time_from or 0, args.time_to)
+        if args.time_to is not None and args.time_to <= time_range[0]:
+            parser.error("--to doit être postérieur à --from")
     
     # Vérifier que le fichier d'entrée existe
-    if not Path(args.input).exists():
+    if not args.batch and not Path(args.input).exists():
         print(f"Erreur: Le fichier {args.input} n'existe pas.")
         sys.exit(1)
     
     # Créer le traducteur
-    translator = SRTTranslator(args.url)
-    
-    # Test de connexion à Ollama
-    try:
-        response = requests.get(f"{args.url}/api/tags", timeout=5)
-        if response.status_code != 200:
-            print("Erreur: Impossible de se connecter à Ollama. Assurez-vous qu'il est démarré.")
+    memory = None if args.no_cache else TranslationMemory(args.cache_path, max_entries=args.cache_size)
+    passthrough = None
+    if not args.no_passthrough:
+        try:
+            passthrough = PassthroughClassifier.from_file(args.passthrough_rules) if args.passthrough_rules else PassthroughClassifier()
+        except (OSError, ValueError, re.error) as e:
+            print(f"Erreur: Règles invalides ({args.passthrough_rules}) : {e}")
             sys.exit(1)
-    except:
-        print("Erreur: Ollama n'est pas accessible. Vérifiez qu'il est démarré sur", args.url)
+    if args.engine == "async":
+        from async_translator import AsyncSRTTranslator
+        translator_class = AsyncSRTTranslator
+    else:
+        translator_class = SRTTranslator
+    translator = translator_class(
+        args.url,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        memory=memory,
+        passthrough=passthrough,
+        sentence_merger=SentenceMerger(args.merge_gap) if args.merge_sentences else None,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        max_retries=args.retries,
+        checkpoint_dir=args.checkpoint_dir,
+        metrics=RequestMetrics(args.metrics_file),
+        balance=args.balance,
+        context_window=args.context,
+        stream=args.stream,
+        adaptive=args.adaptive,
+        keep_alive=parse_keep_alive(args.keep_alive)
+    )
+    
+    # Test de connexion à Ollama (les serveurs injoignables sont écartés)
+    health = translator.endpoints.check_health(model=translator.model)
+    if not any(health.values()):
+        print("Erreur: Ollama n'est pas accessible. Vérifiez qu'il est démarré sur", ", ".join(args.url))
         sys.exit(1)
+    for url, available in health.items():
+        if not available:
+            print(f"Attention : {url} est injoignable ou ne propose pas le modèle {translator.model}")
+    
+    # Charger le modèle pendant la lecture des fichiers plutôt qu'à la première requête
+    if not args.no_warm_up:
+        translator.start_warm_up()
+    
+    # Traduire le ou les fichiers
+    exit_code = 0
+    if args.batch:
+        exit_code = run_batch(translator, args)
+    elif args.engine == "async":
+        def print_progress(done, total, text):
+            print(f"Traduction {done}/{total}: {text}...")
+        
+        asyncio.run(translator.translate_srt_file(
+            args.input, args.output, args.source, args.target, progress_callback=print_progress, resume=args.resume,
+            time_range=time_range
+        ))
+    else:
+        translator.translate_srt_file(args.input, args.output, args.source, args.target, resume=args.resume, time_range=time_range)
     
-    # Traduire le fichier
-    translator.translate_srt_file(args.input, args.output, args.source, args.target)
+    for line in translator.metrics.format_summary():
+        print(line)
+    if translator.limiter is not None:
+        for line in translator.limiter.format_summary():
+            print(line)
+    translator.metrics.close()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
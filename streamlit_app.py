@@ -5,14 +5,23 @@ Interface Streamlit pour l'outil de traduction de fichiers SRT
 """
 
 import streamlit as st
-import tempfile
-import os
 from pathlib import Path
-import requests
 import time
 import zipfile
 import io
-from srt_translator import SRTTranslator
+import asyncio
+import itertools
+import uuid
+from srt_translator import SRTTranslator, SRTWriter, translated_filename, parse_keep_alive
+from srt_encoding import SAMPLE_SIZE, decode_srt, detect_encoding, count_cues
+from async_translator import AsyncSRTTranslator
+from translation_memory import TranslationMemory
+from checkpoint import content_digest
+from dispatcher import EndpointPool, STRATEGIES, parse_urls
+from passthrough import PassthroughClassifier
+from sentence_merge import SentenceMerger
+from srt_timing import parse_time
+from job_queue import shared_queue, ACTIVE_STATUSES, DEFAULT_MAX_JOBS
 
 # Dictionnaire de traductions
 TRANSLATIONS = {
@@ -21,7 +30,12 @@ TRANSLATIONS = {
         'config': '⚙️ Configuration',
         'ollama': '🤖 Ollama',
         'ollama_url': 'URL Ollama',
-        'ollama_url_help': "L'URL de votre instance Ollama",
+        'ollama_url_help': "L'URL de votre instance Ollama ; plusieurs URL séparées par des virgules répartissent les requêtes entre les serveurs",
+        'balance': 'Répartition entre serveurs',
+        'balance_help': 'Choix du serveur de chaque requête ; un serveur en échec est écarté temporairement et ses requêtes sont relancées sur les autres',
+        'balance_least-outstanding': 'Moins de requêtes en cours',
+        'balance_latency': 'Latence observée',
+        'endpoint_requests': 'Requêtes par serveur : {}',
         'test_connection': '🔍 Tester la connexion',
         'testing_connection': 'Test de connexion...',
         'connection_success': '✅ Connexion réussie !',
@@ -29,6 +43,41 @@ TRANSLATIONS = {
         'connection_failed': '❌ Impossible de se connecter à Ollama',
         'model_name': 'Modèle Ollama',
         'model_help': 'Nom du modèle à utiliser pour la traduction',
+        'keep_alive': 'Maintien du modèle en mémoire',
+        'keep_alive_help': 'Durée pendant laquelle Ollama garde le modèle chargé après chaque requête (30m, 2h, -1 pour toujours, vide pour la valeur du serveur) : le modèle reste prêt d\'une traduction à l\'autre',
+        'warm_up': '🔥 Modèle préchargé en {:.1f} s (dont {:.1f} s de chargement), pendant la lecture du fichier',
+        'workers': 'Requêtes parallèles',
+        'workers_help': 'Nombre de requêtes envoyées simultanément à Ollama (voir OLLAMA_NUM_PARALLEL)',
+        'adaptive': '📈 Parallélisme adaptatif',
+        'adaptive_help': 'Ajuste le nombre de requêtes en vol entre 1 et le nombre de requêtes parallèles : il augmente tant que la latence reste stable et diminue quand elle monte ou en cas d\'erreur',
+        'adaptive_limit': 'parallélisme {}/{}',
+        'adaptive_history': 'Parallélisme adaptatif : requêtes en vol et réponses/s au fil du temps (s)',
+        'adaptive_chart_limit': 'requêtes en vol',
+        'adaptive_chart_throughput': 'réponses/s',
+        'batch_size': 'Entrées par requête',
+        'batch_size_help': 'Nombre de sous-titres consécutifs traduits en une seule requête (1 = une requête par entrée)',
+        'context_window': 'Contexte (entrées précédentes)',
+        'context_window_help': 'Joint à chaque requête les N sous-titres précédents et leur traduction pour des traductions plus cohérentes ; les sous-titres d\'un fichier sont alors traduits un à un (0 = désactivé)',
+        'use_memory': '💾 Mémoire de traduction',
+        'use_memory_help': 'Réutilise les traductions déjà obtenues pour le même modèle et les mêmes langues',
+        'use_passthrough': '⏭️ Ignorer les textes sans traduction',
+        'use_passthrough_help': 'Recopie sans appeler le modèle les symboles (♪, nombres), balises sonores [GUNSHOT], liens et noms de personnages seuls',
+        'merge_sentences': '🔗 Réunir les phrases coupées',
+        'merge_sentences_help': 'Traduit en une seule fois une phrase coupée sur plusieurs sous-titres consécutifs puis répartit la traduction entre eux (numéros et temps inchangés)',
+        'time_from': '⏱️ Traduire à partir de',
+        'time_to': '⏱️ Jusqu\'à',
+        'time_range_help': 'Ne traduit que les sous-titres affichés dans cet intervalle, au format HH:MM:SS (vide = début ou fin du fichier)',
+        'invalid_time_range': 'Intervalle de temps invalide : utilisez le format HH:MM:SS, avec une fin postérieure au début.',
+        'no_entries_in_range': 'Aucune entrée SRT dans l\'intervalle de temps choisi.',
+        'resume': '⏯️ Reprendre les traductions interrompues',
+        'resume_help': 'Ne retraduit pas les entrées déjà terminées lors d\'une session interrompue ou annulée pour le même fichier',
+        'stream': '✍️ Aperçu en direct',
+        'stream_help': 'Reçoit les traductions mot par mot : la ligne de progression affiche la traduction en cours et une génération qui s\'éloigne de la traduction est interrompue aussitôt',
+        'async_engine': '⚡ Moteur asyncio',
+        'async_engine_help': 'En traitement en série, utilise une boucle asyncio au lieu d\'un pool de threads pour les requêtes',
+        'parallel_files': 'Fichiers en parallèle',
+        'parallel_files_help': 'Nombre de fichiers traduits en même temps en traitement en série ; ils partagent la limite de requêtes parallèles',
+        'file_waiting': '{} — en attente',
         'languages': '🌍 Langues',
         'source_lang': 'Langue source',
         'target_lang': 'Langue cible',
@@ -50,14 +99,13 @@ TRANSLATIONS = {
         'choose_files_help': 'Sélectionnez plusieurs fichiers de sous-titres à traduire',
         'file_loaded': '✅ Fichier chargé: **{}** ({} octets)',
         'files_loaded': '✅ {} fichiers chargés (Total: {} octets)',
-        'batch_processing': '🔄 Traitement en série ({}/{}): {}',
         'batch_completed': '🎉 Traitement en série terminé ! {} fichiers traduits.',
         'batch_success': '✅ Tous les fichiers ont été traduits avec succès !',
         'initializing': 'Initialisation...',
         'download_all': '📦 Télécharger tous les fichiers (ZIP)',
         'preview_file': '👀 Aperçu du fichier',
         'file_truncated': '... (fichier tronqué pour l\'aperçu)',
-        'encoding_warning': '⚠️ Impossible de décoder le fichier en UTF-8. La traduction tentera d\'autres encodages.',
+        'detected_encoding': '🔤 Encodage détecté : {}',
         'start_translation': '🚀 Lancer la traduction',
         'ollama_connection_error': '❌ Impossible de se connecter à Ollama. Vérifiez votre configuration.',
         'translation_progress': '🔄 Traduction en cours...',
@@ -65,9 +113,28 @@ TRANSLATIONS = {
         'translating_entry': 'Traduction {}/{}: {}...',
         'translation_completed': '✅ Traduction terminée !',
         'translation_success': '🎉 Traduction terminée avec succès !',
+        'saved_calls': '♻️ {} traductions économisées sur {} entrées (textes identiques)',
+        'skipped_calls': '⏭️ {} textes recopiés sans appel au modèle',
+        'merged_cues': '🔗 {} entrées traduites avec la précédente (phrases réunies)',
+        'failed_entries': '⚠️ {} entrées n\'ont pas pu être traduites (texte source conservé)',
+        'failed_entries_details': '📋 Détail des entrées non traduites',
+        'parse_issues': '⚠️ {} blocs SRT mal formés ont été signalés',
+        'parse_issues_details': '📋 Détail des blocs mal formés',
+        'live_metrics': '⚡ {:.1f} jetons/s · temps restant estimé : {}',
+        'eta_unknown': 'calcul en cours...',
+        'request_metrics': '📊 Mesures des requêtes Ollama',
+        'request_metrics_details': '{} requêtes ({} échecs, {} nouvelles tentatives) · {} jetons en entrée, {} jetons générés',
+        'tokens_per_second': 'Jetons/s',
         'translation_error': '❌ Erreur lors de la traduction: {}',
         'cancel_translation': '🛑 Annuler la traduction',
         'translation_cancelled': '⚠️ Traduction annulée par l\'utilisateur',
+        'job_submitted': '📨 Traduction ajoutée à la file : elle continue même si la page est rechargée ou fermée',
+        'jobs_section': '🗂️ Traductions en cours',
+        'job_files': '{} fichiers',
+        'job_queued': '⏳ En attente : {} traduction(s) avant celle-ci',
+        'job_cancelling': '🛑 Annulation en cours...',
+        'previous_jobs': '🕘 Traductions précédentes',
+        'show_result': 'Afficher',
         'no_entries_found': 'Aucune entrée SRT trouvée dans le fichier.',
         'result_section': '📥 Résultat',
         'file_ready': '✅ Fichier traduit prêt !',
@@ -104,7 +171,12 @@ How are you today?
         'config': '⚙️ Configuration',
         'ollama': '🤖 Ollama',
         'ollama_url': 'Ollama URL',
-        'ollama_url_help': 'The URL of your Ollama instance',
+        'ollama_url_help': 'The URL of your Ollama instance; several comma-separated URLs spread requests across servers',
+        'balance': 'Load balancing',
+        'balance_help': 'How each request picks a server; a failing server is temporarily ejected and its requests are retried on the others',
+        'balance_least-outstanding': 'Fewest in-flight requests',
+        'balance_latency': 'Observed latency',
+        'endpoint_requests': 'Requests per server: {}',
         'test_connection': '🔍 Test connection',
         'testing_connection': 'Testing connection...',
         'connection_success': '✅ Connection successful!',
@@ -112,6 +184,41 @@ How are you today?
         'connection_failed': '❌ Unable to connect to Ollama',
         'model_name': 'Ollama Model',
         'model_help': 'Name of the model to use for translation',
+        'keep_alive': 'Keep model loaded',
+        'keep_alive_help': 'How long Ollama keeps the model loaded after each request (30m, 2h, -1 for ever, empty for the server setting): the model stays ready from one translation to the next',
+        'warm_up': '🔥 Model preloaded in {:.1f} s ({:.1f} s loading), while the file was being read',
+        'workers': 'Parallel requests',
+        'workers_help': 'Number of requests sent to Ollama simultaneously (see OLLAMA_NUM_PARALLEL)',
+        'adaptive': '📈 Adaptive concurrency',
+        'adaptive_help': 'Adjusts the number of in-flight requests between 1 and the number of parallel requests: it grows while latency stays stable and shrinks when latency rises or on errors',
+        'adaptive_limit': 'concurrency {}/{}',
+        'adaptive_history': 'Adaptive concurrency: in-flight requests and responses/s over time (s)',
+        'adaptive_chart_limit': 'in-flight requests',
+        'adaptive_chart_throughput': 'responses/s',
+        'batch_size': 'Entries per request',
+        'batch_size_help': 'Number of consecutive subtitles translated in a single request (1 = one request per entry)',
+        'context_window': 'Context (previous entries)',
+        'context_window_help': 'Sends the N previous subtitles and their translation with each request for more consistent translations; the subtitles of a file are then translated one at a time (0 = disabled)',
+        'use_memory': '💾 Translation memory',
+        'use_memory_help': 'Reuses translations already obtained for the same model and languages',
+        'use_passthrough': '⏭️ Skip untranslatable texts',
+        'use_passthrough_help': 'Copies symbols (♪, numbers), sound tags [GUNSHOT], links and lone speaker names without calling the model',
+        'merge_sentences': '🔗 Merge split sentences',
+        'merge_sentences_help': 'Translates a sentence split across several consecutive subtitles in one go, then spreads the translation back over them (numbers and timings unchanged)',
+        'time_from': '⏱️ Translate from',
+        'time_to': '⏱️ Until',
+        'time_range_help': 'Only translates the subtitles shown in this range, as HH:MM:SS (empty = start or end of the file)',
+        'invalid_time_range': 'Invalid time range: use the HH:MM:SS format, with an end after the start.',
+        'no_entries_in_range': 'No SRT entries in the selected time range.',
+        'resume': '⏯️ Resume interrupted translations',
+        'resume_help': 'Skips entries already translated during an interrupted or cancelled session for the same file',
+        'stream': '✍️ Live preview',
+        'stream_help': 'Receives translations word by word: the progress line shows the translation in progress and a generation drifting away from the translation is stopped right away',
+        'async_engine': '⚡ Asyncio engine',
+        'async_engine_help': 'In batch mode, uses an asyncio event loop instead of a thread pool for requests',
+        'parallel_files': 'Parallel files',
+        'parallel_files_help': 'Number of files translated at the same time in batch mode; they share the parallel requests limit',
+        'file_waiting': '{} — waiting',
         'languages': '🌍 Languages',
         'source_lang': 'Source language',
         'target_lang': 'Target language',
@@ -133,14 +240,13 @@ How are you today?
         'choose_files_help': 'Select multiple subtitle files to translate',
         'file_loaded': '✅ File loaded: **{}** ({} bytes)',
         'files_loaded': '✅ {} files loaded (Total: {} bytes)',
-        'batch_processing': '🔄 Batch processing ({}/{}): {}',
         'batch_completed': '🎉 Batch processing completed! {} files translated.',
         'batch_success': '✅ All files have been successfully translated!',
         'initializing': 'Initializing...',
         'download_all': '📦 Download all files (ZIP)',
         'preview_file': '👀 File preview',
         'file_truncated': '... (file truncated for preview)',
-        'encoding_warning': '⚠️ Unable to decode file as UTF-8. Translation will try other encodings.',
+        'detected_encoding': '🔤 Detected encoding: {}',
         'start_translation': '🚀 Start translation',
         'ollama_connection_error': '❌ Unable to connect to Ollama. Check your configuration.',
         'translation_progress': '🔄 Translation in progress...',
@@ -148,9 +254,28 @@ How are you today?
         'translating_entry': 'Translating {}/{}: {}...',
         'translation_completed': '✅ Translation completed!',
         'translation_success': '🎉 Translation completed successfully!',
+        'saved_calls': '♻️ {} translations saved out of {} entries (identical texts)',
+        'skipped_calls': '⏭️ {} texts copied without calling the model',
+        'merged_cues': '🔗 {} entries translated with the previous one (merged sentences)',
+        'failed_entries': '⚠️ {} entries could not be translated (source text kept)',
+        'failed_entries_details': '📋 Untranslated entries details',
+        'parse_issues': '⚠️ {} malformed SRT blocks were reported',
+        'parse_issues_details': '📋 Malformed blocks details',
+        'live_metrics': '⚡ {:.1f} tokens/s · estimated time left: {}',
+        'eta_unknown': 'estimating...',
+        'request_metrics': '📊 Ollama request metrics',
+        'request_metrics_details': '{} requests ({} failed, {} retries) · {} prompt tokens, {} generated tokens',
+        'tokens_per_second': 'Tokens/s',
         'translation_error': '❌ Translation error: {}',
         'cancel_translation': '🛑 Cancel translation',
         'translation_cancelled': '⚠️ Translation cancelled by user',
+        'job_submitted': '📨 Translation added to the queue: it keeps running even if the page is reloaded or closed',
+        'jobs_section': '🗂️ Translations in progress',
+        'job_files': '{} files',
+        'job_queued': '⏳ Waiting: {} translation(s) ahead of this one',
+        'job_cancelling': '🛑 Cancelling...',
+        'previous_jobs': '🕘 Previous translations',
+        'show_result': 'Show',
         'no_entries_found': 'No SRT entries found in the file.',
         'result_section': '📥 Result',
         'file_ready': '✅ Translated file ready!',
@@ -184,100 +309,495 @@ How are you today?
     }
 }
 
+# Icône de l'état d'une tâche terminée (voir job_queue.STATUSES)
+JOB_ICONS = {'done': '✅', 'failed': '❌', 'cancelled': '⚠️'}
+
 def get_text(key, lang='fr'):
     """Récupère le texte traduit selon la langue sélectionnée"""
     return TRANSLATIONS.get(lang, TRANSLATIONS['fr']).get(key, key)
 
-def process_single_file(file, translator, source_lang, target_lang, ui_lang, progress_callback=None, cancel_callback=None):
-    """Traite un seul fichier SRT avec callbacks de progression et annulation"""
-    # Créer des fichiers temporaires
-    with tempfile.NamedTemporaryFile(mode='w+b', suffix='.srt', delete=False) as input_temp:
-        input_temp.write(file.read())
-        input_temp_path = input_temp.name
+def parse_time_range(time_from, time_to):
+    """Intervalle (début, fin) en millisecondes saisi dans la barre latérale, ou None s'il est vide
+
+    Un début vide vaut 0 et une fin vide None (fin du fichier). Lève ValueError si un
+    temps est mal formé ou si la fin n'est pas postérieure au début.
+    """
+    if not time_from.strip() and not time_to.strip():
+        return None
+    start = parse_time(time_from) if time_from.strip() else 0
+    end = parse_time(time_to) if time_to.strip() else None
+    if end is not None and end <= start:
+        raise ValueError(f"fin {time_to!r} antérieure au début {time_from!r}")
+    return start, end
+
+def process_single_file(file, translator, source_lang, target_lang, ui_lang, progress_callback=None, cancel_callback=None, resume=False,
+                        partial_callback=None, output=None, time_range=None):
+    """Traite un seul fichier SRT avec callbacks de progression et annulation
+
+    Le contenu est décodé une fois depuis le buffer de l'upload, avec l'encodage détecté
+    (ajouté à translator.stats['encoding'], voir decode_srt), et la traduction est
+    construite en mémoire, par le même chemin que la ligne de commande (voir
+    SRTTranslator.translate_srt_stream). Avec `resume`, les entrées déjà traduites lors
+    d'une session interrompue ou annulée sont reprises depuis le journal de reprise.
+    Avec translator.stream, partial_callback(texte) reçoit la traduction en cours.
+    Avec `output` (chemin), la traduction est écrite dans ce fichier au fur et à mesure
+    et le chemin est renvoyé à la place du texte. Le nombre de lignes écrites est ajouté
+    à translator.stats['lines']. Avec `time_range` ((début, fin) en millisecondes), seules
+    les entrées affichées dans cet intervalle sont traduites.
+    """
+    data = file.getvalue()
+    content, encoding = decode_srt(data)
+    lines = content.splitlines()
+    del content
+    target = io.StringIO() if output is None else output
+    with SRTWriter(target) as writer:
+        # Contenu déjà en mémoire : un seul morceau, pour regrouper les textes identiques de tout le fichier
+        result = translator.translate_srt_stream(
+            lines, writer, source_lang, target_lang,
+            content_digest(data), 0 if time_range else count_cues(data, encoding), resume,
+            progress_callback=progress_callback,
+            cancel_callback=cancel_callback,
+            partial_callback=partial_callback,
+            chunk_size=max(1, len(lines)),
+            time_range=time_range
+        )
+    
+    if result is None:
+        return None, get_text("translation_cancelled", ui_lang)
+    if not result['entries']:
+        return None, get_text("no_entries_in_range" if time_range else "no_entries_found", ui_lang)
+    translator.stats['encoding'] = encoding
+    translator.stats['lines'] = writer.lines
+    return (target.getvalue() if output is None else output), None
+
+def output_filenames(names, target_lang):
+    """Noms des fichiers traduits d'un lot, distincts même si deux fichiers envoyés portent le même nom
+
+    Le deuxième "a.srt" devient "a (2)-FRANÇAIS.srt", le troisième "a (3)-FRANÇAIS.srt"...
+    """
+    filenames = []
+    taken = set()
+    for name in names:
+        filename = translated_filename(name, target_lang)
+        copy_number = 1
+        while filename.lower() in taken:
+            copy_number += 1
+            filename = translated_filename(f"{Path(name).stem} ({copy_number}).srt", target_lang)
+        taken.add(filename.lower())
+        filenames.append(filename)
+    return filenames
+
+def process_files_parallel(files, translator, source_lang, target_lang, ui_lang, progress_callback=None, cancel_callback=None,
+                           resume=False, max_documents=None, partial_callback=None, output_dir=None, time_range=None):
+    """Traduit plusieurs fichiers SRT en même temps (pool de threads ou AsyncSRTTranslator)
+
+    Au plus `max_documents` fichiers sont traduits à la fois et toutes les requêtes
+    partagent la limite de translator.workers requêtes en vol.
+    progress_callback(file_index, done, total, text) et, avec translator.stream,
+    partial_callback(file_index, text) sont appelés depuis le thread courant.
+    Renvoie (résultats, erreurs) où résultats contient (nom, contenu traduit, statistiques
+    avec l'encodage détecté et le nombre de lignes, échecs) par fichier traduit et
+    erreurs (nom, message) par fichier ignoré, ou None si la traduction a été annulée.
+    Avec `output_dir`, chaque traduction est écrite dans ce répertoire (voir
+    output_filenames) au fur et à mesure, chaque fichier étant fermé dès sa dernière
+    entrée, et son chemin remplace le contenu traduit : les entrées traduites ne restent
+    pas en mémoire jusqu'à la fin du lot. Avec `time_range`, seules les entrées affichées
+    dans cet intervalle sont traduites, retrouvées dans chaque fichier analysé par
+    recherche dichotomique (voir SRTTranslator.select_time_range). Les blocs mal formés de
+    tous les fichiers sont regroupés dans translator.parse_issues.
+    """
+    documents = []
+    encodings = []
+    journals = []
+    file_indices = []
+    errors = []
+    parse_issues = []
+    for file_index, file in enumerate(files):
+        data = file.getvalue()
+        content, encoding = decode_srt(data)
+        entries = translator.parse_srt(content)
+        parse_issues.extend((f"{file.name}:{line_number}", message) for line_number, message in translator.parse_issues)
+        if not entries:
+            errors.append((file.name, get_text("no_entries_found", ui_lang)))
+            continue
+        entries, digest = translator.select_time_range(entries, content_digest(data), time_range)
+        if entries:
+            documents.append(entries)
+            encodings.append(encoding)
+            journals.append(translator.open_journal(digest, source_lang, target_lang, resume))
+            file_indices.append(file_index)
+        else:
+            errors.append((file.name, get_text("no_entries_in_range", ui_lang)))
+    
+    translator.parse_issues = parse_issues
+    
+    filenames = output_filenames([file.name for file in files], target_lang)
+    outputs = [io.StringIO() if output_dir is None else Path(output_dir) / filenames[file_index] for file_index in file_indices]
+    writers = [SRTWriter(output) for output in outputs]
+    
+    def entry_writer(writer, total):
+        def write_entry(index, entry):
+            writer.add(index, entry)
+            if writer.entries == total:
+                writer.close()
+        return write_entry
     
-    with tempfile.NamedTemporaryFile(mode='w+', suffix='.srt', delete=False, encoding='utf-8') as output_temp:
-        output_temp_path = output_temp.name
+    def document_progress(index, done, total, text):
+        if progress_callback:
+            # Ramener l'indice du document à celui du fichier uploadé
+            progress_callback(file_indices[index], done, total, text)
     
-    # Réinitialiser le pointeur du fichier
-    file.seek(0)
+    def document_partial(index, text):
+        if partial_callback:
+            partial_callback(file_indices[index], text)
     
     try:
-        # Lire et parser le fichier
-        try:
-            with open(input_temp_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            try:
-                with open(input_temp_path, 'r', encoding='cp1252') as f:
-                    content = f.read()
-            except:
-                with open(input_temp_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
+        outcomes = translator.translate_documents(
+            documents, source_lang, target_lang,
+            progress_callback=document_progress,
+            cancel_callback=cancel_callback,
+            journals=journals,
+            max_documents=max_documents,
+            partial_callback=document_partial,
+            on_entries=[entry_writer(writer, len(entries)) for writer, entries in zip(writers, documents)]
+        )
+        if isinstance(translator, AsyncSRTTranslator):
+            outcomes = asyncio.run(outcomes)
+    finally:
+        for writer in writers:
+            writer.close()
+        for journal in journals:
+            if journal is not None:
+                journal.close()
+    if outcomes is None:
+        return None
+    
+    for journal, (_, _, failures) in zip(journals, outcomes):
+        translator.finish_journal(journal, failures)
+    
+    results = []
+    for file_index, encoding, output, writer, (_, stats, failures) in zip(file_indices, encodings, outputs, writers, outcomes):
+        content = output.getvalue() if output_dir is None else output
+        results.append((files[file_index].name, content, dict(stats, encoding=encoding, lines=writer.lines), failures))
+    return results, errors
+
+def create_translator(settings, memory=None, file_count=1):
+    """Crée le traducteur d'une tâche d'après les paramètres choisis dans la barre latérale"""
+    translator_class = AsyncSRTTranslator if settings['async_engine'] and file_count > 1 else SRTTranslator
+    translator = translator_class(
+        settings['ollama_url'], workers=settings['workers'], batch_size=settings['batch_size'],
+        memory=memory if settings['use_memory'] else None, balance=settings['balance'],
+        passthrough=PassthroughClassifier() if settings['use_passthrough'] else None,
+        sentence_merger=SentenceMerger() if settings.get('merge_sentences') else None,
+        context_window=settings['context_window'], stream=settings['stream'], adaptive=settings['adaptive'],
+        keep_alive=parse_keep_alive(settings['keep_alive'])
+    )
+    translator.model = settings['model']
+    return translator
+
+def run_translation_job(job, progress, memory=None):
+    """Exécute une tâche de la file de traduction (thread d'arrière-plan, voir JobQueue)
+
+    Les fichiers sont traduits par le même chemin que la traduction directe
+    (process_single_file ou process_files_parallel), puis écrits dans le répertoire de
+    sortie de la tâche. Renvoie le bilan affiché par l'interface, ou None si la tâche a
+    été annulée ; une erreur (fichier sans entrée...) lève ValueError.
+    """
+    settings = job['settings']
+    ui_lang = settings['ui_lang']
+    source_lang, target_lang = settings['source_lang'], settings['target_lang']
+    files = progress.queue.inputs(job)
+    translator = create_translator(settings, memory, len(files))
+    # Charger le modèle pendant la lecture des fichiers
+    translator.start_warm_up()
+    # Tâche relancée après un redémarrage du serveur : reprendre depuis le journal de reprise
+    resume = settings['resume'] or job['attempts'] > 1
+    time_range = settings.get('time_range')
+    
+    def update_live():
+        progress.set_live(
+            tokens_per_s=translator.metrics.tokens_per_second(),
+            limit=translator.limiter.current if translator.limiter is not None else None,
+            workers=translator.workers
+        )
+    
+    output_dir = progress.queue.output_dir(job['id'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if len(files) == 1:
+        last_progress = [0, 0]
         
-        entries = translator.parse_srt(content)
+        def update_progress(done, total, current_text):
+            update_live()
+            last_progress[:] = [done, total]
+            # Affichage détaillé : "5/342 : <texte>"
+            progress.update(0, done, total, f"{done}/{total} : {current_text}")
         
-        if not entries:
-            return None, get_text("no_entries_found", ui_lang)
-        
-        # Traduire chaque entrée avec progression
-        translated_entries = []
-        for i, entry in enumerate(entries):
-            # Vérifier l'annulation
-            if cancel_callback and cancel_callback():
-                return None, get_text("translation_cancelled", ui_lang)
-            
-            # Mise à jour de la progression
-            if progress_callback:
-                progress_callback(i, len(entries), entry['text'][:50])
-            
-            translated_text = translator.translate_text(
-                entry['text'], 
-                source_lang, 
-                target_lang
-            )
-            
-            translated_entries.append({
-                'number': entry['number'],
-                'timestamp': entry['timestamp'],
-                'text': translated_text
-            })
+        # Traduction en cours, reçue en flux : "5/342 : ✍️ <texte partiel>"
+        def show_partial(text):
+            done, total = last_progress
+            progress.set_message(f"{done}/{total} : ✍️ {text[-80:]}")
         
-        # Écrire le fichier traduit
-        with open(output_temp_path, 'w', encoding='utf-8') as f:
-            for entry in translated_entries:
-                f.write(f"{entry['number']}\n")
-                f.write(f"{entry['timestamp']}\n")
-                f.write(f"{entry['text']}\n\n")
-        
-        # Lire le contenu traduit
-        with open(output_temp_path, 'r', encoding='utf-8') as f:
-            translated_content = f.read()
+        output, error = process_single_file(
+            files[0], translator, source_lang, target_lang, ui_lang,
+            progress_callback=update_progress,
+            cancel_callback=progress.cancelled,
+            resume=resume,
+            partial_callback=show_partial,
+            output=output_dir / translated_filename(files[0].name, target_lang),
+            time_range=time_range
+        )
+        if output is None:
+            if progress.cancelled():
+                return None
+            raise ValueError(error)
+        file_results = [(files[0].name, output, translator.stats, translator.failures)]
+        file_errors = []
+    else:
+        def update_batch_progress(file_index, done_entries, file_total, current_text):
+            update_live()
+            progress.update(file_index, done_entries, file_total, f"{done_entries}/{file_total} : {current_text}")
         
-        return translated_content, None
+        def show_batch_partial(file_index, text):
+            progress.set_message(f"{files[file_index].name} : ✍️ {text[-80:]}")
         
-    finally:
-        # Nettoyage
-        try:
-            os.unlink(input_temp_path)
-            os.unlink(output_temp_path)
-        except:
-            pass
-
-def create_zip_from_files(files_data, target_lang):
-    """Crée un fichier ZIP contenant tous les fichiers traduits"""
-    zip_buffer = io.BytesIO()
+        outcome = process_files_parallel(
+            files, translator, source_lang, target_lang, ui_lang,
+            progress_callback=update_batch_progress,
+            cancel_callback=progress.cancelled,
+            resume=resume,
+            max_documents=settings['parallel_files'],
+            partial_callback=show_batch_partial,
+            output_dir=output_dir,
+            time_range=time_range
+        )
+        if outcome is None:
+            return None
+        file_results, file_errors = outcome
+        if not file_results:
+            raise ValueError(get_text("no_entries_found", ui_lang))
+    
+    outputs = []
+    failures = []
+    for name, output, stats, file_failures in file_results:
+        outputs.append({'name': name, 'output': output.name, 'stats': stats})
+        if len(files) > 1:
+            file_failures = [dict(failure, number=f"{name} {failure['number']}") for failure in file_failures]
+        failures.extend(file_failures)
+    
+    # Archive des traductions, construite fichier par fichier sur disque
+    archive = None
+    if len(files) > 1:
+        archive = create_zip_from_files(
+            [output for _, output, _, _ in file_results], output_dir / f"subtitles-{target_lang.upper()}.zip"
+        ).name
+    
+    return {
+        'files': outputs,
+        'archive': archive,
+        'errors': file_errors,
+        'failures': failures,
+        'parse_issues': translator.parse_issues,
+        'metrics': translator.metrics.summary(),
+        'adaptive_history': translator.limiter.history if translator.limiter is not None else [],
+    }
+
+def show_failures(failures, ui_lang):
+    """Affiche les entrées restées non traduites"""
+    if not failures:
+        return
+    st.warning(get_text("failed_entries", ui_lang).format(len(failures)))
+    with st.expander(get_text("failed_entries_details", ui_lang), expanded=False):
+        for failure in failures:
+            st.write(f"**#{failure['number']}** : {failure['error']} — {failure['text'][:50]}")
+
+def show_parse_issues(issues, ui_lang):
+    """Affiche les blocs SRT mal formés rencontrés lors de la lecture"""
+    if not issues:
+        return
+    st.warning(get_text("parse_issues", ui_lang).format(len(issues)))
+    with st.expander(get_text("parse_issues_details", ui_lang), expanded=False):
+        for location, message in issues[:100]:
+            st.write(f"**{location}** : {message}")
+
+def format_eta(seconds):
+    """Formate une durée restante : 1 h 05 min, 3 min 20 s, 45 s"""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600} h {seconds % 3600 // 60:02d} min"
+    if seconds >= 60:
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+    return f"{seconds} s"
+
+def live_metrics_text(job, fraction, ui_lang):
+    """Débit de génération instantané et temps restant estimé d'après la progression d'une tâche"""
+    elapsed = time.time() - job['started']
+    eta = format_eta(elapsed * (1 - fraction) / fraction) if fraction > 0 else get_text("eta_unknown", ui_lang)
+    live = job['live']
+    text = get_text("live_metrics", ui_lang).format(live.get('tokens_per_s') or 0.0, eta)
+    if live.get('limit') is not None:
+        text += " · " + get_text("adaptive_limit", ui_lang).format(live['limit'], live['workers'])
+    return text
+
+def show_request_metrics(summary, ui_lang, adaptive_history=()):
+    """Affiche la latence (p50/p95/p99) et le débit des requêtes Ollama (voir RequestMetrics.summary)
+
+    Avec un parallélisme adaptatif, l'évolution de la limite et du débit est tracée.
+    """
+    if not summary['requests']:
+        return
+    with st.expander(get_text("request_metrics", ui_lang), expanded=False):
+        if summary['warm_up_s'] is not None:
+            st.caption(get_text("warm_up", ui_lang).format(summary['warm_up_s'], summary['warm_up_load_s']))
+        columns = st.columns(4)
+        for column, key in zip(columns, ('latency_p50', 'latency_p95', 'latency_p99')):
+            column.metric(key.split('_')[1], f"{summary[key]:.2f} s")
+        columns[3].metric(get_text("tokens_per_second", ui_lang), f"{summary['tokens_per_s'] or 0:.1f}")
+        st.caption(get_text("request_metrics_details", ui_lang).format(
+            summary['requests'], summary['failures'], summary['retries'],
+            summary['prompt_tokens'], summary['eval_tokens']
+        ))
+        if len(summary['endpoints']) > 1:
+            st.caption(get_text("endpoint_requests", ui_lang).format(
+                ", ".join(f"{url} ({count})" for url, count in summary['endpoints'].items())
+            ))
+        if adaptive_history:
+            st.caption(get_text("adaptive_history", ui_lang))
+            st.line_chart({
+                's': [sample['time'] for sample in adaptive_history],
+                get_text("adaptive_chart_limit", ui_lang): [sample['limit'] for sample in adaptive_history],
+                get_text("adaptive_chart_throughput", ui_lang): [round(sample['throughput'], 1) for sample in adaptive_history],
+            }, x='s')
+
+def job_title(job, ui_lang):
+    """Nom du fichier d'une tâche, ou nombre de fichiers en traitement en série"""
+    if len(job['names']) == 1:
+        return job['names'][0]
+    return get_text("job_files", ui_lang).format(len(job['names']))
+
+def show_active_jobs(client_id, ui_lang):
+    """Progression des tâches en attente ou en cours (fragment relu chaque seconde)
+
+    Quand une tâche se termine, toute la page est réexécutée pour afficher son résultat.
+    """
+    queue = get_job_queue()
+    jobs = [job for job in reversed(queue.list(client_id)) if job['status'] in ACTIVE_STATUSES]
+    active_ids = {job['id'] for job in jobs}
+    finished = st.session_state.get('active_jobs', set()) - active_ids
+    st.session_state.active_jobs = active_ids
+    if finished:
+        st.rerun()
+    if not jobs:
+        return
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for original_name, translated_content in files_data:
-            # Créer le nom de fichier de sortie
-            name_without_ext = Path(original_name).stem
-            output_filename = f"{name_without_ext}-{target_lang.upper()}.srt"
+    st.subheader(get_text("jobs_section", ui_lang))
+    for job in jobs:
+        col_progress, col_cancel = st.columns([4, 1])
+        
+        with col_cancel:
+            if st.button(get_text("cancel_translation", ui_lang), type="secondary", use_container_width=True,
+                         key=f"cancel_{job['id']}", disabled=job['cancel_requested']):
+                queue.cancel(job['id'])
+                st.rerun(scope="fragment")
+        
+        with col_progress:
+            st.markdown(f"**{job_title(job, ui_lang)}**")
+            if job['status'] == 'queued':
+                st.progress(0, text=get_text("job_queued", ui_lang).format(queue.position(job['id'])))
+                continue
             
-            # Ajouter le fichier au ZIP
-            zip_file.writestr(output_filename, translated_content)
+            fractions = [done / total if total else 0.0 for done, total in job['progress']]
+            fraction = sum(fractions) / len(fractions)
+            st.progress(fraction)
+            st.text(job['message'] or get_text("initializing", ui_lang))
+            st.caption(live_metrics_text(job, fraction, ui_lang))
+            if job['cancel_requested']:
+                st.caption(get_text("job_cancelling", ui_lang))
+            if len(job['names']) > 1:
+                for name, (done, total), file_fraction in zip(job['names'], job['progress'], fractions):
+                    if total:
+                        st.progress(file_fraction, text=f"{name} — {done}/{total}")
+                    else:
+                        st.progress(0, text=get_text("file_waiting", ui_lang).format(name))
+
+def show_job_outcome(job, ui_lang):
+    """Affiche le bilan d'une tâche terminée, annulée ou en échec"""
+    if job['status'] == 'cancelled':
+        st.warning(get_text("translation_cancelled", ui_lang))
+        return
+    if job['status'] == 'failed':
+        st.error(get_text("translation_error", ui_lang).format(job['error']))
+        return
     
-    zip_buffer.seek(0)
-    return zip_buffer
+    result = job['result']
+    for name, error in result['errors']:
+        st.warning(f"⚠️ Erreur avec {name}: {error}")
+    if len(job['names']) == 1:
+        st.success(get_text("translation_success", ui_lang))
+    else:
+        st.success(get_text("batch_completed", ui_lang).format(len(result['files'])))
+    stats = [output['stats'] for output in result['files']]
+    st.caption(get_text("saved_calls", ui_lang).format(
+        sum(stat['saved_calls'] for stat in stats), sum(stat['entries'] for stat in stats)
+    ))
+    skipped_calls = sum(stat['skipped'] for stat in stats)
+    if skipped_calls:
+        st.caption(get_text("skipped_calls", ui_lang).format(skipped_calls))
+    merged_cues = sum(stat.get('merged', 0) for stat in stats)
+    if merged_cues:
+        st.caption(get_text("merged_cues", ui_lang).format(merged_cues))
+    if len(result['files']) == 1:
+        st.caption(get_text("detected_encoding", ui_lang).format(stats[0]['encoding']))
+    else:
+        st.caption(get_text("detected_encoding", ui_lang).format(
+            ", ".join(f"{output['name']} ({output['stats']['encoding']})" for output in result['files'])
+        ))
+    show_failures(result['failures'], ui_lang)
+    show_parse_issues(result['parse_issues'], ui_lang)
+    show_request_metrics(result['metrics'], ui_lang, result['adaptive_history'])
+
+def show_finished_jobs(jobs, ui_lang):
+    """Bilan de la dernière tâche terminée et liste des précédentes"""
+    finished = [job for job in jobs if job['status'] not in ACTIVE_STATUSES]
+    if not finished:
+        return
+    show_job_outcome(finished[0], ui_lang)
+    
+    if len(finished) > 1:
+        with st.expander(get_text("previous_jobs", ui_lang), expanded=False):
+            for job in finished[1:]:
+                col_name, col_show = st.columns([4, 1])
+                started = time.strftime('%d/%m %H:%M', time.localtime(job['created']))
+                col_name.write(f"{JOB_ICONS[job['status']]} {started} — **{job_title(job, ui_lang)}**")
+                if job['status'] == 'done' and col_show.button(get_text("show_result", ui_lang), key=f"show_{job['id']}"):
+                    st.session_state.selected_job = job['id']
+                    st.rerun()
+
+def create_zip_from_files(paths, zip_path):
+    """Crée sur disque un fichier ZIP contenant tous les fichiers traduits et renvoie son chemin
+
+    Chaque fichier est compressé depuis le disque par blocs : la mémoire utilisée ne
+    dépend ni du nombre ni de la taille des fichiers.
+    """
+    zip_path = Path(zip_path)
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for path in paths:
+            zip_file.write(path, Path(path).name)
+    return zip_path
+
+def read_preview(path, count=15):
+    """Premières lignes d'un fichier traduit et indication d'un aperçu tronqué, sans lire tout le fichier"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in itertools.islice(f, count + 1)]
+    return lines[:count], len(lines) > count
+
+def open_download(path):
+    """Contenu d'un fichier de résultat, lu seulement au clic sur le bouton de téléchargement
+
+    Une fonction qui renvoie les octets plutôt qu'un fichier ouvert, que Streamlit lirait
+    sans le fermer.
+    """
+    return Path(path).read_bytes
 
 # Configuration de la page
 st.set_page_config(
@@ -333,30 +853,54 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_translation_memory():
+    """Mémoire de traduction partagée par toutes les sessions du serveur"""
+    return TranslationMemory()
+
+@st.cache_resource
+def get_job_queue():
+    """File des traductions en arrière-plan partagée par toutes les sessions du serveur
+
+    Au plus DEFAULT_MAX_JOBS traductions s'exécutent en même temps, tous utilisateurs confondus.
+    """
+    memory = get_translation_memory()
+    return shared_queue(lambda job, progress: run_translation_job(job, progress, memory), max_jobs=DEFAULT_MAX_JOBS)
+
+def get_client_id():
+    """Identifiant du navigateur, conservé dans l'URL pour retrouver ses traductions après un rechargement"""
+    client_id = st.query_params.get('client')
+    if not client_id:
+        client_id = st.query_params['client'] = uuid.uuid4().hex
+    return client_id
+
 def check_ollama_connection(url):
-    """Vérifie la connexion à Ollama"""
+    """Vérifie la connexion à Ollama (au moins un serveur joignable si plusieurs URL)"""
     try:
-        response = requests.get(f"{url}/api/tags", timeout=5)
-        return response.status_code == 200
-    except:
+        return any(models is not None for models in EndpointPool(url).check_health().values())
+    except ValueError:
         return False
 
 def get_available_models(url):
-    """Récupère la liste des modèles disponibles"""
+    """Récupère la liste des modèles disponibles sur les serveurs joignables"""
     try:
-        response = requests.get(f"{url}/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            return [model['name'] for model in models]
-        return []
-    except:
+        health = EndpointPool(url).check_health()
+    except ValueError:
         return []
+    models = []
+    for server_models in health.values():
+        for model in server_models or []:
+            if model not in models:
+                models.append(model)
+    return models
 
 def main():
     # Initialiser la langue dans session_state si elle n'existe pas
     if 'ui_language' not in st.session_state:
         st.session_state.ui_language = 'fr'
     
+    client_id = get_client_id()
+    
     # Sidebar pour la configuration
     with st.sidebar:
         # Sélecteur de langue en haut de la sidebar
@@ -390,6 +934,16 @@ def main():
             help=get_text("ollama_url_help", ui_lang)
         )
         
+        # Répartition des requêtes entre plusieurs serveurs
+        balance = STRATEGIES[0]
+        if len(parse_urls(ollama_url)) > 1:
+            balance = st.selectbox(
+                get_text("balance", ui_lang),
+                STRATEGIES,
+                format_func=lambda strategy: get_text(f"balance_{strategy}", ui_lang),
+                help=get_text("balance_help", ui_lang)
+            )
+        
         # Test de connexion
         if st.button(get_text("test_connection", ui_lang)):
             with st.spinner(get_text("testing_connection", ui_lang)):
@@ -410,6 +964,107 @@ def main():
             help=get_text("model_help", ui_lang)
         )
         
+        # Durée de maintien du modèle en mémoire entre deux traductions
+        keep_alive = st.text_input(
+            get_text("keep_alive", ui_lang),
+            value="30m",
+            help=get_text("keep_alive_help", ui_lang)
+        )
+        
+        # Nombre de requêtes parallèles
+        workers = st.number_input(
+            get_text("workers", ui_lang),
+            min_value=1,
+            max_value=16,
+            value=1,
+            help=get_text("workers_help", ui_lang)
+        )
+        
+        # Ajustement automatique du nombre de requêtes en vol
+        adaptive = st.checkbox(
+            get_text("adaptive", ui_lang),
+            value=False,
+            help=get_text("adaptive_help", ui_lang)
+        )
+        
+        # Nombre d'entrées par requête
+        batch_size = st.number_input(
+            get_text("batch_size", ui_lang),
+            min_value=1,
+            max_value=50,
+            value=1,
+            help=get_text("batch_size_help", ui_lang)
+        )
+        
+        # Mode contexte : sous-titres précédents joints à chaque requête
+        context_window = st.number_input(
+            get_text("context_window", ui_lang),
+            min_value=0,
+            max_value=20,
+            value=0,
+            help=get_text("context_window_help", ui_lang)
+        )
+        
+        # Mémoire de traduction partagée
+        use_memory = st.checkbox(
+            get_text("use_memory", ui_lang),
+            value=True,
+            help=get_text("use_memory_help", ui_lang)
+        )
+        
+        # Textes recopiés sans appel au modèle
+        use_passthrough = st.checkbox(
+            get_text("use_passthrough", ui_lang),
+            value=True,
+            help=get_text("use_passthrough_help", ui_lang)
+        )
+        
+        # Phrases coupées sur plusieurs sous-titres
+        merge_sentences = st.checkbox(
+            get_text("merge_sentences", ui_lang),
+            value=False,
+            help=get_text("merge_sentences_help", ui_lang)
+        )
+        
+        # Intervalle de temps à traduire (vide = tout le fichier)
+        col_from, col_to = st.columns(2)
+        with col_from:
+            time_from = st.text_input(get_text("time_from", ui_lang), value="", placeholder="00:10:00",
+                                      help=get_text("time_range_help", ui_lang))
+        with col_to:
+            time_to = st.text_input(get_text("time_to", ui_lang), value="", placeholder="00:20:00",
+                                    help=get_text("time_range_help", ui_lang))
+        
+        # Reprise des traductions interrompues
+        resume = st.checkbox(
+            get_text("resume", ui_lang),
+            value=True,
+            help=get_text("resume_help", ui_lang)
+        )
+        
+        # Nombre de fichiers traduits en même temps en traitement en série
+        parallel_files = st.number_input(
+            get_text("parallel_files", ui_lang),
+            min_value=1,
+            max_value=32,
+            value=4,
+            help=get_text("parallel_files_help", ui_lang)
+        )
+        
+        # Réponses en flux : aperçu de la traduction en cours
+        use_stream = st.checkbox(
+            get_text("stream", ui_lang),
+            value=True,
+            help=get_text("stream_help", ui_lang)
+        )
+        
+        # Moteur asyncio pour le traitement en série
+        use_async_engine = st.checkbox(
+            get_text("async_engine", ui_lang),
+            value=False,
+            help=get_text("async_engine_help", ui_lang)
+        )
+        
         st.divider()
         
         # Configuration des langues
@@ -485,285 +1140,118 @@ def main():
             # Prévisualisation du contenu (premier fichier seulement)
             if len(uploaded_files) == 1:
                 with st.expander(get_text("preview_file", ui_lang), expanded=False):
-                    try:
-                        content = uploaded_files[0].read().decode('utf-8')
-                        uploaded_files[0].seek(0)  # Reset file pointer
-                        
-                        # Afficher les premières lignes
-                        lines = content.split('\n')[:20]
-                        st.code('\n'.join(lines), language='text')
-                        
-                        if len(content.split('\n')) > 20:
-                            st.info(get_text("file_truncated", ui_lang))
-                            
-                    except UnicodeDecodeError:
-                        st.warning(get_text("encoding_warning", ui_lang))
+                    # Le début du fichier suffit pour l'aperçu et le choix de l'encodage
+                    data = uploaded_files[0].getvalue()
+                    content, encoding = decode_srt(data[:SAMPLE_SIZE])
+                    st.caption(get_text("detected_encoding", ui_lang).format(encoding))
+                    
+                    # Afficher les premières lignes
+                    lines = content.split('\n')
+                    st.code('\n'.join(lines[:20]), language='text')
+                    
+                    if len(lines) > 20 or len(data) > SAMPLE_SIZE:
+                        st.info(get_text("file_truncated", ui_lang))
             
-            # Bouton de traduction
+            # Bouton de traduction : la tâche est confiée à la file d'arrière-plan
             if st.button(get_text("start_translation", ui_lang), type="primary", use_container_width=True):
                 # Vérifier la connexion Ollama
                 if not check_ollama_connection(ollama_url):
                     st.error(get_text("ollama_connection_error", ui_lang))
                     return
                 
-                # Créer le traducteur
-                translator = SRTTranslator(ollama_url)
-                translator.model = model_name
+                try:
+                    time_range = parse_time_range(time_from, time_to)
+                except ValueError:
+                    st.error(get_text("invalid_time_range", ui_lang))
+                    return
                 
                 if len(uploaded_files) == 1:
-                    # Traitement d'un seul fichier
-                    try:
-                        file = uploaded_files[0]
-                        
-                        # Parser le fichier pour connaître le nombre d'entrées
-                        file_content = file.read().decode('utf-8')
-                        file.seek(0)
-                        entries = translator.parse_srt(file_content)
-                        
-                        if not entries:
-                            st.error(get_text("no_entries_found", ui_lang))
-                            return
-                        
-                        # Initialiser l'état d'annulation
-                        if 'cancel_translation' not in st.session_state:
-                            st.session_state.cancel_translation = False
-                        
-                        # Interface de progression
-                        progress_container = st.container()
-                        with progress_container:
-                            col_progress, col_cancel = st.columns([4, 1])
-                            
-                            with col_progress:
-                                progress_bar = st.progress(0)
-                                status_text = st.empty()
-                                status_text.text(get_text("entries_found", ui_lang).format(len(entries)))
-                            
-                            with col_cancel:
-                                if st.button(get_text("cancel_translation", ui_lang), type="secondary", use_container_width=True):
-                                    st.session_state.cancel_translation = True
-                                    st.rerun()
-                        
-                        # Callbacks pour la progression et l'annulation
-                        def update_progress(current, total, current_text):
-                            progress = (current + 1) / total
-                            progress_bar.progress(progress)
-                            # Affichage détaillé : "5/342 : <texte>"
-                            status_text.text(f"{current + 1}/{total} : {current_text}")
-                        
-                        def check_cancel():
-                            return st.session_state.get('cancel_translation', False)
-                        
-                        # Traiter le fichier avec progression en temps réel
-                        translated_content, error = process_single_file(
-                            file, translator, source_lang, target_lang, ui_lang,
-                            progress_callback=update_progress,
-                            cancel_callback=check_cancel
-                        )
-                        
-                        if error:
-                            if "annulée" in error or "cancelled" in error:
-                                st.warning(error)
-                                st.session_state.cancel_translation = False
-                            else:
-                                st.error(error)
-                            return
-                        
-                        progress_bar.progress(1.0)
-                        status_text.text(get_text("translation_completed", ui_lang))
-                        
-                        # Stocker dans la session
-                        st.session_state['translated_content'] = translated_content
-                        st.session_state['original_filename'] = file.name
-                        st.session_state['processing_mode'] = 'single'
-                        st.session_state.cancel_translation = False
-                        
-                        st.success(get_text("translation_success", ui_lang))
-                        
-                    except Exception as e:
-                        st.error(get_text("translation_error", ui_lang).format(str(e)))
-                        st.session_state.cancel_translation = False
+                    # Nombre d'entrées annoncé (le fichier est analysé pendant la traduction)
+                    data = uploaded_files[0].getvalue()
+                    if not count_cues(data, detect_encoding(data)):
+                        st.error(get_text("no_entries_found", ui_lang))
+                        return
                 
-                else:
-                    # Traitement en lot
-                    try:
-                        # Initialiser l'état d'annulation
-                        if 'cancel_translation' not in st.session_state:
-                            st.session_state.cancel_translation = False
-                        
-                        # Interface de progression
-                        progress_container = st.container()
-                        with progress_container:
-                            col_progress, col_cancel = st.columns([4, 1])
-                            
-                            with col_progress:
-                                progress_bar = st.progress(0)
-                                file_status = st.empty()  # Pour afficher le fichier en cours
-                                status_text = st.empty()  # Pour afficher la progression détaillée
-                            
-                            with col_cancel:
-                                if st.button(get_text("cancel_translation", ui_lang), type="secondary", use_container_width=True, key="cancel_batch"):
-                                    st.session_state.cancel_translation = True
-                                    st.rerun()
-                        
-                        translated_files_data = []
-                        total_files = len(uploaded_files)
-                        
-                        for i, file in enumerate(uploaded_files):
-                            # Vérifier l'annulation
-                            if st.session_state.get('cancel_translation', False):
-                                st.warning(get_text("translation_cancelled", ui_lang))
-                                st.session_state.cancel_translation = False
-                                return
-                            
-                            # Callback pour vérifier l'annulation pendant la traduction du fichier
-                            def check_cancel():
-                                return st.session_state.get('cancel_translation', False)
-                            
-                            # Callback pour la progression détaillée de chaque fichier
-                            def update_detailed_progress(current_entry, total_entries, current_text):
-                                # Progression globale des fichiers
-                                file_progress = i / total_files
-                                # Progression interne du fichier actuel
-                                entry_progress = (current_entry + 1) / total_entries if total_entries > 0 else 0
-                                # Progression combinée
-                                combined_progress = (i + entry_progress) / total_files
-                                
-                                progress_bar.progress(combined_progress)
-                                # Affichage du fichier en cours
-                                file_status.text(get_text("batch_processing", ui_lang).format(i+1, total_files, file.name))
-                                # Affichage détaillé : "5/342 : <texte>"
-                                status_text.text(f"{current_entry + 1}/{total_entries} : {current_text}")
-                            
-                            # Mise à jour initiale
-                            file_status.text(get_text("batch_processing", ui_lang).format(i+1, total_files, file.name))
-                            status_text.text(get_text("initializing", ui_lang))
-                            
-                            # Traiter le fichier avec progression détaillée
-                            translated_content, error = process_single_file(
-                                file, translator, source_lang, target_lang, ui_lang,
-                                progress_callback=update_detailed_progress,
-                                cancel_callback=check_cancel
-                            )
-                            
-                            if error:
-                                if "annulée" in error or "cancelled" in error:
-                                    st.warning(get_text("translation_cancelled", ui_lang))
-                                    st.session_state.cancel_translation = False
-                                    return
-                                else:
-                                    st.warning(f"⚠️ Erreur avec {file.name}: {error}")
-                                    continue
-                            
-                            translated_files_data.append((file.name, translated_content))
-                        
-                        progress_bar.progress(1.0)
-                        file_status.text("🎉 " + get_text("batch_completed", ui_lang).format(len(translated_files_data)))
-                        status_text.text(get_text("batch_success", ui_lang))
-                        
-                        # Stocker dans la session
-                        st.session_state['translated_files_data'] = translated_files_data
-                        st.session_state['processing_mode'] = 'batch'
-                        st.session_state['target_lang'] = target_lang
-                        st.session_state.cancel_translation = False
-                        
-                        st.success(get_text("batch_completed", ui_lang).format(len(translated_files_data)))
-                        
-                    except Exception as e:
-                        st.error(get_text("translation_error", ui_lang).format(str(e)))
-                        st.session_state.cancel_translation = False
+                settings = {
+                    'ollama_url': ollama_url, 'model': model_name, 'keep_alive': keep_alive,
+                    'workers': workers, 'adaptive': adaptive, 'batch_size': batch_size,
+                    'context_window': context_window, 'balance': balance, 'use_memory': use_memory,
+                    'use_passthrough': use_passthrough, 'merge_sentences': merge_sentences, 'resume': resume,
+                    'parallel_files': parallel_files, 'time_range': time_range,
+                    'stream': use_stream, 'async_engine': use_async_engine,
+                    'source_lang': source_lang, 'target_lang': target_lang, 'ui_lang': ui_lang,
+                }
+                get_job_queue().submit(client_id, [(file.name, file.getvalue()) for file in uploaded_files], settings)
+                st.success(get_text("job_submitted", ui_lang))
+        
+        # Traductions de ce navigateur : progression relue chaque seconde tant qu'une tâche est active
+        jobs = get_job_queue().list(client_id)
+        active = any(job['status'] in ACTIVE_STATUSES for job in jobs)
+        st.fragment(show_active_jobs, run_every=1.0 if active else None)(client_id, ui_lang)
+        show_finished_jobs(jobs, ui_lang)
     
     with col2:
         st.header(get_text("result_section", ui_lang))
         
-        # Vérifier le mode de traitement
-        processing_mode = st.session_state.get('processing_mode', 'single')
+        # Résultat affiché : tâche choisie, sinon la dernière traduction terminée. Seul son
+        # identifiant est gardé dans la session : fichiers et statistiques sont lus sur disque.
+        finished = [job for job in jobs if job['status'] == 'done']
+        selected = st.session_state.get('selected_job')
+        result_job = next((job for job in finished if job['id'] == selected), finished[0] if finished else None)
         
-        if processing_mode == 'single' and 'translated_content' in st.session_state and st.session_state['translated_content']:
-            # Traitement d'un seul fichier
-            st.success(get_text("file_ready", ui_lang))
+        if result_job is not None:
+            output_dir = get_job_queue().output_dir(result_job['id'])
+            outputs = result_job['result']['files']
+            batch_target_lang = result_job['settings']['target_lang']
             
-            # Aperçu du résultat
-            with st.expander(get_text("preview_translation", ui_lang), expanded=True):
-                lines = st.session_state['translated_content'].split('\n')[:15]
+            if len(result_job['names']) == 1:
+                st.success(get_text("file_ready", ui_lang))
+            else:
+                st.success(get_text("batch_completed", ui_lang).format(len(outputs)))
+                
+                # Liste des fichiers traduits
+                with st.expander(f"📋 {len(outputs)} fichiers traduits", expanded=True):
+                    for i, output in enumerate(outputs, 1):
+                        st.write(f"{i}. **{output['output']}**")
+            
+            # Aperçu du premier fichier (début du fichier seulement)
+            with st.expander(get_text("preview_translation", ui_lang), expanded=len(outputs) == 1):
+                lines, truncated = read_preview(output_dir / outputs[0]['output'])
                 st.code('\n'.join(lines), language='text')
                 
-                if len(st.session_state['translated_content'].split('\n')) > 15:
+                if truncated:
                     st.info(get_text("preview_truncated", ui_lang))
             
-            # Nom du fichier de sortie
-            original_name = st.session_state.get('original_filename', 'subtitle.srt')
-            name_without_ext = Path(original_name).stem
-            output_filename = f"{name_without_ext}-{target_lang.upper()}.srt"
-            
-            # Bouton de téléchargement
-            st.download_button(
-                label=get_text("download_file", ui_lang),
-                data=st.session_state['translated_content'],
-                file_name=output_filename,
-                mime="text/plain",
-                type="primary",
-                use_container_width=True
-            )
-            
-            # Statistiques
-            st.subheader(get_text("statistics", ui_lang))
-            lines_count = len([line for line in st.session_state['translated_content'].split('\n') if line.strip()])
-            entries_count = st.session_state['translated_content'].count('\n\n')
-            
-            col_stat1, col_stat2 = st.columns(2)
-            with col_stat1:
-                st.metric(get_text("total_lines", ui_lang), lines_count)
-            with col_stat2:
-                st.metric(get_text("translated_entries", ui_lang), entries_count)
-        
-        elif processing_mode == 'batch' and 'translated_files_data' in st.session_state and st.session_state['translated_files_data']:
-            # Traitement en lot
-            files_data = st.session_state['translated_files_data']
-            batch_target_lang = st.session_state.get('target_lang', target_lang)
-            
-            st.success(get_text("batch_completed", ui_lang).format(len(files_data)))
-            
-            # Liste des fichiers traduits
-            with st.expander(f"📋 {len(files_data)} fichiers traduits", expanded=True):
-                for i, (original_name, _) in enumerate(files_data, 1):
-                    name_without_ext = Path(original_name).stem
-                    output_name = f"{name_without_ext}-{batch_target_lang.upper()}.srt"
-                    st.write(f"{i}. **{output_name}**")
-            
-            # Aperçu du premier fichier
-            if files_data:
-                with st.expander(get_text("preview_translation", ui_lang), expanded=False):
-                    first_file_content = files_data[0][1]
-                    lines = first_file_content.split('\n')[:15]
-                    st.code('\n'.join(lines), language='text')
-                    
-                    if len(first_file_content.split('\n')) > 15:
-                        st.info(get_text("preview_truncated", ui_lang))
-            
-            # Bouton de téléchargement ZIP
-            if st.button(get_text("download_all", ui_lang), type="primary", use_container_width=True):
-                # Créer le ZIP
-                zip_buffer = create_zip_from_files(files_data, batch_target_lang)
-                
-                # Bouton de téléchargement
+            # Téléchargement : fichier ou archive lus sur disque au moment du clic
+            if len(outputs) == 1:
                 st.download_button(
-                    label="📦 Télécharger le fichier ZIP",
-                    data=zip_buffer.getvalue(),
+                    label=get_text("download_file", ui_lang),
+                    data=open_download(output_dir / outputs[0]['output']),
+                    file_name=outputs[0]['output'],
+                    mime="text/plain",
+                    type="primary",
+                    use_container_width=True
+                )
+            else:
+                st.download_button(
+                    label=get_text("download_all", ui_lang),
+                    data=open_download(output_dir / result_job['result']['archive']),
                     file_name=f"subtitles-{batch_target_lang.upper()}.zip",
                     mime="application/zip",
+                    type="primary",
                     use_container_width=True
                 )
             
-            # Statistiques
+            # Statistiques, calculées pendant la traduction
             st.subheader(get_text("statistics", ui_lang))
-            total_lines = sum(len([line for line in content.split('\n') if line.strip()]) for _, content in files_data)
-            total_entries = sum(content.count('\n\n') for _, content in files_data)
-            
             col_stat1, col_stat2 = st.columns(2)
             with col_stat1:
-                st.metric("Fichiers traduits", len(files_data))
+                if len(outputs) == 1:
+                    st.metric(get_text("total_lines", ui_lang), outputs[0]['stats']['lines'])
+                else:
+                    st.metric("Fichiers traduits", len(outputs))
             with col_stat2:
-                st.metric(get_text("translated_entries", ui_lang), total_entries)
+                st.metric(get_text("translated_entries", ui_lang), sum(output['stats']['entries'] for output in outputs))
         
         else:
             st.info(get_text("upload_info", ui_lang))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mémoire de traduction persistante (SQLite) partagée entre les exécutions
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_MEMORY_PATH = Path.home() / ".cache" / "srt-translator" / "translation_memory.sqlite3"
+DEFAULT_MAX_ENTRIES = 100000
+
+class TranslationMemory:
+    """Cache des traductions indexé par (modèle, langue source, langue cible, texte)
+
+    Au-delà de `max_entries` traductions, les moins récemment utilisées sont supprimées.
+    Une même instance peut être utilisée depuis plusieurs threads.
+    """
+
+    def __init__(self, path=DEFAULT_MEMORY_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        # WAL : lectures concurrentes possibles depuis d'autres processus (CLI / Streamlit)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory (
+                model TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                text TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, source_lang, target_lang, text)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+
+        self._size, last_used = self._conn.execute("SELECT COUNT(*), MAX(last_used) FROM memory").fetchone()
+        self._clock = last_used or 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, model, source_lang, target_lang, text):
+        """Renvoie la traduction mémorisée, ou None si elle est absente"""
+        key = (model, source_lang, target_lang, text)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation FROM memory WHERE model=? AND source_lang=? AND target_lang=? AND text=?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE memory SET last_used=? WHERE model=? AND source_lang=? AND target_lang=? AND text=?",
+                (self._tick(),) + key
+            )
+            return row[0]
+
+    def put(self, model, source_lang, target_lang, text, translation):
+        """Mémorise une traduction et applique la limite de taille"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO memory VALUES (?, ?, ?, ?, ?, ?)",
+                (model, source_lang, target_lang, text, translation, self._tick())
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self._conn.execute(
+                    "UPDATE memory SET translation=?, last_used=? WHERE model=? AND source_lang=? AND target_lang=? AND text=?",
+                    (translation, self._tick(), model, source_lang, target_lang, text)
+                )
+
+            if self.max_entries and self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées (10% de marge pour amortir)"""
+        excess = self._size - self.max_entries + self.max_entries // 10
+        self._conn.execute(
+            "DELETE FROM memory WHERE rowid IN (SELECT rowid FROM memory ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        with self._lock:
+            self._conn.close()